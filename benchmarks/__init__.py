@@ -0,0 +1 @@
+"""Headless fleet-scale benchmarks for MultiAndroidLab against a fake adb backend."""
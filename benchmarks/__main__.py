@@ -0,0 +1,156 @@
+"""Fleet-scale benchmark runner: `python -m benchmarks`.
+
+Simulates 1, 10, 50 and 200 devices with the fake adb, runs every scenario
+headless and writes the results as JSON (one file per run) so two commits can
+be compared with `python -m benchmarks.compare`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from .fake_adb import FLEET_ENV_VAR, FakeAdbServer, FakeFleet, FleetConfig, stub_directory, write_stub_binary
+from .metrics import Measurement, ScenarioResult
+
+DEFAULT_SIZES = (1, 10, 50, 200)
+BACKENDS = ("server", "binary")
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--devices", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Fleet sizes.")
+    parser.add_argument(
+        "-b",
+        "--backend",
+        choices=BACKENDS,
+        nargs="+",
+        default=["server"],
+        help="server: in-process client against the fake server; binary: the adb stub process per command.",
+    )
+    parser.add_argument("-s", "--scenario", nargs="+", default=None, help="Scenarios to run (default: all).")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Runs of each scenario.")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Per-command device latency.")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Uniform jitter around the latency.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of commands that fail.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-j", "--concurrency", type=int, default=None, help="Fan-out concurrency override.")
+    parser.add_argument("-o", "--output", type=Path, default=None, help="JSON file (default: benchmarks/results/).")
+    parser.add_argument("--log-level", default="CRITICAL", help="Log level written to stderr.")
+    return parser
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        proc = subprocess.run(["git", *args], cwd=ROOT, check=True, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return proc.stdout.strip()
+
+
+def _closed_port() -> int:
+    """A local port nothing listens on, so the client falls back to the adb binary."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_fleet(backend: str, config: FleetConfig, scenarios: List[str], repeat: int, concurrency: Optional[int]):
+    from multi_android_lab.adb import ADBManager, AdbClient
+
+    from .scenarios import SCENARIOS
+
+    # The stub binary reads the fleet from the environment of each spawned process.
+    os.environ[FLEET_ENV_VAR] = config.to_env()
+    server = FakeAdbServer(FakeFleet(config)).start() if backend == "server" else None
+    client = AdbClient(port=server.port if server else _closed_port())
+    # A zero TTL makes every tick re-probe battery and uptime, as after a real 2 s refresh interval.
+    manager = ADBManager(client=client, telemetry_ttl=0.0)
+    if concurrency:
+        manager.fanout_concurrency = concurrency
+    results = []
+    try:
+        for name in scenarios:
+            result = ScenarioResult(name, backend, config.devices)
+            with Measurement(result):
+                SCENARIOS[name](manager, result, repeat)
+            print(result.describe(), flush=True)
+            results.append(result)
+    finally:
+        for device in list(manager.devices.values()):
+            device.close()
+        if server:
+            server.stop()
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _build_parser().parse_args(argv)
+    # The adb package resolves its binary on import, so point it at the stub first.
+    os.environ["MULTI_ANDROID_LAB_ADB"] = str(write_stub_binary(stub_directory()))
+    from multi_android_lab.utils import set_console_stream, set_log_level
+
+    set_console_stream(sys.stderr)
+    set_log_level(args.log_level)
+    from .scenarios import SCENARIOS
+
+    scenarios = args.scenario or list(SCENARIOS)
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})", file=sys.stderr)
+        return 2
+
+    results = []
+    for backend in args.backend:
+        for size in args.devices:
+            config = FleetConfig(
+                devices=size,
+                latency=args.latency_ms / 1000,
+                jitter=args.jitter_ms / 1000,
+                failure_rate=args.failure_rate,
+                seed=args.seed,
+            )
+            results.extend(run_fleet(backend, config, scenarios, args.repeat, args.concurrency))
+
+    commit = _git("rev-parse", "HEAD")
+    created_at = datetime.datetime.now(datetime.timezone.utc)
+    payload = {
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "created_at": created_at.isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "repeat": args.repeat,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "failure_rate": args.failure_rate,
+            "seed": args.seed,
+            "concurrency": args.concurrency,
+        },
+        "results": [result.to_dict() for result in results],
+        # Scenario -> why it did not run, so a missing measurement is never mistaken for a result.
+        "skipped": {result.scenario: result.skipped for result in results if result.skipped},
+    }
+    output = args.output or RESULTS_DIR / f"{created_at:%Y%m%d-%H%M%S}-{(commit or 'nogit')[:10]}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    print(f"Results written to {output}")
+    for scenario, reason in payload["skipped"].items():
+        print(f"Skipped {scenario}: {reason}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
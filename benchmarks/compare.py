@@ -0,0 +1,72 @@
+"""Compare two benchmark result files: `python -m benchmarks.compare BASE HEAD`.
+
+Rows are matched by scenario, backend and fleet size. The exit status is 1 when
+throughput dropped or p99 latency grew by more than the threshold. Rows that
+were skipped on either side (e.g. Qt scenarios without PySide6) are listed
+with the reason instead of being compared.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+Key = Tuple[str, str, int]
+
+
+def _load(path: Path) -> Tuple[dict, Dict[Key, dict], Dict[Key, str]]:
+    """Payload, measured rows and skipped rows (with the reason) of one result file."""
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    rows: Dict[Key, dict] = {}
+    skipped: Dict[Key, str] = {}
+    for row in payload["results"]:
+        key = (row["scenario"], row["backend"], row["devices"])
+        if row.get("skipped"):
+            skipped[key] = row["skipped"]
+        else:
+            rows[key] = row
+    return payload, rows, skipped
+
+
+def _change(base: float, head: float) -> float:
+    return (head - base) / base if base else 0.0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare", description=__doc__.splitlines()[0])
+    parser.add_argument("base", type=Path)
+    parser.add_argument("head", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative change (default: 0.10).")
+    args = parser.parse_args(argv)
+
+    base_payload, base_rows, base_skipped = _load(args.base)
+    head_payload, head_rows, head_skipped = _load(args.head)
+    print(f"base {str(base_payload.get('commit'))[:10]}  head {str(head_payload.get('commit'))[:10]}")
+    regressions = 0
+    for key in sorted(base_rows.keys() & head_rows.keys(), key=lambda key: (key[0], key[1], key[2])):
+        base, head = base_rows[key], head_rows[key]
+        throughput = _change(base["throughput"], head["throughput"])
+        p99 = _change(base["p99_ms"], head["p99_ms"])
+        regressed = throughput < -args.threshold or p99 > args.threshold
+        regressions += regressed
+        scenario, backend, devices = key
+        print(
+            f"{scenario:<18} {backend:<6} N={devices:<4} "
+            f"throughput {base['throughput']:9.1f} -> {head['throughput']:9.1f} ({throughput:+6.1%})  "
+            f"p99 {base['p99_ms']:8.1f} -> {head['p99_ms']:8.1f} ms ({p99:+6.1%})" + ("  REGRESSION" if regressed else "")
+        )
+    for key in sorted(base_skipped.keys() | head_skipped.keys()):
+        scenario, backend, devices = key
+        reasons = (("base", base_skipped.get(key)), ("head", head_skipped.get(key)))
+        sides = [f"{side} ({reason})" for side, reason in reasons if reason]
+        print(f"{scenario:<18} {backend:<6} N={devices:<4} SKIPPED in {' and '.join(sides)}")
+    missing = sorted((base_rows.keys() ^ head_rows.keys()) - base_skipped.keys() - head_skipped.keys())
+    if missing:
+        print(f"{len(missing)} rows only in one file: {', '.join(f'{s}/{b}/N={n}' for s, b, n in missing)}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,473 @@
+"""Scriptable fake adb: a smart-socket server and a stub binary for N simulated devices.
+
+Both backends answer from the same `FakeFleet`, so a benchmark can compare the
+in-process client with the binary fallback under identical device behaviour.
+Every device command waits `latency` ± `jitter` seconds and fails with
+probability `failure_rate`; draws come from one seeded generator. The server
+also speaks the persistent-shell framing and the `sync:` service against an
+in-memory file tree per device, which is what the tests under tests/ use.
+
+Run as the adb binary with the fleet described by MULTI_ANDROID_LAB_FAKE_FLEET:
+
+    MULTI_ANDROID_LAB_FAKE_FLEET='{"devices": 10}' python -m benchmarks.fake_adb devices -l
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import re
+import socketserver
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+FLEET_ENV_VAR = "MULTI_ANDROID_LAB_FAKE_FLEET"
+FEATURES = "shell_v2,cmd,stat_v2,ls_v2"
+
+_SHELL_HEADER = struct.Struct("<BI")
+_SHELL_ID_STDIN = 0
+_SHELL_ID_STDOUT = 1
+_SHELL_ID_EXIT = 3
+_SHELL_ID_CLOSE_STDIN = 4
+# What ShellSession writes for each command: the command, then a marker and its exit status.
+_SESSION_SCRIPT = re.compile(rb"\(\n(.*?)\n\) </dev/null 2>&1; printf '\\n(\S+) %d\\n' \$\?\n", re.DOTALL)
+_STREAMED_INSTALL = re.compile(r"\binstall\b.* -S (\d+)")
+# What synchronized_dispatch stages: a ready line with the clock, `read`, the clock again, then the command.
+_STAGED_SCRIPT = re.compile(r"echo (\S+) \$\(date \+%s%N\); read _go; date \+%s%N; (.*)", re.DOTALL)
+_SYNC_REQUEST = struct.Struct("<4sI")
+_SYNC_STAT_V1 = struct.Struct("<III")
+_SYNC_DENT_V1 = struct.Struct("<IIII")
+_SYNC_STAT_V2 = struct.Struct("<IQQIIIIQqqq")
+_SYNC_DATA_MAX = 64 * 1024
+_DIR_MODE = stat.S_IFDIR | 0o755
+# adb joins shell arguments with spaces, so the binary path loses the quotes.
+_SECTION = re.compile(r"echo '?@@mal:(\w+)")
+_PROBE_PROP = re.compile(r"(\w+)=\$\(getprop ([\w.]+)\)")
+
+# Canned answers for the commands the telemetry probe runs.
+PROPS = {
+    "ro.product.manufacturer": "Gaucho",
+    "ro.build.version.release": "14",
+    "ro.build.version.sdk": "34",
+    "ro.product.cpu.abi": "arm64-v8a",
+}
+SECTION_OUTPUT = {
+    "wm_size": "Physical size: 1080x2400",
+    "wm_density": "Physical density: 420",
+    "battery": "Current Battery Service state:\n  AC powered: false\n  USB powered: true\n  status: 2\n"
+    "  level: {level}\n  temperature: 301",
+    "uptime": "{uptime:.2f} 1000.00",
+    "storage": "Filesystem 1K-blocks Used Available Use% Mounted on\n"
+    "/dev/block/dm-5 115000000 40000000 75000000 35% /data",
+}
+
+
+@dataclass
+class FleetConfig:
+    """Simulated fleet: size, per-command latency and jitter (seconds), failure rate."""
+
+    devices: int = 10
+    latency: float = 0.02
+    jitter: float = 0.005
+    failure_rate: float = 0.0
+    seed: int = 0
+
+    def to_env(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_env(cls) -> "FleetConfig":
+        return cls(**json.loads(os.environ.get(FLEET_ENV_VAR) or "{}"))
+
+
+class FakeFleet:
+    """Devices of a FleetConfig and the scripted answers to their shell commands."""
+
+    def __init__(self, config: FleetConfig) -> None:
+        self.config = config
+        self.serials = [f"bench-{index:04d}" for index in range(1, config.devices + 1)]
+        self.features = FEATURES
+        self.commands = 0
+        # Exact command -> (output, exit code, extra delay in seconds).
+        self.scripts: Dict[str, Tuple[str, int, float]] = {}
+        # Commands whose stream is cut right after they run, so their answer never arrives.
+        self.dropped: Set[str] = set()
+        # Every (serial, command) that ran, in order.
+        self.history: List[Tuple[str, str]] = []
+        # Per serial: path -> (data, mode, mtime), served by the sync: service.
+        self.files: Dict[str, Dict[str, Tuple[bytes, int, int]]] = {serial: {} for serial in self.serials}
+        self._random = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+
+    def device_list(self) -> str:
+        # Four devices per USB hub, like a rack of powered hubs.
+        return "".join(
+            f"{serial}\tdevice usb:{index // 4 + 1}-1.{index % 4 + 1} product:bench model:Bench_{index + 1} "
+            f"device:bench transport_id:{index + 1}\n"
+            for index, serial in enumerate(self.serials)
+        )
+
+    def _draw(self) -> Tuple[float, bool]:
+        config = self.config
+        with self._lock:
+            self.commands += 1
+            delay = config.latency + self._random.uniform(-config.jitter, config.jitter)
+            failed = self._random.random() < config.failure_rate
+        return max(0.0, delay), failed
+
+    def script(self, command: str, output: str = "", exit_code: int = 0, delay: float = 0.0) -> None:
+        """Answer `command` with `output` and `exit_code` after `delay` extra seconds."""
+        self.scripts[command] = (output, exit_code, delay)
+
+    def run(self, serial: str, command: str) -> Tuple[str, int]:
+        """Answer one shell command after the simulated latency: (output, exit code)."""
+        delay, failed = self._draw()
+        command = command.strip()
+        with self._lock:
+            self.history.append((serial, command))
+        output, exit_code, extra = self.scripts.get(command, (None, 0, 0.0))
+        time.sleep(delay + extra)
+        if failed:
+            return "error: simulated failure", 1
+        if output is not None:
+            return output, exit_code
+        return self._answer(serial, command), 0
+
+    def _answer(self, serial: str, command: str) -> str:
+        if command.startswith("echo "):
+            return command[5:] + "\n"
+        if _STREAMED_INSTALL.search(command):
+            return "Success\n"
+        sections = _SECTION.findall(command)
+        if sections:
+            return "\n".join(f"@@mal:{name}\n{self._section(serial, name, command)}" for name in sections) + "\n"
+        if command.startswith("getprop "):
+            return self._prop(serial, command.split()[1]) + "\n"
+        if command in ("wm size", "wm density"):
+            return SECTION_OUTPUT[command.replace(" ", "_")] + "\n"
+        # input/am/pm and anything else succeed silently.
+        return ""
+
+    def _section(self, serial: str, name: str, command: str) -> str:
+        if name == "props":
+            return "\n".join(f"{key}={self._prop(serial, prop)}" for key, prop in _PROBE_PROP.findall(command))
+        index = self.serials.index(serial) if serial in self.serials else 0
+        uptime = time.monotonic() - self._started + 1000
+        return SECTION_OUTPUT.get(name, "").format(level=50 + index % 50, uptime=uptime)
+
+    def _prop(self, serial: str, prop: str) -> str:
+        if prop == "ro.product.model":
+            return f"Bench {serial[-4:]}"
+        if prop == "ro.serialno":
+            return serial
+        return PROPS.get(prop, "")
+
+
+# ----------------------------------------------------------------------
+# Smart-socket server
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    server: "FakeAdbServer"
+
+    def _recv(self, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                raise EOFError
+            data += chunk
+        return bytes(data)
+
+    def _request(self) -> str:
+        return self._recv(int(self._recv(4), 16)).decode("utf-8")
+
+    def _okay(self, payload: Optional[str] = None) -> None:
+        data = b"OKAY"
+        if payload is not None:
+            encoded = payload.encode("utf-8")
+            data += b"%04x" % len(encoded) + encoded
+        self.request.sendall(data)
+
+    def _fail(self, message: str) -> None:
+        encoded = message.encode("utf-8")
+        self.request.sendall(b"FAIL" + b"%04x" % len(encoded) + encoded)
+
+    def handle(self) -> None:
+        fleet = self.server.fleet
+        try:
+            service = self._request()
+            if service == "host:version":
+                self._okay("0029")
+            elif service in ("host:devices", "host:devices-l"):
+                self._okay(fleet.device_list())
+            elif service.startswith("host:track-devices"):
+                self._okay(fleet.device_list())
+                # The fleet never changes; hold the stream open like a real server.
+                self._recv(1)
+            elif service.startswith("host-serial:") and service.endswith(":features"):
+                self._okay(fleet.features)
+            elif service.startswith("host:transport:"):
+                self._transport(service.split(":", 2)[2])
+            else:
+                self._fail(f"unknown host service {service}")
+        except (EOFError, OSError):
+            pass
+
+    def _transport(self, serial: str) -> None:
+        fleet = self.server.fleet
+        if serial not in fleet.serials:
+            self._fail(f"device '{serial}' not found")
+            return
+        self._okay()
+        service = self._request()
+        if service == "sync:":
+            self._okay()
+            self._sync(fleet.files[serial])
+            return
+        if service in ("shell,v2,raw:", "shell,v2,raw:sh"):
+            self._okay()
+            self._session(serial)
+            return
+        if service == "exec:sh":
+            self._okay()
+            self._script(serial)
+            return
+        for prefix in ("shell,v2,raw:", "shell:", "exec:"):
+            if service.startswith(prefix):
+                command = service[len(prefix) :]
+                self._okay()
+                staged = _STAGED_SCRIPT.fullmatch(command)
+                if staged:
+                    self._staged(serial, staged.group(1), staged.group(2), v2=prefix == "shell,v2,raw:")
+                    return
+                streamed = _STREAMED_INSTALL.search(command)
+                if streamed:
+                    # `cmd package install -S <size>` reads the APK from stdin first.
+                    self._recv(int(streamed.group(1)))
+                output, exit_code = fleet.run(serial, command)
+                if command.strip() in fleet.dropped:
+                    return
+                data = output.encode("utf-8")
+                if prefix == "shell,v2,raw:":
+                    packet = _SHELL_HEADER.pack(_SHELL_ID_STDOUT, len(data)) + data if data else b""
+                    packet += _SHELL_HEADER.pack(_SHELL_ID_EXIT, 1) + bytes([exit_code])
+                    self.request.sendall(packet)
+                else:
+                    self.request.sendall(data)
+                return
+        self._fail(f"unsupported service {service}")
+
+    def _staged(self, serial: str, marker: str, command: str, v2: bool) -> None:
+        """Report ready with the clock, wait for the release newline, then answer `command`."""
+
+        def send(data: bytes) -> None:
+            self.request.sendall(_SHELL_HEADER.pack(_SHELL_ID_STDOUT, len(data)) + data if v2 else data)
+
+        send(b"%s %d\n" % (marker.encode("utf-8"), time.time_ns()))
+        stdin = b""
+        while b"\n" not in stdin:
+            if v2:
+                packet_id, length = _SHELL_HEADER.unpack(self._recv(_SHELL_HEADER.size))
+                data = self._recv(length) if length else b""
+                stdin += data if packet_id == _SHELL_ID_STDIN else b""
+            else:
+                stdin += self._recv(1)
+        started = time.time_ns()
+        output, exit_code = self.server.fleet.run(serial, command)
+        send(b"%d\n" % started + output.encode("utf-8"))
+        if v2:
+            self.request.sendall(_SHELL_HEADER.pack(_SHELL_ID_EXIT, 1) + bytes([exit_code]))
+
+    def _session(self, serial: str) -> None:
+        """Interactive `sh` over shell v2: answer each framed command as ShellSession expects."""
+        stdin = bytearray()
+        while True:
+            packet_id, length = _SHELL_HEADER.unpack(self._recv(_SHELL_HEADER.size))
+            data = self._recv(length) if length else b""
+            if packet_id == _SHELL_ID_CLOSE_STDIN:
+                self.request.sendall(_SHELL_HEADER.pack(_SHELL_ID_EXIT, 1) + b"\0")
+                return
+            if packet_id != _SHELL_ID_STDIN:
+                continue
+            stdin += data
+            while True:
+                match = _SESSION_SCRIPT.search(bytes(stdin))
+                if not match:
+                    break
+                del stdin[: match.end()]
+                command, marker = match.group(1).decode("utf-8"), match.group(2)
+                output, exit_code = self.server.fleet.run(serial, command)
+                if command.strip() in self.server.fleet.dropped:
+                    return
+                reply = output.encode("utf-8") + b"\n" + marker + b" %d\n" % exit_code
+                self.request.sendall(_SHELL_HEADER.pack(_SHELL_ID_STDOUT, len(reply)) + reply)
+
+    def _script(self, serial: str) -> None:
+        """`sh` over raw pipes: run each stdin line as it arrives, until `exit` or EOF."""
+        buffer = b""
+        while True:
+            data = self.request.recv(65536)
+            if not data:
+                return
+            buffer += data
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                command = line.decode("utf-8").strip()
+                if command == "exit":
+                    return
+                if command:
+                    output, _ = self.server.fleet.run(serial, command)
+                    self.request.sendall(output.encode("utf-8"))
+
+    def _sync(self, files: Dict[str, Tuple[bytes, int, int]]) -> None:
+        while True:
+            request, length = _SYNC_REQUEST.unpack(self._recv(_SYNC_REQUEST.size))
+            if request == b"QUIT":
+                return
+            path = self._recv(length).decode("utf-8")
+            if request in (b"STAT", b"STA2"):
+                mode, size, mtime = _stat(files, path)
+                if request == b"STAT":
+                    self.request.sendall(b"STAT" + _SYNC_STAT_V1.pack(mode, size & 0xFFFFFFFF, mtime))
+                else:
+                    error = 0 if mode else 2  # ENOENT
+                    fields = _SYNC_STAT_V2.pack(error, 0, 0, mode, 1, 0, 0, size, mtime, mtime, mtime)
+                    self.request.sendall(b"STA2" + fields)
+            elif request in (b"LIST", b"LIS2"):
+                self._list(files, path.rstrip("/"), v2=request == b"LIS2")
+            elif request == b"SEND":
+                remote, _, mode = path.rpartition(",")
+                data = bytearray()
+                while True:
+                    chunk_id, chunk_length = _SYNC_REQUEST.unpack(self._recv(_SYNC_REQUEST.size))
+                    if chunk_id == b"DONE":
+                        break
+                    data += self._recv(chunk_length)
+                # DONE carries the mtime in place of a length.
+                files[remote] = (bytes(data), int(mode), chunk_length)
+                self.request.sendall(_SYNC_REQUEST.pack(b"OKAY", 0))
+            elif request == b"RECV":
+                if path not in files:
+                    message = b"No such file or directory"
+                    self.request.sendall(_SYNC_REQUEST.pack(b"FAIL", len(message)) + message)
+                    continue
+                data = files[path][0]
+                for offset in range(0, len(data), _SYNC_DATA_MAX):
+                    chunk = data[offset : offset + _SYNC_DATA_MAX]
+                    self.request.sendall(_SYNC_REQUEST.pack(b"DATA", len(chunk)) + chunk)
+                self.request.sendall(_SYNC_REQUEST.pack(b"DONE", 0))
+            else:
+                return
+
+    def _list(self, files: Dict[str, Tuple[bytes, int, int]], directory: str, v2: bool) -> None:
+        prefix = directory + "/"
+        names = {path[len(prefix) :].split("/", 1)[0] for path in files if path.startswith(prefix)}
+        for name in sorted(names):
+            mode, size, mtime = _stat(files, prefix + name)
+            encoded = name.encode("utf-8")
+            if v2:
+                entry = b"DNT2" + _SYNC_STAT_V2.pack(0, 0, 0, mode, 1, 0, 0, size, mtime, mtime, mtime)
+                self.request.sendall(entry + struct.pack("<I", len(encoded)) + encoded)
+            else:
+                entry = b"DENT" + _SYNC_DENT_V1.pack(mode, size & 0xFFFFFFFF, mtime, len(encoded))
+                self.request.sendall(entry + encoded)
+        self.request.sendall(b"DONE" + bytes(_SYNC_STAT_V2.size + 4 if v2 else _SYNC_DENT_V1.size))
+
+
+def _stat(files: Dict[str, Tuple[bytes, int, int]], path: str) -> Tuple[int, int, int]:
+    """(mode, size, mtime) of a path in a fake device tree; directories exist when they hold files."""
+    if path in files:
+        data, mode, mtime = files[path]
+        return mode, len(data), mtime
+    prefix = path.rstrip("/") + "/"
+    if path in ("", "/") or any(name.startswith(prefix) for name in files):
+        return _DIR_MODE, 4096, 0
+    return 0, 0, 0
+
+
+class FakeAdbServer(socketserver.ThreadingTCPServer):
+    """Fake adb server on 127.0.0.1 (an ephemeral port unless one is given)."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, fleet: FakeFleet, port: int = 0) -> None:
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.fleet = fleet
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "FakeAdbServer":
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, name="fake-adb-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+# ----------------------------------------------------------------------
+# Stub binary
+
+
+def write_stub_binary(directory: Path) -> Path:
+    """Write an `adb` launcher that runs this module with the current interpreter."""
+    root = Path(__file__).resolve().parent.parent
+    if os.name == "nt":
+        path = directory / "adb.bat"
+        path.write_text(f'@echo off\r\ncd /d "{root}"\r\n"{sys.executable}" -m benchmarks.fake_adb %*\r\n')
+    else:
+        path = directory / "adb"
+        path.write_text(f'#!/bin/sh\ncd "{root}" && exec "{sys.executable}" -m benchmarks.fake_adb "$@"\n')
+        path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+def stub_directory() -> Path:
+    return Path(tempfile.mkdtemp(prefix="mal-fake-adb-"))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    # The fleet is rebuilt per call, so each process seeds from its pid to keep draws independent.
+    config = FleetConfig.from_env()
+    config.seed = config.seed * 100003 + os.getpid()
+    fleet = FakeFleet(config)
+    serial = None
+    if args[:1] == ["-s"] and len(args) >= 2:
+        serial, args = args[1], args[2:]
+    if args[:1] == ["devices"]:
+        sys.stdout.write("List of devices attached\n" + fleet.device_list())
+        return 0
+    if args[:1] in (["start-server"], ["kill-server"]):
+        return 0
+    if args[:1] == ["shell"] and serial:
+        if serial not in fleet.serials:
+            sys.stderr.write(f"adb: device '{serial}' not found\n")
+            return 1
+        output, exit_code = fleet.run(serial, " ".join(args[1:]))
+        sys.stdout.write(output)
+        return exit_code
+    sys.stderr.write(f"fake adb: unsupported arguments {args}\n")
+    return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,113 @@
+"""Latency percentiles, CPU time and memory of one benchmark scenario."""
+
+from __future__ import annotations
+
+import math
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of `values` (0.0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size of this process, when the platform exposes it."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class ScenarioResult:
+    """Measurements of one scenario at one fleet size."""
+
+    scenario: str
+    backend: str
+    devices: int
+    operations: int = 0
+    failures: int = 0
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    child_cpu_time: float = 0.0
+    rss_mb: Optional[float] = None
+    peak_rss_mb: Optional[float] = None
+    latencies: List[float] = field(default_factory=list, repr=False)
+    skipped: Optional[str] = None
+
+    @property
+    def throughput(self) -> float:
+        """Operations per second."""
+        return self.operations / self.wall_time if self.wall_time else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        del data["latencies"]
+        data.update(
+            throughput=round(self.throughput, 3),
+            p50_ms=round(percentile(self.latencies, 0.50) * 1000, 3),
+            p99_ms=round(percentile(self.latencies, 0.99) * 1000, 3),
+            wall_time=round(self.wall_time, 4),
+            cpu_time=round(self.cpu_time, 4),
+            child_cpu_time=round(self.child_cpu_time, 4),
+        )
+        return data
+
+    def describe(self) -> str:
+        if self.skipped:
+            return f"{self.scenario:<18} {self.backend:<6} N={self.devices:<4} skipped: {self.skipped}"
+        rss = f"{self.rss_mb:.0f} MB" if self.rss_mb is not None else "n/a"
+        return (
+            f"{self.scenario:<18} {self.backend:<6} N={self.devices:<4} "
+            f"{self.throughput:8.1f} ops/s  p50 {percentile(self.latencies, 0.50) * 1000:7.1f} ms  "
+            f"p99 {percentile(self.latencies, 0.99) * 1000:7.1f} ms  cpu {self.cpu_time:6.2f} s  rss {rss}"
+            + (f"  {self.failures} failed" if self.failures else "")
+        )
+
+
+class Measurement:
+    """Context manager filling the wall, CPU and memory fields of a ScenarioResult."""
+
+    def __init__(self, result: ScenarioResult) -> None:
+        self.result = result
+
+    def __enter__(self) -> ScenarioResult:
+        self._times = os.times()
+        self._started = time.perf_counter()
+        return self.result
+
+    def __exit__(self, *exc_info) -> None:
+        self.result.wall_time = time.perf_counter() - self._started
+        times = os.times()
+        self.result.cpu_time = (times.user - self._times.user) + (times.system - self._times.system)
+        # Spawned adb processes (binary backend); always 0 on Windows.
+        self.result.child_cpu_time = (times.children_user - self._times.children_user) + (
+            times.children_system - self._times.children_system
+        )
+        rss = rss_bytes()
+        peak = peak_rss_bytes()
+        self.result.rss_mb = round(rss / (1024 * 1024), 2) if rss is not None else None
+        self.result.peak_rss_mb = round(peak / (1024 * 1024), 2) if peak is not None else None
@@ -0,0 +1,93 @@
+"""Benchmark scenarios: the hot paths of a refresh tick and of a fleet action.
+
+Each scenario runs `repeat` times against a manager whose devices are already
+discovered and fills a ScenarioResult. Latencies are per call of the measured
+function (per device for fan-outs); operations count device-level work, so
+throughput stays comparable across fleet sizes.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict
+
+from multi_android_lab.adb import ADBManager
+
+from .metrics import ScenarioResult
+
+QT_MISSING = "PySide6 not installed"
+
+
+def refresh_devices(manager: ADBManager, result: ScenarioResult, repeat: int) -> None:
+    """`ADBManager.refresh_devices`: list, diff and cache the fleet."""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        devices = manager.refresh_devices()
+        result.latencies.append(time.perf_counter() - started)
+        result.operations += len(devices)
+        result.failures += result.devices - len(devices)
+
+
+def collect_snapshots(manager: ADBManager, result: ScenarioResult, repeat: int) -> None:
+    """`MainWindow._collect_device_snapshots`: one telemetry tick over the whole fleet."""
+    try:
+        from multi_android_lab.ui.main_window import MainWindow
+    except ImportError:
+        result.skipped = QT_MISSING
+        return
+
+    class _Host:
+        # Only what the method touches, so no window (or display) is created.
+        adb_manager = manager
+        logger = manager.logger
+        _build_row = staticmethod(MainWindow._build_row)
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = MainWindow._collect_device_snapshots(_Host())
+        result.latencies.append(time.perf_counter() - started)
+        result.operations += len(rows)
+        result.failures += sum(1 for row in rows if row["model"] in ("Unknown", "Cargando..."))
+
+
+def populate_model(manager: ADBManager, result: ScenarioResult, repeat: int) -> None:
+    """`DeviceListModel.apply_snapshots`: first fill, unchanged tick and one changed row."""
+    try:
+        from PySide6.QtCore import QCoreApplication
+
+        from multi_android_lab.ui.device_list_model import DeviceListModel
+        from multi_android_lab.ui.main_window import MainWindow
+    except ImportError:
+        result.skipped = QT_MISSING
+        return
+
+    app = QCoreApplication.instance() or QCoreApplication([])  # noqa: F841 - models expect an application
+    rows = [MainWindow._build_row(device) for device in manager.get_connected_devices()]
+    for _ in range(repeat):
+        model = DeviceListModel()
+        changed = [dict(row) for row in rows]
+        if changed:
+            changed[-1]["battery"] = "1%"
+        for batch in (rows, rows, changed):
+            started = time.perf_counter()
+            model.apply_snapshots(batch)
+            result.latencies.append(time.perf_counter() - started)
+            result.operations += len(batch)
+
+
+def execute_on_all(manager: ADBManager, result: ScenarioResult, repeat: int) -> None:
+    """`ADBManager.execute_on_all`: one key event fanned out to every device."""
+    for _ in range(repeat):
+        report = manager.execute_on_all("home")
+        result.latencies.extend(device_result.duration for device_result in report.results)
+        result.operations += len(report.results)
+        result.failures += len(report.failed)
+
+
+# Run in this order: refresh_devices discovers the fleet the others use.
+SCENARIOS: Dict[str, Callable[[ADBManager, ScenarioResult, int], None]] = {
+    "refresh_devices": refresh_devices,
+    "collect_snapshots": collect_snapshots,
+    "populate_model": populate_model,
+    "execute_on_all": execute_on_all,
+}
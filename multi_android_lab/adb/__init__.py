@@ -1,7 +1,42 @@
 """ADB helpers for MultiAndroidLab."""
 
 from .adb_manager import ADBManager
+from .cancel import CancelScope, CommandHandle
+from .client import AdbCancelledError, AdbClient, AdbError, ShellResult
 from .device import Device
+from .discovery import DeviceEvent, DeviceTracker
+from .fanout import DeviceResult, FanoutReport
+from .health import DeviceHealth, HealthTracker
+from .input_trace import TouchTrace
+from .journal import CommandJournal, JournalRecord
+from .logcat import LogcatHub, LogRecord
 from .paths import ADB_BINARY
+from .screen import ScreenFrame
+from .sync import TransferStats
+from .telemetry import DeviceSnapshot
 
-__all__ = ["ADBManager", "Device", "ADB_BINARY"]
+__all__ = [
+    "ADBManager",
+    "AdbCancelledError",
+    "AdbClient",
+    "AdbError",
+    "CancelScope",
+    "CommandHandle",
+    "CommandJournal",
+    "Device",
+    "DeviceEvent",
+    "DeviceHealth",
+    "DeviceResult",
+    "DeviceSnapshot",
+    "DeviceTracker",
+    "FanoutReport",
+    "HealthTracker",
+    "JournalRecord",
+    "LogcatHub",
+    "LogRecord",
+    "ScreenFrame",
+    "ShellResult",
+    "TouchTrace",
+    "TransferStats",
+    "ADB_BINARY",
+]
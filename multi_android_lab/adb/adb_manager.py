@@ -2,26 +2,159 @@
 
 from __future__ import annotations
 
+import logging
+import math
 import subprocess
-from typing import Dict, Iterable, List
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-from ..utils import get_logger
+from ..utils import PRIORITY_BACKGROUND, PRIORITY_TELEMETRY, get_logger, get_scheduler
+from .client import AdbClient, AdbError, get_default_client, parse_device_list
 from .device import Device
+from .discovery import (
+    EVENT_DISCONNECTED,
+    DeviceEvent,
+    DeviceTracker,
+    diff_device_lists,
+)
+from .fanout import DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT, FanoutReport, ResultCallback, fan_out, gather
+from .health import HealthTracker, probe
+from .input_trace import TouchTrace
+from .install import DEFAULT_PER_BUS, DEFAULT_RETRIES, RETRY_DELAY, ApkPackage, BusLimiter, bus_counts, interleave_buses
+from .latency import compute_stats
+from .logcat import LogcatHub, LogRecord
 from .paths import ADB_BINARY
+from .property_cache import DEFAULT_TTL
+from .screen import ScreenFrame
+from .sync import MIN_THROUGHPUT
+from .sync_dispatch import SyncReport, synchronized_dispatch
+
+DeviceListener = Callable[[DeviceEvent], None]
 
 
 class ADBManager:
     """Keeps track of devices connected via ADB."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        client: Optional[AdbClient] = None,
+        persistent_shell: bool = False,
+        telemetry_ttl: float = DEFAULT_TTL,
+    ) -> None:
         self.devices: Dict[str, Device] = {}
+        self.client = client or get_default_client()
+        self.persistent_shell = persistent_shell
+        self.telemetry_ttl = telemetry_ttl
         self.logger = get_logger("adb.manager")
+        self.tracker: Optional[DeviceTracker] = None
+        self._listeners: List[DeviceListener] = []
+        self._lock = threading.RLock()
+        self.fanout_concurrency = DEFAULT_CONCURRENCY
+        self.fanout_timeout = DEFAULT_TIMEOUT
+        self.logcat = LogcatHub()
+        self.logcat_enabled = False
+        self.health = HealthTracker()
+        self._probing: set = set()
+        # Why the last refresh_devices could not reach adb; None once a refresh succeeds.
+        self.refresh_error: Optional[str] = None
+
+    def add_listener(self, listener: DeviceListener) -> None:
+        """Register a callback for DeviceEvents (called from the tracker thread)."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: DeviceListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
 
+    def start_tracking(self) -> None:
+        """Follow plugs and unplugs through `host:track-devices-l` instead of polling."""
+        if self.tracker is None:
+            self.tracker = DeviceTracker(self.client, self._apply_event, start_server=self.start_server)
+        self.tracker.start()
+
+    def stop_tracking(self) -> None:
+        if self.tracker is not None:
+            self.tracker.stop()
+
+    def start_server(self) -> None:
+        """Ask the adb binary to (re)start the server the client talks to."""
+        subprocess.run(
+            [ADB_BINARY, "start-server"],
+            check=False,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=15,
+        )
 
     def refresh_devices(self) -> List[Device]:
-        """Refresh the device cache by running `adb devices -l`."""
+        """Resync the device cache from `host:devices-l` (or `adb devices -l`).
+
+        When neither answers, the cache is left alone, `refresh_error` says
+        why and an empty list is returned.
+        """
+        entries = self._list_devices()
+        if entries is None:
+            return []
+        self.refresh_error = None
+
+        with self._lock:
+            previous = {device_id: {"id": device_id, **device.info} for device_id, device in self.devices.items()}
+        current = {entry["id"]: entry for entry in entries}
+        for event in diff_device_lists(previous, current):
+            self._apply_event(event)
+
+        if not current:
+            self.logger.info("No devices detected por adb.")
+        return self.get_connected_devices()
+
+    def _apply_event(self, event: DeviceEvent) -> None:
+        with self._lock:
+            device = self.devices.get(event.device_id)
+            if event.kind == EVENT_DISCONNECTED:
+                if device is None:
+                    return
+                self.logger.info("Device disconnected: %s", event.device_id)
+                self.health.for_device(event.device_id).record_status(event.kind)
+                del self.devices[event.device_id]
+                device.close()
+                self.client.forget_device(event.device_id)
+            elif device is None:
+                self.logger.info("Device discovered: %s (%s)", event.device_id, event.status)
+                self.devices[event.device_id] = Device(
+                    event.device_id,
+                    status=event.status,
+                    client=self.client,
+                    persistent_shell=self.persistent_shell,
+                    info=event.info,
+                    telemetry_ttl=self.telemetry_ttl,
+                    health=self.health.for_device(event.device_id),
+                )
+            else:
+                if device.status != event.status:
+                    self.logger.info("Device %s: %s -> %s", event.device_id, device.status, event.status)
+                    device.health.record_status(event.status)
+                device.update_status(event.status, info=event.info)
+            if self.logcat_enabled and event.status == "device":
+                self.devices[event.device_id].start_logcat(self.logcat.buffer_for(event.device_id))
+            device_count = len(self.devices)
+        # Room for one task per device plus the clicks, so polling every device never queues a click.
+        get_scheduler().size_for_fleet(device_count)
+        for listener in list(self._listeners):
+            listener(event)
+
+    def _list_devices(self) -> Optional[List[Dict[str, str]]]:
+        if self.client.available:
+            try:
+                return self.client.list_devices()
+            except AdbError as exc:
+                self.logger.debug("adb server query failed (%s); using %s", exc, ADB_BINARY)
+
         command = [ADB_BINARY, "devices", "-l"]
-        self.logger.debug("Executing: %s", " ".join(command))
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Executing: %s", " ".join(command))
         try:
             proc = subprocess.run(
                 command,
@@ -33,50 +166,295 @@ class ADBManager:
             )
         except FileNotFoundError:
             self.logger.error("ADB executable not found in PATH.")
-            return []
+            self.refresh_error = f"{ADB_BINARY} not found"
+            return None
+        except subprocess.TimeoutExpired:
+            self.logger.error("adb devices timed out.")
+            self.refresh_error = f"{ADB_BINARY} devices timed out"
+            return None
 
         raw_output = proc.stdout.strip()
         self.logger.debug("adb devices output:\n%s", raw_output or "<sin salida>")
-        output = raw_output.splitlines()
-        seen_ids = set()
-        for line in output[1:]:
-            line = line.strip()
-            if not line:
-                continue
-            parts = line.split()
-            device_id = parts[0]
-            status = parts[1] if len(parts) > 1 else "unknown"
-            seen_ids.add(device_id)
-            device = self.devices.get(device_id)
-            if not device:
-                self.logger.info("Device discovered: %s (%s)", device_id, status)
-                device = Device(device_id, status=status)
-                self.devices[device_id] = device
-            else:
-                device.update_status(status)
-
+        if proc.returncode != 0:
+            # e.g. the server could not be started; an empty list would read as "no devices".
+            self.logger.error("adb devices failed (%s): %s", proc.returncode, raw_output)
+            self.refresh_error = raw_output or f"{ADB_BINARY} devices exited with {proc.returncode}"
+            return None
+        return parse_device_list(raw_output)
 
-        for stale in set(self.devices.keys()) - seen_ids:
-            self.logger.info("Device disconnected: %s", stale)
-            self.devices.pop(stale, None)
+    def get_connected_devices(self) -> List[Device]:
+        """Return the cached devices (kept current by tracking or refresh_devices)."""
+        with self._lock:
+            return list(self.devices.values())
 
-        if not seen_ids:
-            self.logger.info("No devices detected por adb.")
-        return list(self.devices.values())
+    def cache_stats(self) -> Dict[str, int]:
+        """Property cache hits and misses summed over every device."""
+        totals = {"hits": 0, "misses": 0, "entries": 0}
+        for device in self.get_connected_devices():
+            for key, value in device.cache_stats().items():
+                totals[key] += value
+        return totals
 
+    def coalesce_stats(self) -> Dict[str, int]:
+        """Single-flight counters summed over every device; `shared` is adb calls saved."""
+        totals = {"calls": 0, "executed": 0, "shared": 0}
+        for device in self.get_connected_devices():
+            for key, value in device.coalesce_stats().items():
+                totals[key] += value
+        return totals
 
-    def get_connected_devices(self) -> List[Device]:
-        """Return the cached devices (call refresh_devices first)."""
-        return list(self.devices.values())
+    def latency_overview(self) -> Dict[str, Any]:
+        """Fleet-wide round-trip percentiles plus the slowest devices by p95."""
+        per_device = {}
+        samples = []
+        for device in self.get_connected_devices():
+            device_samples = device.latency.samples()
+            if device_samples:
+                per_device[device.id] = compute_stats(device_samples)
+                samples.extend(device_samples)
+        slowest = sorted(per_device.items(), key=lambda item: item[1].p95, reverse=True)
+        return {"fleet": compute_stats(samples), "devices": per_device, "slowest": slowest[:3]}
 
-    def execute_on_all(self, method: str, *args, **kwargs) -> None:
-        """Call a Device method on every connected device."""
+    def health_overview(self) -> Dict[str, int]:
+        """Number of connected devices in each health state."""
+        counts: Dict[str, int] = {}
         for device in self.get_connected_devices():
+            counts[device.health.state] = counts.get(device.health.state, 0) + 1
+        return counts
+
+    def refresh_snapshots(self) -> FanoutReport:
+        """Re-probe the telemetry of every online device that is due for a poll.
+
+        Each probe is a task keyed by its device, so it queues behind that
+        device's commands instead of racing them. Degraded devices are polled
+        with backoff; quarantined ones only get the liveness probe.
+        """
+        devices = [
+            device
+            for device in self.get_connected_devices()
+            if device.status == "device" and device.health.should_poll()
+        ]
+
+        def _refresh(device: Device) -> None:
+            device.refresh_snapshot()
+
+        report = fan_out(
+            devices,
+            _refresh,
+            label="telemetry",
+            max_concurrency=self.fanout_concurrency,
+            timeout=self.fanout_timeout,
+            priority=PRIORITY_TELEMETRY,
+        )
+        for result in report.failed:
+            self.logger.debug("Telemetry refresh failed on %s: %s", result.device_id, result.error or result.output)
+        self.probe_quarantined()
+        return report
+
+    def probe_quarantined(self) -> List[Future]:
+        """Send the cheap liveness probe to quarantined devices whose backoff elapsed."""
+        online = [device for device in self.get_connected_devices() if device.status == "device"]
+        futures = []
+        for device in self.health.probe_due(online):
+            with self._lock:
+                if device.id in self._probing:
+                    continue
+                self._probing.add(device.id)
+            future = get_scheduler().submit(probe, device, priority=PRIORITY_BACKGROUND, key=device.id)
+            future.add_done_callback(lambda _future, device_id=device.id: self._probing.discard(device_id))
+            futures.append(future)
+        return futures
+
+    def enable_logcat(self) -> None:
+        """Stream logcat from every online device, and from devices as they come online."""
+        with self._lock:
+            self.logcat_enabled = True
+            for device in self.devices.values():
+                if device.status == "device":
+                    device.start_logcat(self.logcat.buffer_for(device.id))
+
+    def disable_logcat(self) -> None:
+        with self._lock:
+            self.logcat_enabled = False
+            for device in self.devices.values():
+                device.stop_logcat()
+
+    def search_logs(self, **filters) -> List[LogRecord]:
+        """Indexed logcat query across the fleet (see LogcatHub.search)."""
+        started = time.perf_counter()
+        records = self.logcat.search(**filters)
+        self.logger.debug(
+            "Logcat query %s: %d records in %.1f ms", filters, len(records), (time.perf_counter() - started) * 1000
+        )
+        return records
+
+    def fan_out(
+        self,
+        func: Callable[[Device], Any],
+        label: str,
+        devices: Optional[Iterable[Device]] = None,
+        on_result: Optional[ResultCallback] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> FanoutReport:
+        """Run func(device) in parallel on every online device and collect the results."""
+        if devices is None:
+            devices = [device for device in self.get_connected_devices() if device.status == "device"]
+        report = fan_out(
+            devices,
+            func,
+            label=label,
+            max_concurrency=max_concurrency or self.fanout_concurrency,
+            timeout=timeout or self.fanout_timeout,
+            on_result=on_result,
+        )
+        self.logger.info("%s", report.summary())
+        for result in report.failed:
+            self.logger.warning("%s failed on %s: %s", label, result.device_id, result.error or result.output)
+        return report
+
+    def execute_on_all(
+        self, method: str, *args, on_result: Optional[ResultCallback] = None, **kwargs
+    ) -> FanoutReport:
+        """Call a Device method on every connected device, in parallel."""
+
+        def _call(device: Device) -> Any:
             func = getattr(device, method, None)
-            if callable(func):
-                func(*args, **kwargs)
+            if not callable(func):
+                raise AttributeError(f"Device has no method '{method}'")
+            return func(*args, **kwargs)
 
-    def broadcast_shell(self, command: str) -> None:
-        """Run an arbitrary shell command on all devices."""
-        for device in self.get_connected_devices():
-            device.run_shell(command)
+        return self.fan_out(_call, label=method, on_result=on_result)
+
+    def enqueue_on_all(self, action: str, *args) -> Dict[str, Future]:
+        """Queue an action on every online device without waiting (keeps click order)."""
+        return {
+            device.id: device.enqueue_input(action, *args)
+            for device in self.get_connected_devices()
+            if device.status == "device"
+        }
+
+    def collect_inputs(
+        self, futures: Dict[str, Future], label: str, on_result: Optional[ResultCallback] = None
+    ) -> FanoutReport:
+        """Wait for actions queued by enqueue_on_all and report them like a fan-out.
+
+        The actions already run on their devices' keyed queues, so this waits
+        on the calling thread instead of holding a pool worker per device.
+        """
+        futures = {device_id: future for device_id, future in futures.items() if device_id in self.devices}
+        report = gather(futures, label=label, timeout=self.fanout_timeout, on_result=on_result)
+        self.logger.info("%s", report.summary())
+        for result in report.failed:
+            self.logger.warning("%s failed on %s: %s", label, result.device_id, result.error or result.output)
+        return report
+
+    def execute_synchronized(
+        self, action: str, *args, release_at: Optional[float] = None, devices: Optional[Iterable[Device]] = None
+    ) -> SyncReport:
+        """Stage an action on every online device and release it on all of them at once."""
+        if devices is None:
+            devices = [device for device in self.get_connected_devices() if device.status == "device"]
+        report = synchronized_dispatch(devices, action, *args, release_at=release_at, timeout=self.fanout_timeout)
+        self.logger.info("%s", report.summary())
+        for result in report.failed:
+            self.logger.warning("%s failed on %s: %s", action, result.device_id, result.error or result.output)
+        return report
+
+    def capture_screens(
+        self, downscale: int = 1, on_result: Optional[ResultCallback] = None
+    ) -> Tuple[FanoutReport, Dict[str, ScreenFrame]]:
+        """Capture every online screen in parallel; results report size and frames/sec per device."""
+        frames: Dict[str, ScreenFrame] = {}
+
+        def _capture(device: Device) -> str:
+            frame = frames[device.id] = device.capture_screen(downscale=downscale)
+            width, height = frame.size
+            return f"{width}x{height} · {device.screen.fps:.1f} fps"
+
+        return self.fan_out(_capture, label="screencap", on_result=on_result), frames
+
+    def broadcast_shell(
+        self, command: str, on_result: Optional[ResultCallback] = None, timeout: Optional[float] = None
+    ) -> FanoutReport:
+        """Run an arbitrary shell command on all devices, in parallel."""
+        return self.fan_out(
+            lambda device: device.run_command(command, timeout=timeout or self.fanout_timeout),
+            label=command,
+            on_result=on_result,
+            timeout=timeout,
+        )
+
+    def install_apk(
+        self,
+        apk_path: str,
+        devices: Optional[Iterable[Device]] = None,
+        per_bus: int = DEFAULT_PER_BUS,
+        retries: int = DEFAULT_RETRIES,
+        on_result: Optional[ResultCallback] = None,
+        **options,
+    ) -> FanoutReport:
+        """Install one APK on many devices at once, at most `per_bus` transfers per USB bus.
+
+        Only as many devices start as the buses have slots, taken from each bus
+        in turn, so the rollout never holds more workers than can transfer.
+        Results report throughput, bus and attempts per device, and the
+        report's wall time is the total rollout time.
+        """
+        apk = ApkPackage.load(apk_path)
+        if devices is None:
+            devices = [device for device in self.get_connected_devices() if device.status == "device"]
+        devices = interleave_buses(list(devices))
+        buses = bus_counts(devices)
+        self.logger.info(
+            "Installing %s (%.1f MB) on %d devices over %d USB buses",
+            apk.path.name,
+            apk.size / (1024 * 1024),
+            len(devices),
+            len(buses),
+        )
+        limiter = BusLimiter(per_bus)
+        # A device may queue behind every other device on its bus, on every attempt.
+        rounds = math.ceil(max(buses.values(), default=1) / max(per_bus, 1))
+        timeout = (apk.timeout * rounds + RETRY_DELAY * (retries + 1)) * (retries + 1)
+        return self.fan_out(
+            lambda device: device.install_apk(apk, limiter=limiter, retries=retries, **options).to_shell_result(),
+            label=f"install {apk.path.name}",
+            devices=devices,
+            on_result=on_result,
+            max_concurrency=max(min(len(devices), per_bus * len(buses)), 1),
+            timeout=timeout,
+        )
+
+    def sync_dir(
+        self,
+        local_dir: str,
+        remote_dir: str,
+        devices: Optional[Iterable[Device]] = None,
+        checksum: bool = False,
+        on_result: Optional[ResultCallback] = None,
+    ) -> FanoutReport:
+        """Mirror a local directory onto every device, sending only files that changed."""
+        total = sum(path.stat().st_size for path in Path(local_dir).rglob("*") if path.is_file())
+        return self.fan_out(
+            lambda device: device.sync_dir(local_dir, remote_dir, checksum=checksum).summary(),
+            label=f"sync {Path(local_dir).name}",
+            devices=devices,
+            on_result=on_result,
+            timeout=max(self.fanout_timeout, 60 + total / MIN_THROUGHPUT),
+        )
+
+    def replay_trace(
+        self,
+        trace: TouchTrace,
+        devices: Optional[Iterable[Device]] = None,
+        on_result: Optional[ResultCallback] = None,
+    ) -> FanoutReport:
+        """Replay a touch trace on every online device at once, rescaled per device."""
+        return self.fan_out(
+            lambda device: device.replay_trace(trace),
+            label="replay trace",
+            devices=devices,
+            on_result=on_result,
+            timeout=max(self.fanout_timeout, trace.duration + 10),
+        )
@@ -0,0 +1,227 @@
+"""Deadlines and cancellation for device work.
+
+A CancelScope carries a deadline and remembers the sockets and processes
+opened while it is active. Cancelling it, explicitly or because the deadline
+passed, closes them, which unblocks whichever thread is waiting on the
+device. Cancellation cascades from parent scopes to child scopes: device,
+then connection or window, then command. The active scope lives in a context
+variable, so work submitted through utils.scheduler keeps the scope of its
+submitter.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import heapq
+import itertools
+import socket
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+REASON_DEADLINE = "deadline exceeded"
+# Dead weak references are pruned once a scope holds this many resources.
+_PRUNE_AT = 32
+
+_current: contextvars.ContextVar[Optional["CancelScope"]] = contextvars.ContextVar("adb_cancel_scope", default=None)
+
+
+def current_scope() -> Optional["CancelScope"]:
+    """The scope active in this thread or task, if any."""
+    return _current.get()
+
+
+class CancelScope:
+    """Deadline plus the resources to close when the work under it is cancelled."""
+
+    def __init__(
+        self, timeout: Optional[float] = None, parents: Iterable[Optional["CancelScope"]] = (), name: str = ""
+    ) -> None:
+        self.name = name
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.cancelled = False
+        self.reason: Optional[str] = None
+        self._closed = False
+        self._resources: List[weakref.ref] = []
+        self._children: "weakref.WeakSet[CancelScope]" = weakref.WeakSet()
+        self._parents: List[CancelScope] = []
+        self._lock = threading.Lock()
+        for parent in parents:
+            if parent is not None:
+                self._link(parent)
+        if self.deadline is not None and not self.cancelled:
+            _watchdog.watch(self)
+
+    def _link(self, parent: "CancelScope") -> None:
+        with parent._lock:
+            parent._children.add(self)
+        self._parents.append(parent)
+        if parent.deadline is not None and (self.deadline is None or parent.deadline < self.deadline):
+            self.deadline = parent.deadline
+        if parent.cancelled:
+            self.cancel(parent.reason or "cancelled")
+
+    # ------------------------------------------------------------------
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (None when there is none)."""
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    def attach(self, resource: Any) -> None:
+        """Abort `resource` (a socket, a subprocess or anything with close()) on cancel.
+
+        Only a weak reference is kept, so finished sockets are not held alive.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            if not self.cancelled:
+                if len(self._resources) >= _PRUNE_AT:
+                    self._resources = [ref for ref in self._resources if ref() is not None]
+                self._resources.append(weakref.ref(resource))
+                return
+        abort(resource)
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Close every attached resource and cancel every child scope."""
+        with self._lock:
+            if self.cancelled or self._closed:
+                return
+            self.cancelled = True
+            self.reason = reason
+            resources, self._resources = self._resources, []
+            children = list(self._children)
+        for ref in resources:
+            resource = ref()
+            if resource is not None:
+                abort(resource)
+        for child in children:
+            child.cancel(reason)
+
+    def cancel_children(self, reason: str = "cancelled") -> None:
+        """Cancel the work running under this scope but keep the scope usable."""
+        with self._lock:
+            children = list(self._children)
+        for child in children:
+            child.cancel(reason)
+
+    def close(self) -> None:
+        """Detach from parents and drop resources; call when the work has finished."""
+        for parent in self._parents:
+            with parent._lock:
+                parent._children.discard(self)
+        with self._lock:
+            self._closed = True
+            self._resources = []
+
+    # ------------------------------------------------------------------
+    @contextmanager
+    def activate(self) -> Iterator["CancelScope"]:
+        """Make this the current scope without closing it afterwards."""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def __enter__(self) -> "CancelScope":
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _current.reset(self._token)
+        self.close()
+
+    def __repr__(self) -> str:
+        state = f"cancelled: {self.reason}" if self.cancelled else f"remaining={self.remaining()}"
+        return f"<CancelScope {self.name or hex(id(self))} {state}>"
+
+
+def abort(resource: Any) -> None:
+    """Kill a subprocess, or shut down and close a socket so a blocked recv() returns."""
+    try:
+        if isinstance(resource, socket.socket):
+            # close() alone does not wake a thread already blocked in recv() on Linux.
+            try:
+                resource.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            resource.close()
+        elif hasattr(resource, "kill"):
+            resource.kill()
+        else:
+            resource.close()
+    except (OSError, ValueError):
+        pass
+
+
+class CommandHandle:
+    """A command queued or running on a device; cancelling it kills its socket or process."""
+
+    def __init__(self, label: str, scope: CancelScope, future: Future) -> None:
+        self.label = label
+        self.scope = scope
+        self.future = future
+
+    @property
+    def deadline(self) -> Optional[float]:
+        return self.scope.deadline
+
+    def remaining(self) -> Optional[float]:
+        return self.scope.remaining()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        self.future.cancel()
+        self.scope.cancel(reason)
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        return self.future.result(timeout)
+
+    def add_done_callback(self, callback: Callable[[Future], Any]) -> None:
+        self.future.add_done_callback(callback)
+
+
+class _Watchdog:
+    """One thread that cancels scopes whose deadline passed."""
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int, weakref.ref]] = []
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, scope: CancelScope) -> None:
+        with self._condition:
+            heapq.heappush(self._heap, (scope.deadline, next(self._seq), weakref.ref(scope)))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="adb-deadlines", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._heap:
+                    self._condition.wait()
+                deadline, _seq, ref = self._heap[0]
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+            scope = ref()
+            # Scopes that finished in time were closed, which makes cancel() a no-op.
+            if scope is not None:
+                scope.cancel(REASON_DEADLINE)
+
+
+_watchdog = _Watchdog()
@@ -0,0 +1,369 @@
+"""In-process client for the adb server smart-socket protocol."""
+
+from __future__ import annotations
+
+import os
+import socket
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from ..utils import get_logger
+from .cancel import current_scope
+from .latency import TRANSPORT_STREAM, CommandTiming
+
+ADB_SERVER_HOST_ENV_VAR = "MULTI_ANDROID_LAB_ADB_HOST"
+ADB_SERVER_PORT_ENV_VAR = "ANDROID_ADB_SERVER_PORT"
+DEFAULT_ADB_HOST = "127.0.0.1"
+DEFAULT_ADB_PORT = 5037
+
+# shell protocol v2 packet ids (see adb/shell_protocol.h)
+SHELL_ID_STDIN = 0
+SHELL_ID_STDOUT = 1
+SHELL_ID_STDERR = 2
+SHELL_ID_EXIT = 3
+SHELL_ID_CLOSE_STDIN = 4
+
+_SHELL_HEADER = struct.Struct("<BI")
+_RETRY_AFTER_FAILURE = 5.0
+
+logger = get_logger("adb.client")
+
+
+class AdbError(Exception):
+    """Base error raised by the adb protocol client."""
+
+
+class AdbConnectionError(AdbError):
+    """The adb server could not be reached or the stream broke mid-way."""
+
+
+class AdbStreamError(AdbConnectionError):
+    """The stream broke after the request was sent, so the command may already have run."""
+
+
+class AdbCommandError(AdbError):
+    """The adb server answered FAIL (e.g. device offline or not found)."""
+
+
+class AdbTimeoutError(AdbError):
+    """The device did not answer before the timeout expired."""
+
+
+class AdbCancelledError(AdbError):
+    """The command was cancelled (window closed, device gone) before it finished."""
+
+
+@dataclass
+class ShellResult:
+    """Output and exit status of a shell command."""
+
+    output: str
+    exit_code: Optional[int] = None
+    timing: Optional[CommandTiming] = field(default=None, repr=False, compare=False)
+    # Why the command did not complete (timeout, broken stream, adb FAIL); None when it did.
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.exit_code in (0, None)
+
+
+class ShellStream:
+    """Bidirectional shell service stream (shell protocol v2 or raw legacy)."""
+
+    def __init__(self, sock: socket.socket, v2: bool) -> None:
+        self.sock = sock
+        self.v2 = v2
+        self.exit_code: Optional[int] = None
+        # perf_counter() of the first stdout/stderr/exit packet, for latency accounting.
+        self.first_byte_at: Optional[float] = None
+        self._eof = False
+
+    def settimeout(self, timeout: Optional[float]) -> None:
+        self.sock.settimeout(timeout)
+
+    def write(self, data: bytes) -> None:
+        payload = _SHELL_HEADER.pack(SHELL_ID_STDIN, len(data)) + data if self.v2 else data
+        try:
+            self.sock.sendall(payload)
+        except OSError as exc:
+            raise AdbConnectionError(f"Shell stream closed: {exc}") from exc
+
+    def close_stdin(self) -> None:
+        if self.v2:
+            try:
+                self.sock.sendall(_SHELL_HEADER.pack(SHELL_ID_CLOSE_STDIN, 0))
+            except OSError as exc:
+                raise AdbConnectionError(f"Shell stream closed: {exc}") from exc
+        else:
+            try:
+                self.sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+    def read(self) -> bytes:
+        """Return the next chunk of stdout/stderr, or b"" once the command ended."""
+        if self._eof:
+            return b""
+        if not self.v2:
+            try:
+                chunk = self.sock.recv(65536)
+            except socket.timeout as exc:
+                raise AdbTimeoutError("Timed out waiting for the device") from exc
+            except OSError as exc:
+                raise AdbConnectionError(str(exc)) from exc
+            if self.first_byte_at is None:
+                self.first_byte_at = time.perf_counter()
+            self._eof = not chunk
+            return chunk
+        while True:
+            header = _recv_exact(self.sock, _SHELL_HEADER.size, allow_eof=True)
+            if not header:
+                self._eof = True
+                return b""
+            packet_id, length = _SHELL_HEADER.unpack(header)
+            data = _recv_exact(self.sock, length) if length else b""
+            if self.first_byte_at is None:
+                self.first_byte_at = time.perf_counter()
+            if packet_id in (SHELL_ID_STDOUT, SHELL_ID_STDERR):
+                if data:
+                    return data
+            elif packet_id == SHELL_ID_EXIT:
+                self.exit_code = data[0] if data else None
+                self._eof = True
+                return b""
+
+    def read_all(self) -> bytes:
+        chunks = []
+        while True:
+            chunk = self.read()
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+    def close(self) -> None:
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def _default_address() -> tuple[str, int]:
+    host = os.environ.get(ADB_SERVER_HOST_ENV_VAR) or DEFAULT_ADB_HOST
+    try:
+        port = int(os.environ.get(ADB_SERVER_PORT_ENV_VAR, DEFAULT_ADB_PORT))
+    except ValueError:
+        port = DEFAULT_ADB_PORT
+    return host, port
+
+
+def _encode_request(payload: str) -> bytes:
+    data = payload.encode("utf-8")
+    return b"%04x" % len(data) + data
+
+
+def _recv_exact(sock: socket.socket, size: int, allow_eof: bool = False) -> bytes:
+    """Read exactly `size` bytes; with allow_eof a clean EOF returns b""."""
+    chunks = bytearray()
+    while len(chunks) < size:
+        try:
+            chunk = sock.recv(size - len(chunks))
+        except socket.timeout as exc:
+            raise AdbTimeoutError("Timed out waiting for the device") from exc
+        except OSError as exc:
+            raise AdbConnectionError(str(exc)) from exc
+        if not chunk:
+            if allow_eof and not chunks:
+                return b""
+            raise AdbConnectionError("adb server closed the connection")
+        chunks += chunk
+    return bytes(chunks)
+
+
+def parse_device_list(text: str) -> List[Dict[str, str]]:
+    """Parse the output of `adb devices -l` / `host:devices-l`."""
+    entries: List[Dict[str, str]] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("List of devices") or line.startswith("*"):
+            continue
+        parts = line.split()
+        entry = {"id": parts[0], "status": parts[1] if len(parts) > 1 else "unknown"}
+        for token in parts[2:]:
+            key, sep, value = token.partition(":")
+            if sep:
+                entry[key] = value
+        entries.append(entry)
+    return entries
+
+
+class AdbClient:
+    """Talks to the adb server over TCP instead of spawning the adb binary."""
+
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None, timeout: float = 5.0) -> None:
+        default_host, default_port = _default_address()
+        self.host = host or default_host
+        self.port = port or default_port
+        self.timeout = timeout
+        self._features: Dict[str, FrozenSet[str]] = {}
+        self._unavailable_until = 0.0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    @property
+    def available(self) -> bool:
+        """False for a short while after the server refused a connection."""
+        return time.monotonic() >= self._unavailable_until
+
+    def connect(self, timeout: Optional[float] = None) -> socket.socket:
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=timeout or self.timeout)
+        except OSError as exc:
+            with self._lock:
+                self._unavailable_until = time.monotonic() + _RETRY_AFTER_FAILURE
+            raise AdbConnectionError(f"Cannot reach adb server at {self.host}:{self.port}: {exc}") from exc
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        scope = current_scope()
+        if scope is not None:
+            # Cancelling the scope closes the socket, so a blocked recv() returns at once.
+            scope.attach(sock)
+        return sock
+
+    def send_request(self, sock: socket.socket, payload: str) -> None:
+        """Send one smart-socket request and wait for OKAY."""
+        try:
+            sock.sendall(_encode_request(payload))
+        except OSError as exc:
+            raise AdbConnectionError(f"adb request '{payload}' failed: {exc}") from exc
+        status = _recv_exact(sock, 4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            raise AdbCommandError(self.read_string(sock))
+        raise AdbConnectionError(f"Unexpected adb response {status!r} to '{payload}'")
+
+    def read_string(self, sock: socket.socket) -> str:
+        try:
+            length = int(_recv_exact(sock, 4), 16)
+        except ValueError as exc:
+            raise AdbConnectionError(f"Malformed length prefix from adb server: {exc}") from exc
+        return _recv_exact(sock, length).decode("utf-8", errors="replace")
+
+    def open_transport(self, serial: str, timeout: Optional[float] = None) -> socket.socket:
+        """Return a socket already bound to the device `serial`."""
+        sock = self.connect(timeout)
+        try:
+            self.send_request(sock, f"host:transport:{serial}")
+        except AdbError:
+            sock.close()
+            raise
+        return sock
+
+    def open_exec(self, serial: str, command: str, timeout: Optional[float] = None) -> socket.socket:
+        """Start `exec:` (raw stdout, no pty, no shell framing) and return its socket."""
+        sock = self.open_transport(serial, timeout)
+        try:
+            self.send_request(sock, f"exec:{command}")
+        except AdbConnectionError as exc:
+            sock.close()
+            # As with open_shell, the command may be running even though its OKAY was lost.
+            raise AdbStreamError(str(exc)) from exc
+        except AdbError:
+            sock.close()
+            raise
+        sock.settimeout(timeout)
+        return sock
+
+    # ------------------------------------------------------------------
+    def host_query(self, payload: str) -> str:
+        """Run a `host:` service that answers with a length-prefixed string."""
+        sock = self.connect()
+        try:
+            self.send_request(sock, payload)
+            return self.read_string(sock)
+        finally:
+            sock.close()
+
+    def list_devices(self) -> List[Dict[str, str]]:
+        """Equivalent of `adb devices -l`."""
+        return parse_device_list(self.host_query("host:devices-l"))
+
+    def features(self, serial: str) -> FrozenSet[str]:
+        """Transport features shared by the server and the device (cached per serial)."""
+        features = self._features.get(serial)
+        if features is None:
+            features = frozenset(self.host_query(f"host-serial:{serial}:features").split(","))
+            self._features[serial] = features
+        return features
+
+    def supports_shell_v2(self, serial: str) -> bool:
+        """Whether the device speaks shell protocol v2."""
+        return "shell_v2" in self.features(serial)
+
+    def forget_device(self, serial: str) -> None:
+        """Drop cached per-device state (call when a device disconnects)."""
+        self._features.pop(serial, None)
+
+    def open_shell(self, serial: str, command: str = "", timeout: Optional[float] = None) -> ShellStream:
+        """Open a shell stream; the caller writes stdin and reads output."""
+        v2 = self.supports_shell_v2(serial)
+        sock = self.open_transport(serial, timeout)
+        try:
+            self.send_request(sock, f"shell,v2,raw:{command}" if v2 else f"shell:{command}")
+        except AdbConnectionError as exc:
+            sock.close()
+            # The request may have reached the device even though its OKAY did not reach us.
+            raise AdbStreamError(str(exc)) from exc
+        except AdbError:
+            sock.close()
+            raise
+        sock.settimeout(timeout)
+        return ShellStream(sock, v2)
+
+    def shell(
+        self, serial: str, command: str, timeout: Optional[float] = None, stdin: Optional[Iterable[bytes]] = None
+    ) -> ShellResult:
+        """Run `command` on the device and return its output, exit code and timing.
+
+        `stdin` chunks are written as the iterable produces them, then stdin is
+        closed, so a script of any length can be streamed instead of packed
+        into the request.
+        """
+        started = time.perf_counter()
+        if stdin is not None and not self.supports_shell_v2(serial):
+            # A legacy `shell:` may run under a pty that echoes and rewrites input; `exec:` has raw pipes.
+            stream = ShellStream(self.open_exec(serial, command, timeout), v2=False)
+        else:
+            stream = self.open_shell(serial, command, timeout)
+        connected = time.perf_counter()
+        try:
+            if stdin is not None:
+                for chunk in stdin:
+                    stream.write(chunk)
+                stream.close_stdin()
+            output = stream.read_all()
+        except AdbConnectionError as exc:
+            raise AdbStreamError(str(exc)) from exc
+        finally:
+            stream.close()
+        if stream.v2 and stream.exit_code is None:
+            # Shell v2 always ends with an exit packet; EOF without one means the stream was cut.
+            raise AdbStreamError("Shell stream closed before the exit status")
+        finished = time.perf_counter()
+        first_byte = stream.first_byte_at if stream.first_byte_at is not None else finished
+        timing = CommandTiming(TRANSPORT_STREAM, connected - started, first_byte - started, finished - started)
+        return ShellResult(output.decode("utf-8", errors="replace"), stream.exit_code, timing)
+
+
+_default_client: Optional[AdbClient] = None
+
+
+def get_default_client() -> AdbClient:
+    """Return the process-wide client pointed at the local adb server."""
+    global _default_client
+    if _default_client is None:
+        _default_client = AdbClient()
+    return _default_client
@@ -0,0 +1,96 @@
+"""Single-flight coalescing of identical read-only device queries.
+
+When two threads ask a device the same question at the same time (the main
+window and a device window both probing telemetry, say), the first runs the
+adb command and the others wait for its result instead of sending it again.
+Only queries without side effects go through here; actions always run.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .cancel import REASON_DEADLINE, current_scope
+from .client import AdbCancelledError, AdbError, AdbTimeoutError
+
+# How often a waiting caller checks its own cancel scope.
+_WAIT_SLICE = 0.1
+
+
+def _follower_error(error: BaseException) -> BaseException:
+    """A fresh exception for one waiting caller, of the leader's type where possible."""
+    # Raising the leader's own object from several threads would pile their tracebacks onto it.
+    if isinstance(error, AdbError):
+        return type(error)(*error.args)
+    return AdbError(f"Shared device query failed: {error}")
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time and shares its outcome with concurrent callers."""
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executed = 0
+
+    @property
+    def shared(self) -> int:
+        """Calls answered by another caller's execution (adb round-trips saved)."""
+        return self.calls - self.executed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "executed": self.executed, "shared": self.calls - self.executed}
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Return func(), or the result of the identical call already in flight."""
+        while True:
+            with self._lock:
+                self.calls += 1
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                    self.executed += 1
+            if leader:
+                return self._run(key, call, func)
+            self._wait(call)
+            if isinstance(call.error, AdbCancelledError):
+                # The leader's window or command was cancelled, not ours: ask again.
+                with self._lock:
+                    self.calls -= 1
+                continue
+            if call.error is not None:
+                raise _follower_error(call.error) from call.error
+            return call.result
+
+    def _run(self, key: Hashable, call: _Call, func: Callable[[], Any]) -> Any:
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    @staticmethod
+    def _wait(call: _Call) -> None:
+        # Waiting callers still honour their own deadline and cancellation.
+        scope = current_scope()
+        while not call.done.wait(_WAIT_SLICE):
+            if scope is not None and (scope.cancelled or scope.expired):
+                if scope.expired or scope.reason == REASON_DEADLINE:
+                    raise AdbTimeoutError("Timed out waiting for a shared device query")
+                raise AdbCancelledError(scope.reason or "cancelled")
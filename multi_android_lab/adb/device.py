@@ -2,95 +2,235 @@
 
 from __future__ import annotations
 
-import re
 import shlex
 import subprocess
-from typing import List, Optional, Tuple
-
-from ..utils import LOG_DIR, get_logger
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..utils import get_logger
+from ..utils.scheduler import PRIORITY_INTERACTIVE, get_scheduler
+from .cancel import REASON_DEADLINE, CancelScope, CommandHandle, current_scope
+from .client import (
+    AdbCancelledError,
+    AdbClient,
+    AdbConnectionError,
+    AdbError,
+    AdbStreamError,
+    AdbTimeoutError,
+    ShellResult,
+    get_default_client,
+)
+from .coalesce import SingleFlight
+from .health import OUTCOME_ERROR, OUTCOME_OK, OUTCOME_TIMEOUT, DeviceHealth
+from .input_queue import InputQueue
+from .input_trace import InputDevice, TouchTrace, parse_input_devices, record_trace, replay_trace
+from .install import ApkPackage, BusLimiter, InstallResult, install_apk
+from .journal import CommandJournal, JournalRecord, get_journal, render_record
+from .latency import TRANSPORT_BINARY, CommandTiming, LatencyHistogram
+from .log_store import LogTail
+from .logcat import DeviceLogBuffer, LogcatStream
 from .paths import ADB_BINARY
+from .property_cache import DEFAULT_TTL, POLICY_STATIC, PropertyCache
+from .screen import ScreenCapturer, ScreenFrame
+from .shell_session import ShellSession, ShellSessionUnsupported
+from .sync import TransferStats, pull, push, sync_dir
+from .telemetry import (
+    DEFAULT_SECTIONS,
+    PROBE_SECTIONS,
+    DeviceSnapshot,
+    build_probe_script,
+    build_snapshot,
+    parse_probe_output,
+)
+
+# Deadline of a shell command when the caller gives none.
+DEFAULT_COMMAND_TIMEOUT = 20.0
+PROBE_TIMEOUT = 10.0
+# Output and error of a command that ran out of time.
+TIMED_OUT = "Command timed out"
 
 
 class Device:
     """Abstraction for an Android device connected through ADB."""
 
-    def __init__(self, device_id: str, status: str = "device") -> None:
+    def __init__(
+        self,
+        device_id: str,
+        status: str = "device",
+        client: Optional[AdbClient] = None,
+        persistent_shell: bool = False,
+        info: Optional[Dict[str, str]] = None,
+        telemetry_ttl: float = DEFAULT_TTL,
+        journal: Optional[CommandJournal] = None,
+        health: Optional[DeviceHealth] = None,
+    ) -> None:
         self.id = device_id
         self.status = status
-        self._model: Optional[str] = None
-        self._battery: Optional[int] = None
-        self._resolution: Optional[Tuple[int, int]] = None
+        self.info: Dict[str, str] = dict(info or {"status": status})
+        self.client = client or get_default_client()
+        self._snapshot: Optional[DeviceSnapshot] = None
+        self.property_cache = PropertyCache(ttl=telemetry_ttl)
+        self.latency = LatencyHistogram()
+        # Read-only queries (telemetry probes, getevent -p) shared between concurrent callers.
+        self.queries = SingleFlight()
+        # Shared with ADBManager.health so the history survives reconnects.
+        self.health = health or DeviceHealth(device_id)
+        self.input_queue = InputQueue(self)
+        self.screen = ScreenCapturer(self)
         self.logger = get_logger(f"device.{device_id}")
-        self.device_log_file = LOG_DIR / f"{self._sanitize_filename(device_id)}.log"
-        self.device_log_file.touch(exist_ok=True)
-
-    @staticmethod
-    def _sanitize_filename(name: str) -> str:
-        return re.sub(r"[^A-Za-z0-9._-]", "_", name)
-
-    def update_status(self, status: str) -> None:
+        self.journal = journal or get_journal()
+        self.device_log_file = self.journal.path_for(device_id)
+        self.log_tail = LogTail(self.device_log_file, formatter=render_record)
+        self.shell_session: Optional[ShellSession] = (
+            ShellSession(self.client, device_id, self.logger) if persistent_shell else None
+        )
+        self.logcat: Optional[LogcatStream] = None
+        # Lives as long as the Device: cancelled on disconnect, so nothing outlives it.
+        self.cancel_scope = CancelScope(name=device_id)
+        # Parent of every command's scope; replaced on each status change, so a
+        # USB blip kills the commands in flight but not the scopes of open windows.
+        self.connection_scope = CancelScope(parents=(self.cancel_scope,), name=f"{device_id} {status}")
+
+    def update_status(self, status: str, info: Optional[Dict[str, str]] = None) -> None:
+        if status != self.status:
+            # The device went away or came back: the old shell is dead and
+            # "static" properties may belong to a reflashed device.
+            if self.shell_session:
+                self.shell_session.close()
+            self.property_cache.invalidate()
+            self.connection_scope.cancel(f"device {status}")
+            self.connection_scope = CancelScope(parents=(self.cancel_scope,), name=f"{self.id} {status}")
         self.status = status
-
+        self.info = dict(info or self.info)
+        self.info["status"] = status
+
+    def close(self) -> None:
+        """Release long-lived resources held for this device and cancel its commands."""
+        self.cancel_scope.cancel("device disconnected")
+        self.input_queue.close("device disconnected")
+        if self.shell_session:
+            self.shell_session.close()
+        self.stop_logcat()
+
+    def start_logcat(self, buffer: DeviceLogBuffer) -> None:
+        """Follow this device's logcat into `buffer` until stop_logcat() or close()."""
+        if self.logcat is None or self.logcat.buffer is not buffer:
+            self.stop_logcat()
+            self.logcat = LogcatStream(self, buffer)
+        self.logcat.start()
+
+    def stop_logcat(self) -> None:
+        if self.logcat is not None:
+            self.logcat.stop()
+            self.logcat = None
+
+    @property
+    def snapshot(self) -> Optional[DeviceSnapshot]:
+        """Result of the most recent telemetry probe, if any."""
+        return self._snapshot
+
+    def refresh_snapshot(self, force: bool = False, sections: Iterable[str] = DEFAULT_SECTIONS) -> DeviceSnapshot:
+        """Probe the sections that are missing or expired, in a single shell call.
+
+        Static sections are fetched once per connection, TTL sections when they
+        expire, and on-demand sections only when listed in `sections`.
+        """
+        stale = [name for name in sections if force or not self.property_cache.lookup(name)[0]]
+        if stale:
+            parsed = parse_probe_output(self._query(build_probe_script(stale), timeout=PROBE_TIMEOUT))
+            for name in stale:
+                if name in parsed:
+                    self.property_cache.store(name, parsed[name], PROBE_SECTIONS[name].policy)
+        known = {name: self.property_cache.peek(name) for name in PROBE_SECTIONS}
+        self._snapshot = build_snapshot({name: fields for name, fields in known.items() if fields})
+        return self._snapshot
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Property cache hit/miss counters."""
+        return self.property_cache.stats()
+
+    def coalesce_stats(self) -> Dict[str, int]:
+        """Read-only queries made, executed, and shared with a concurrent caller."""
+        return self.queries.stats()
+
+    def _current_snapshot(self, force_refresh: bool) -> DeviceSnapshot:
+        if self._snapshot is None or force_refresh:
+            return self.refresh_snapshot(force=force_refresh)
+        return self._snapshot
 
     def get_model(self, force_refresh: bool = False) -> str:
-        if self._model is None or force_refresh:
-            self._model = self._run_shell_and_capture("getprop ro.product.model").strip()
-        return self._model or "Unknown"
+        return self._current_snapshot(force_refresh).model or "Unknown"
 
     def get_battery(self, force_refresh: bool = False) -> str:
-        if self._battery is None or force_refresh:
-            output = self._run_shell_and_capture("dumpsys battery")
-            match = re.search(r"level:\s*(\d+)", output)
-            self._battery = int(match.group(1)) if match else None
-        return f"{self._battery or 0}%"
+        return f"{self._current_snapshot(force_refresh).battery_level or 0}%"
 
     def get_resolution(self, force_refresh: bool = False) -> Tuple[int, int]:
-        if self._resolution is None or force_refresh:
-            output = self._run_shell_and_capture("wm size")
-            match = re.search(r"Physical size:\s*(\d+)x(\d+)", output)
-            if match:
-                self._resolution = (int(match.group(1)), int(match.group(2)))
-            else:
-                self._resolution = (1080, 1920)
-        return self._resolution
+        return self._current_snapshot(force_refresh).resolution or (1080, 1920)
 
     def get_latency(self) -> str:
-        output = self._run_shell_and_capture('ping -c 4 true', timeout=5)
-        match = re.search(r"= [^/]+/([^/]+)/", output)
-        return f"{match.group(1)} ms" if match else "n/a"
-
+        """Percentiles of recent command round-trips; sends nothing to the device."""
+        stats = self.latency.stats()
+        return stats.describe() if stats else "n/a"
 
     def run_shell(self, command: str, timeout: Optional[int] = None) -> str:
+        return self.run_command(command, timeout=timeout).output
+
+    def run_command(self, command: str, timeout: Optional[float] = None) -> ShellResult:
+        """Run a user-facing command, log it to the device journal and return the result."""
         if not command:
-            return ""
-        output = self._run_shell_and_capture(command, timeout=timeout)
-        self._write_device_log(f"$ {command}\n{output.strip()}\n")
-        return output
+            return ShellResult("", 0)
+        started = time.perf_counter()
+        result = self._execute(command, timeout=timeout, use_session=True)
+        self.journal.record(
+            self.id,
+            JournalRecord.create(command, result.output.strip(), result.exit_code, time.perf_counter() - started),
+        )
+        return result
 
-    def open_app(self, package: str, activity: str) -> None:
-        self.run_shell(f"am start -n {package}/{activity}")
+    def start_command(
+        self, command: str, timeout: Optional[float] = None, priority: int = PRIORITY_INTERACTIVE
+    ) -> CommandHandle:
+        """Queue run_command on the shared scheduler and return a cancellable handle.
 
-    def close_app(self, package: str) -> None:
-        self.run_shell(f"am force-stop {package}")
+        The deadline counts from now, so time spent queued is part of it. The
+        handle is also cancelled with the current scope (e.g. a closing window).
+        """
+        scope = CancelScope(
+            timeout or DEFAULT_COMMAND_TIMEOUT, parents=(self.connection_scope, current_scope()), name=command
+        )
 
-    def open_settings(self) -> None:
-        self.run_shell("am start -a android.settings.SETTINGS")
+        def _run() -> ShellResult:
+            with scope:
+                return self.run_command(command, timeout=scope.remaining())
 
-    def back(self) -> None:
-        self.run_shell("input keyevent 4")
+        future = get_scheduler().submit(_run, priority=priority, key=self.id)
+        return CommandHandle(command, scope, future)
 
-    def home(self) -> None:
-        self.run_shell("input keyevent 3")
+    def open_app(self, package: str, activity: str) -> ShellResult:
+        return self.run_command(self.command_for("open_app", package, activity))
 
-    def swipe_down(self) -> None:
-        self.swipe(0.5, 0.2, 0.5, 0.8, 300)
+    def close_app(self, package: str) -> ShellResult:
+        return self.run_command(self.command_for("close_app", package))
 
-    def swipe_up(self) -> None:
-        self.swipe(0.5, 0.8, 0.5, 0.2, 300)
+    def open_settings(self) -> ShellResult:
+        return self.run_command(self.command_for("open_settings"))
 
-    def tap(self, normalized_x: float, normalized_y: float) -> None:
-        x, y = self._normalized_to_pixels(normalized_x, normalized_y)
-        self.run_shell(f"input tap {x} {y}")
+    def back(self) -> ShellResult:
+        return self.run_command(self.command_for("back"))
+
+    def home(self) -> ShellResult:
+        return self.run_command(self.command_for("home"))
+
+    def swipe_down(self) -> ShellResult:
+        return self.run_command(self.command_for("swipe_down"))
+
+    def swipe_up(self) -> ShellResult:
+        return self.run_command(self.command_for("swipe_up"))
+
+    def tap(self, normalized_x: float, normalized_y: float) -> ShellResult:
+        return self.run_command(self.command_for("tap", normalized_x, normalized_y))
 
     def swipe(
         self,
@@ -99,20 +239,114 @@ class Device:
         norm_x2: float,
         norm_y2: float,
         duration_ms: int = 300,
-    ) -> None:
+    ) -> ShellResult:
+        return self.run_command(self.command_for("swipe", norm_x1, norm_y1, norm_x2, norm_y2, duration_ms))
+
+    def type_text(self, text: str) -> ShellResult:
+        return self.run_command(self.command_for("type_text", text))
+
+    def enqueue_input(self, action: str, *args) -> Future:
+        """Queue an action; quick successive actions run in click order as one shell call."""
+        return self.input_queue.submit(action, *args)
+
+    def command_for(self, action: str, *args) -> str:
+        """Shell command behind an action method (open_app, back, tap, swipe, ...)."""
+        builder = self._ACTION_COMMANDS.get(action)
+        if builder is None:
+            raise AttributeError(f"Device has no action '{action}'")
+        return builder(self, *args)
+
+    def _swipe_command(
+        self, norm_x1: float, norm_y1: float, norm_x2: float, norm_y2: float, duration_ms: int = 300
+    ) -> str:
         x1, y1 = self._normalized_to_pixels(norm_x1, norm_y1)
         x2, y2 = self._normalized_to_pixels(norm_x2, norm_y2)
-        self.run_shell(f"input swipe {x1} {y1} {x2} {y2} {duration_ms}")
+        return f"input swipe {x1} {y1} {x2} {y2} {duration_ms}"
 
+    def _tap_command(self, normalized_x: float, normalized_y: float) -> str:
+        x, y = self._normalized_to_pixels(normalized_x, normalized_y)
+        return f"input tap {x} {y}"
+
+    _ACTION_COMMANDS: Dict[str, Callable[..., str]] = {
+        "run_command": lambda self, command: command,
+        "open_app": lambda self, package, activity: f"am start -n {package}/{activity}",
+        "close_app": lambda self, package: f"am force-stop {package}",
+        "open_settings": lambda self: "am start -a android.settings.SETTINGS",
+        "back": lambda self: "input keyevent 4",
+        "home": lambda self: "input keyevent 3",
+        "swipe_down": lambda self: self._swipe_command(0.5, 0.2, 0.5, 0.8, 300),
+        "swipe_up": lambda self: self._swipe_command(0.5, 0.8, 0.5, 0.2, 300),
+        "tap": lambda self, x, y: self._tap_command(x, y),
+        "swipe": lambda self, *args: self._swipe_command(*args),
+        # `input text` treats %s as a space.
+        "type_text": lambda self, text: f"input text {shlex.quote(text.replace(' ', '%s'))}",
+    }
+
+    def capture_screen(self, downscale: int = 1, timeout: float = 10.0) -> ScreenFrame:
+        """Raw screenshot into a buffer reused between captures (see ScreenFrame)."""
+        return self.screen.capture(downscale=downscale, timeout=timeout)
+
+    def input_devices(self) -> List[InputDevice]:
+        """`getevent -p` nodes and axis ranges, fetched once per connection."""
+        hit, devices = self.property_cache.lookup("input_devices")
+        if not hit:
+            devices = parse_input_devices(self._query("getevent -p", timeout=10))
+            self.property_cache.store("input_devices", devices, POLICY_STATIC)
+        return devices
+
+    def record_trace(self, duration: float) -> TouchTrace:
+        """Record touchscreen events for `duration` seconds (touch the device meanwhile)."""
+        return record_trace(self, duration)
+
+    def replay_trace(self, trace: TouchTrace) -> ShellResult:
+        """Replay a recorded trace with sendevent, rescaled to this touchscreen."""
+        started = time.perf_counter()
+        result = replay_trace(self, trace)
+        label = f"replay trace ({len(trace.events)} events, {trace.duration:.2f} s)"
+        self.journal.record(
+            self.id,
+            JournalRecord.create(label, result.output, result.exit_code, time.perf_counter() - started),
+        )
+        return result
+
+    def install_apk(self, apk: ApkPackage, limiter: Optional[BusLimiter] = None, **options) -> InstallResult:
+        """Stream an APK to the package manager (see install.install_apk for options)."""
+        result = install_apk(self, apk, limiter=limiter, **options)
+        self.journal.record(
+            self.id,
+            JournalRecord.create(
+                f"install {apk.path.name}", result.summary(), 0 if result.ok else 1, result.transfer_time
+            ),
+        )
+        return result
+
+    def push(self, local: str | Path, remote: str) -> TransferStats:
+        """Copy a local file to `remote` (a file path, or an existing directory)."""
+        stats = push(self, Path(local), remote)
+        self._record_transfer(f"push {local} {remote}", stats)
+        return stats
+
+    def pull(self, remote: str, local: str | Path) -> TransferStats:
+        """Copy a device file to `local` (a file path, or an existing directory)."""
+        stats = pull(self, remote, Path(local))
+        self._record_transfer(f"pull {remote} {local}", stats)
+        return stats
+
+    def sync_dir(self, local_dir: str | Path, remote_dir: str, checksum: bool = False) -> TransferStats:
+        """Push the files of `local_dir` that are missing or changed under `remote_dir`."""
+        stats = sync_dir(self, Path(local_dir), remote_dir, checksum=checksum)
+        self._record_transfer(f"sync {local_dir} {remote_dir}", stats)
+        return stats
+
+    def _record_transfer(self, label: str, stats: TransferStats) -> None:
+        self.journal.record(self.id, JournalRecord.create(label, stats.summary(), 0, stats.duration))
 
     def get_logs(self, tail: int = 50) -> str:
-        lines = self.device_log_file.read_text(encoding="utf-8", errors="ignore").splitlines()
-        return "\n".join(lines[-tail:])
-
-    def _write_device_log(self, message: str) -> None:
-        with self.device_log_file.open("a", encoding="utf-8") as fh:
-            fh.write(message)
+        return "\n".join(self.log_tail.tail(tail))
 
+    def read_logs_since(self, cursor: int) -> Tuple[List[str], int]:
+        """New journal lines after `cursor`, plus the cursor for the next call."""
+        return self.log_tail.read_since(cursor)
 
     def _normalized_to_pixels(self, nx: float, ny: float) -> Tuple[int, int]:
         width, height = self.get_resolution()
@@ -120,29 +354,158 @@ class Device:
         ny = min(max(ny, 0.0), 1.0)
         return int(nx * width), int(ny * height)
 
-    def _run_shell_and_capture(self, command: str, timeout: Optional[int] = None) -> str:
+    def _run_shell_and_capture(self, command: str, timeout: Optional[float] = None) -> str:
+        return self._execute(command, timeout=timeout).output
+
+    def _query(self, command: str, timeout: Optional[float] = None) -> str:
+        """Like _run_shell_and_capture, but joins an identical query already in flight.
+
+        Only for commands without side effects: every caller gets the same output.
+        Calls with different timeouts do not share, so nobody inherits a shorter deadline.
+        """
+        return self.queries.do((command, timeout), lambda: self._run_shell_and_capture(command, timeout=timeout))
+
+    def _execute(
+        self,
+        command: str,
+        timeout: Optional[float] = None,
+        use_session: bool = False,
+        stdin: Optional[Iterable[bytes]] = None,
+    ) -> ShellResult:
+        """Run a shell command through the adb server, falling back to the binary.
+
+        The command gets its own CancelScope under the device and the caller's
+        scope, so it ends by its deadline (DEFAULT_COMMAND_TIMEOUT when none is
+        given) and is killed if the device disconnects or the caller cancels.
+        `stdin` chunks are fed to the command as they are produced, on a
+        stream of its own.
+        """
+        if not command or not command.strip():
+            return ShellResult("", 0)
+        result, outcome = self._execute_scoped(command, timeout, use_session, stdin)
+        self.health.record(outcome)
+        return result
+
+    def _execute_scoped(
+        self, command: str, timeout: Optional[float], use_session: bool, stdin: Optional[Iterable[bytes]]
+    ) -> Tuple[ShellResult, str]:
+        """Run the command and classify how it ended for the device's health.
+
+        A non-zero exit status is the command's business; only a timeout or a
+        transport failure (FAIL from adb, a broken stream, no adb binary)
+        counts against the device.
+        """
+        with CancelScope(
+            timeout or DEFAULT_COMMAND_TIMEOUT, parents=(self.connection_scope, current_scope()), name=command
+        ) as scope:
+            try:
+                return self._run_scoped(command, scope, use_session, stdin), OUTCOME_OK
+            except AdbCancelledError:
+                raise
+            except AdbTimeoutError:
+                self.logger.warning("Command timeout: %s", command)
+                return ShellResult(TIMED_OUT, None, error=TIMED_OUT), OUTCOME_TIMEOUT
+            except AdbError as exc:
+                self.logger.error("Command failed (%s): %s", command, exc)
+                return ShellResult(f"error: {exc}", 1, error=str(exc)), OUTCOME_ERROR
+
+    def _run_scoped(
+        self, command: str, scope: CancelScope, use_session: bool, stdin: Optional[Iterable[bytes]]
+    ) -> ShellResult:
+        if scope.cancelled or scope.expired:
+            self._interrupted(command, scope)
+        self.logger.debug("Running shell command: %s", command)
+        if self.client.available:
+            try:
+                result = self._shell_via_server(command, scope, use_session, stdin)
+            except AdbConnectionError as exc:
+                # A cancelled scope breaks the socket; report the cancellation, not the symptom.
+                if scope.cancelled:
+                    self._interrupted(command, scope)
+                if isinstance(exc, AdbStreamError):
+                    # The command may have run already; running it again could repeat a tap or an install.
+                    raise
+                self.logger.debug("adb server unavailable (%s); using %s", exc, ADB_BINARY)
+            else:
+                # A cancelled socket reads as a clean EOF, so the scope decides.
+                if scope.cancelled:
+                    self._interrupted(command, scope)
+                result.output = result.output.strip()
+                if result.timing:
+                    self.latency.record(result.timing)
+                if not result.ok:
+                    self.logger.error("Command failed (%s): %s", result.exit_code, result.output)
+                return result
+        return self._execute_with_binary(command, scope, stdin)
+
+    def _interrupted(self, command: str, scope: CancelScope) -> None:
+        """Raise for a command stopped by its scope: AdbTimeoutError or AdbCancelledError."""
+        if scope.expired or scope.reason == REASON_DEADLINE:
+            raise AdbTimeoutError(f"Command deadline exceeded: {command}")
+        self.logger.info("Command cancelled (%s): %s", scope.reason, command)
+        raise AdbCancelledError(scope.reason or "cancelled")
+
+    def _shell_via_server(
+        self, command: str, scope: CancelScope, use_session: bool, stdin: Optional[Iterable[bytes]]
+    ) -> ShellResult:
+        session = self.shell_session
+        # The session's stdin carries its own framing, so a command with input gets a fresh stream.
+        if use_session and stdin is None and session is not None and self.status == "device":
+            try:
+                return session.run(command, timeout=scope.remaining())
+            except ShellSessionUnsupported:
+                self.logger.info("Persistent shell unsupported; using one stream per command")
+                self.shell_session = None
+            except AdbStreamError:
+                raise
+            except AdbConnectionError as exc:
+                if scope.cancelled:
+                    raise
+                # The session could not be opened, so nothing was sent yet.
+                self.logger.debug("Persistent shell failed (%s); retrying on a fresh stream", exc)
+        return self.client.shell(self.id, command, timeout=scope.remaining(), stdin=stdin)
+
+    def _execute_with_binary(self, command: str, scope: CancelScope, stdin: Optional[Iterable[bytes]]) -> ShellResult:
         shell_args = self._normalize_command(command)
         if not shell_args:
-            return ""
+            return ShellResult("", 0)
         adb_args = [ADB_BINARY, "-s", self.id, "shell", *shell_args]
-        self.logger.debug("Running shell command: %s", command)
+        started = time.perf_counter()
         try:
-            proc = subprocess.run(
+            proc = subprocess.Popen(
                 adb_args,
-                check=False,
+                stdin=subprocess.PIPE if stdin is not None else None,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
                 text=True,
-                timeout=timeout,
             )
-        except subprocess.TimeoutExpired:
-            self.logger.warning("Command timeout: %s", command)
-            return "Command timed out"
-
-        output = proc.stdout.strip()
+        except OSError as exc:
+            raise AdbConnectionError(f"Cannot run {ADB_BINARY}: {exc}") from exc
+        scope.attach(proc)
+        if stdin is not None:
+            try:
+                for chunk in stdin:
+                    proc.stdin.write(chunk.decode("utf-8"))
+                    proc.stdin.flush()
+            except BrokenPipeError:
+                # adb exited early; communicate() collects what it printed.
+                pass
+        try:
+            stdout, _ = proc.communicate(timeout=scope.remaining())
+        except subprocess.TimeoutExpired as exc:
+            proc.kill()
+            proc.communicate()
+            raise AdbTimeoutError(f"{ADB_BINARY} shell timed out") from exc
+        if scope.cancelled:
+            self._interrupted(command, scope)
+
+        # The binary hides spawn and first-byte times; only the total is known.
+        timing = CommandTiming(TRANSPORT_BINARY, 0.0, None, time.perf_counter() - started)
+        self.latency.record(timing)
+        output = stdout.strip()
         if proc.returncode != 0:
             self.logger.error("Command failed (%s): %s", proc.returncode, output)
-        return output
+        return ShellResult(output, proc.returncode, timing)
 
     @staticmethod
     def _normalize_command(command: str) -> List[str]:
@@ -0,0 +1,137 @@
+"""Push-based device discovery over the adb server's track-devices stream."""
+
+from __future__ import annotations
+
+import socket
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from ..utils import get_logger
+from .client import AdbClient, AdbError, parse_device_list
+
+EVENT_CONNECTED = "connected"
+EVENT_DISCONNECTED = "disconnected"
+EVENT_STATUS = "status"
+
+DeviceEntries = Dict[str, Dict[str, str]]
+
+
+@dataclass
+class DeviceEvent:
+    """A device appeared, went away or changed state (device/offline/unauthorized)."""
+
+    kind: str
+    device_id: str
+    status: str
+    previous_status: Optional[str] = None
+    info: Dict[str, str] = field(default_factory=dict)
+
+
+def diff_device_lists(previous: DeviceEntries, current: DeviceEntries) -> List[DeviceEvent]:
+    """Events that turn the `previous` device list into `current`."""
+    events: List[DeviceEvent] = []
+    for device_id, entry in current.items():
+        before = previous.get(device_id)
+        if before is None:
+            events.append(DeviceEvent(EVENT_CONNECTED, device_id, entry["status"], info=entry))
+        elif before["status"] != entry["status"]:
+            events.append(
+                DeviceEvent(EVENT_STATUS, device_id, entry["status"], previous_status=before["status"], info=entry)
+            )
+    for device_id, entry in previous.items():
+        if device_id not in current:
+            events.append(
+                DeviceEvent(EVENT_DISCONNECTED, device_id, "disconnected", previous_status=entry["status"], info=entry)
+            )
+    return events
+
+
+class DeviceTracker:
+    """Background thread holding `host:track-devices-l` open and emitting DeviceEvents.
+
+    The adb server pushes the full device list on every change, so plugs and
+    unplugs arrive within milliseconds. If the server goes away the tracker
+    reports every device as disconnected, asks `start_server` to bring it back
+    and reconnects with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        client: AdbClient,
+        on_event: Callable[[DeviceEvent], None],
+        start_server: Optional[Callable[[], None]] = None,
+        min_backoff: float = 0.5,
+        max_backoff: float = 10.0,
+    ) -> None:
+        self.client = client
+        self.on_event = on_event
+        self.start_server = start_server
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.logger = get_logger("adb.discovery")
+        self._known: DeviceEntries = {}
+        self._stop = threading.Event()
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="adb-track-devices", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        backoff = self.min_backoff
+        while not self._stop.is_set():
+            try:
+                self._sock = self.client.connect()
+                self.client.send_request(self._sock, "host:track-devices-l")
+                self._sock.settimeout(None)
+                self.logger.info("Tracking devices on %s:%s", self.client.host, self.client.port)
+                backoff = self.min_backoff
+                while not self._stop.is_set():
+                    self._publish(self.client.read_string(self._sock))
+            except AdbError as exc:
+                if self._stop.is_set():
+                    break
+                self.logger.warning("Device tracking interrupted: %s", exc)
+                self._publish("")
+                if self.start_server is not None:
+                    try:
+                        self.start_server()
+                    except Exception as start_exc:  # pragma: no cover - best-effort only
+                        self.logger.error("Could not start the adb server: %s", start_exc)
+            finally:
+                if self._sock is not None:
+                    self._sock.close()
+                    self._sock = None
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _publish(self, payload: str) -> None:
+        current = {entry["id"]: entry for entry in parse_device_list(payload)}
+        events = diff_device_lists(self._known, current)
+        self._known = current
+        for event in events:
+            try:
+                self.on_event(event)
+            except Exception:  # pragma: no cover - a listener must not kill the tracker
+                self.logger.exception("Device event handler failed for %s", event)
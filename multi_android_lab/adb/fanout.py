@@ -0,0 +1,211 @@
+"""Parallel fan-out of one operation across many devices.
+
+Work goes through the shared scheduler keyed by device id, so a fan-out
+never runs on a device at the same time as that device's other queued work
+(telemetry, window commands) and shares the one pool of workers with it.
+A fan-out started from a pool task gives up its worker while it waits.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterable, List, Optional
+
+from ..utils.scheduler import PRIORITY_FLEET, get_scheduler
+from .cancel import CancelScope, current_scope
+from .client import ShellResult
+
+if TYPE_CHECKING:
+    from .device import Device
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_TIMEOUT = 15.0
+
+_NOT_STARTED = "not started: workers or device busy past the batch deadline"
+
+ResultCallback = Callable[["DeviceResult"], None]
+
+
+@dataclass
+class DeviceResult:
+    """Outcome of a fan-out operation on one device."""
+
+    device_id: str
+    output: str = ""
+    exit_code: Optional[int] = None
+    duration: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.exit_code in (0, None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["ok"] = self.ok
+        return data
+
+
+@dataclass
+class FanoutReport:
+    """All per-device results of one fan-out plus its wall-clock time."""
+
+    label: str
+    results: List[DeviceResult] = field(default_factory=list)
+    wall_time: float = 0.0
+
+    @property
+    def failed(self) -> List[DeviceResult]:
+        return [result for result in self.results if not result.ok]
+
+    def slowest(self, count: int = 3) -> List[DeviceResult]:
+        return sorted(self.results, key=lambda result: result.duration, reverse=True)[:count]
+
+    def summary(self) -> str:
+        ok = len(self.results) - len(self.failed)
+        text = f"{self.label}: {ok}/{len(self.results)} ok en {self.wall_time:.2f} s"
+        slowest = ", ".join(f"{r.device_id} ({r.duration:.2f} s)" for r in self.slowest() if r.duration)
+        return f"{text} · más lentos: {slowest}" if slowest else text
+
+
+def _to_result(device_id: str, value: Any, duration: float) -> DeviceResult:
+    if isinstance(value, ShellResult):
+        return DeviceResult(device_id, value.output, value.exit_code, duration, value.error)
+    if isinstance(value, str):
+        return DeviceResult(device_id, value, None, duration)
+    return DeviceResult(device_id, "" if value is None else str(value), None, duration)
+
+
+def fan_out(
+    devices: Iterable["Device"],
+    func: Callable[["Device"], Any],
+    *,
+    label: str = "fan-out",
+    max_concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+    on_result: Optional[ResultCallback] = None,
+    priority: int = PRIORITY_FLEET,
+) -> FanoutReport:
+    """Run func(device) on every device, at most `max_concurrency` at a time.
+
+    Each device gets `timeout` seconds from the moment its call starts. A
+    device that exceeds it is reported as timed out, its commands are
+    cancelled (see adb.cancel) and the report is returned without waiting for
+    it. Devices whose call has not started once the whole batch overruns its
+    budget (every worker or the device itself busy) are reported as not
+    started. `on_result` is called from the calling thread as each device
+    finishes, so callers can stream progress.
+    """
+    devices = list(devices)
+    report = FanoutReport(label)
+    if not devices:
+        return report
+
+    started_at: Dict[str, float] = {}
+
+    def _task(device: "Device") -> DeviceResult:
+        start = started_at[device.id] = time.perf_counter()
+        try:
+            # The device's commands inherit the fan-out deadline, so a hung call is killed, not abandoned.
+            with CancelScope(timeout, parents=(current_scope(),), name=f"{label} {device.id}"):
+                value = func(device)
+        except Exception as exc:
+            return DeviceResult(device.id, duration=time.perf_counter() - start, error=str(exc) or type(exc).__name__)
+        return _to_result(device.id, value, time.perf_counter() - start)
+
+    def _record(result: DeviceResult) -> None:
+        report.results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    wall_start = time.perf_counter()
+    workers = max(1, min(max_concurrency, len(devices)))
+    batch_deadline = None if timeout is None else wall_start + timeout * (len(devices) / workers + 1)
+    scheduler = get_scheduler()
+    waiting: Deque["Device"] = deque(devices)
+    pending: Dict[Future, "Device"] = {}
+
+    def _fill() -> None:
+        while waiting and len(pending) < workers:
+            device = waiting.popleft()
+            pending[scheduler.submit(_task, device, priority=priority, key=device.id)] = device
+
+    # A coordinator running on the pool must not hold a worker its own devices need.
+    with scheduler.blocking():
+        try:
+            _fill()
+            while pending:
+                wait_for = None
+                if timeout is not None:
+                    running = [started_at[d.id] for d in pending.values() if d.id in started_at]
+                    next_deadline = min(running) + timeout if running else batch_deadline
+                    wait_for = max(0.0, min(next_deadline, batch_deadline) - time.perf_counter())
+                done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.pop(future)
+                    _record(future.result())
+                if timeout is not None:
+                    now = time.perf_counter()
+                    for future, device in list(pending.items()):
+                        start = started_at.get(device.id)
+                        if start is not None and now - start >= timeout:
+                            pending.pop(future)
+                            error = f"timeout after {timeout:.1f} s"
+                            _record(DeviceResult(device.id, duration=now - start, error=error))
+                        elif start is None and now >= batch_deadline:
+                            pending.pop(future)
+                            future.cancel()
+                            _record(DeviceResult(device.id, error=_NOT_STARTED))
+                    while waiting and now >= batch_deadline:
+                        _record(DeviceResult(waiting.popleft().id, error=_NOT_STARTED))
+                _fill()
+        finally:
+            for future in pending:
+                future.cancel()
+    report.wall_time = time.perf_counter() - wall_start
+    return report
+
+
+def gather(
+    futures: Dict[str, Future],
+    *,
+    label: str = "gather",
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+    on_result: Optional[ResultCallback] = None,
+) -> FanoutReport:
+    """Report work already queued elsewhere (device id -> future) like a fan-out.
+
+    Waits on the calling thread, so no pool worker is tied up per device.
+    Durations count from the call; futures still pending after `timeout`
+    are reported as timed out and left running.
+    """
+    report = FanoutReport(label)
+
+    def _record(result: DeviceResult) -> None:
+        report.results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    wall_start = time.perf_counter()
+    deadline = None if timeout is None else wall_start + timeout
+    pending = {future: device_id for device_id, future in futures.items()}
+    while pending:
+        wait_for = None if deadline is None else max(0.0, deadline - time.perf_counter())
+        done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            device_id = pending.pop(future)
+            duration = time.perf_counter() - wall_start
+            try:
+                _record(_to_result(device_id, future.result(), duration))
+            except Exception as exc:
+                _record(DeviceResult(device_id, duration=duration, error=str(exc) or type(exc).__name__))
+    for device_id in pending.values():
+        error = f"timeout after {timeout:.1f} s"
+        _record(DeviceResult(device_id, duration=time.perf_counter() - wall_start, error=error))
+    report.wall_time = time.perf_counter() - wall_start
+    return report
@@ -0,0 +1,213 @@
+"""Per-device health: a circuit breaker around telemetry polling.
+
+Every command outcome is recorded. A device that times out or errors often
+becomes `degraded`: its telemetry is polled with exponential backoff. One
+that keeps failing, or flaps between offline and device, is `quarantined`:
+it is not polled at all until a cheap probe (`echo`) succeeds. A successful
+probe moves it back to degraded, and a run of successes makes it healthy.
+User actions are never blocked; only background polling backs off.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Deque, Dict, List, Optional
+
+from ..utils import get_logger
+from .client import AdbError
+
+if TYPE_CHECKING:
+    from .device import Device
+
+HEALTH_HEALTHY = "healthy"
+HEALTH_DEGRADED = "degraded"
+HEALTH_QUARANTINED = "quarantined"
+
+OUTCOME_OK = "ok"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_ERROR = "error"
+
+# Recent outcomes kept per device.
+OUTCOME_WINDOW = 20
+MIN_SAMPLES = 5
+DEGRADE_FAILURE_RATE = 0.3
+DEGRADE_AFTER = 2
+QUARANTINE_AFTER = 5
+RECOVER_AFTER = 3
+# Status changes within FLAP_WINDOW seconds that count as flapping.
+FLAP_LIMIT = 4
+FLAP_WINDOW = 120.0
+BASE_BACKOFF = 2.0
+MAX_BACKOFF = 300.0
+PROBE_COMMAND = "echo ok"
+PROBE_TIMEOUT = 3.0
+
+logger = get_logger("adb.health")
+
+StateListener = Callable[[str, str, str], None]
+
+
+class DeviceHealth:
+    """Outcome window, flap history and backoff of one device (survives reconnects)."""
+
+    def __init__(self, device_id: str, on_change: Optional[StateListener] = None) -> None:
+        self.device_id = device_id
+        self.state = HEALTH_HEALTHY
+        self.on_change = on_change
+        self.consecutive_failures = 0
+        self.consecutive_successes = 0
+        self.next_attempt_at = 0.0
+        self.backoff = 0.0
+        self._outcomes: Deque[bool] = deque(maxlen=OUTCOME_WINDOW)
+        self._status_changes: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def failure_rate(self) -> float:
+        with self._lock:
+            return self._failure_rate_locked()
+
+    def _failure_rate_locked(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for ok in self._outcomes if not ok) / len(self._outcomes)
+
+    def record(self, outcome: str) -> None:
+        """Record a command outcome (OUTCOME_OK, OUTCOME_TIMEOUT or OUTCOME_ERROR)."""
+        with self._lock:
+            ok = outcome == OUTCOME_OK
+            self._outcomes.append(ok)
+            if ok:
+                self.consecutive_failures = 0
+                self.consecutive_successes += 1
+                if self.state == HEALTH_HEALTHY or (
+                    self.state == HEALTH_DEGRADED and self.consecutive_successes >= RECOVER_AFTER
+                ):
+                    self.backoff = 0.0
+                    self.next_attempt_at = 0.0
+                    change = self._transition_locked(HEALTH_HEALTHY, "recovered")
+                else:
+                    # Still suspect: poll again sooner, but not yet at full rate.
+                    self.backoff /= 2
+                    self.next_attempt_at = time.monotonic() + self.backoff
+                    # A quarantined device that answers (a probe or a user command) is only degraded.
+                    change = self._transition_locked(HEALTH_DEGRADED, "answered while quarantined")
+            else:
+                self.consecutive_successes = 0
+                self.consecutive_failures += 1
+                self._back_off_locked()
+                change = self._escalate_locked(f"{self.consecutive_failures} consecutive {outcome}s")
+        self._notify(change)
+
+    def record_status(self, status: str) -> None:
+        """Record a device/offline/unauthorized/disconnected transition to detect flapping."""
+        now = time.monotonic()
+        with self._lock:
+            self._status_changes.append(now)
+            while self._status_changes and now - self._status_changes[0] > FLAP_WINDOW:
+                self._status_changes.popleft()
+            change = None
+            if len(self._status_changes) >= FLAP_LIMIT and self.state != HEALTH_QUARANTINED:
+                self._back_off_locked()
+                change = self._transition_locked(
+                    HEALTH_QUARANTINED, f"{len(self._status_changes)} state changes in {FLAP_WINDOW:.0f} s"
+                )
+        self._notify(change)
+
+    def should_poll(self, now: Optional[float] = None) -> bool:
+        """Whether background telemetry may query the device now."""
+        with self._lock:
+            if self.state == HEALTH_QUARANTINED:
+                return False
+            return (now or time.monotonic()) >= self.next_attempt_at
+
+    def probe_due(self, now: Optional[float] = None) -> bool:
+        with self._lock:
+            return self.state == HEALTH_QUARANTINED and (now or time.monotonic()) >= self.next_attempt_at
+
+    def retry_in(self) -> float:
+        """Seconds until the next poll or probe is allowed."""
+        with self._lock:
+            return max(0.0, self.next_attempt_at - time.monotonic())
+
+    # ------------------------------------------------------------------
+    def _back_off_locked(self) -> None:
+        self.backoff = min(MAX_BACKOFF, self.backoff * 2 if self.backoff else BASE_BACKOFF)
+        self.next_attempt_at = time.monotonic() + self.backoff
+
+    def _escalate_locked(self, reason: str) -> Optional[tuple]:
+        if self.state != HEALTH_QUARANTINED and self.consecutive_failures >= QUARANTINE_AFTER:
+            return self._transition_locked(HEALTH_QUARANTINED, reason)
+        if self.state == HEALTH_HEALTHY:
+            rate = self._failure_rate_locked()
+            if self.consecutive_failures >= DEGRADE_AFTER or (
+                len(self._outcomes) >= MIN_SAMPLES and rate >= DEGRADE_FAILURE_RATE
+            ):
+                return self._transition_locked(HEALTH_DEGRADED, f"{reason}, {rate:.0%} failures")
+        return None
+
+    def _transition_locked(self, state: str, reason: str) -> Optional[tuple]:
+        if state == self.state:
+            return None
+        previous, self.state = self.state, state
+        self.consecutive_successes = 0
+        if state == HEALTH_QUARANTINED:
+            self._status_changes.clear()
+        return previous, state, reason
+
+    def _notify(self, change: Optional[tuple]) -> None:
+        if change is None:
+            return
+        previous, state, reason = change
+        log = logger.warning if state == HEALTH_QUARANTINED else logger.info
+        log("Device %s: %s -> %s (%s)", self.device_id, previous, state, reason)
+        if self.on_change:
+            self.on_change(self.device_id, previous, state)
+
+
+class HealthTracker:
+    """DeviceHealth per serial, kept across disconnects so flapping is noticed."""
+
+    def __init__(self) -> None:
+        self._devices: Dict[str, DeviceHealth] = {}
+        self._listeners: List[StateListener] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: StateListener) -> None:
+        """Called with (device_id, previous_state, state) from the thread that saw the change."""
+        self._listeners.append(listener)
+
+    def for_device(self, device_id: str) -> DeviceHealth:
+        with self._lock:
+            health = self._devices.get(device_id)
+            if health is None:
+                health = self._devices[device_id] = DeviceHealth(device_id, on_change=self._changed)
+            return health
+
+    def state(self, device_id: str) -> str:
+        return self.for_device(device_id).state
+
+    def states(self) -> Dict[str, str]:
+        with self._lock:
+            return {device_id: health.state for device_id, health in self._devices.items()}
+
+    def probe_due(self, devices: List[Device]) -> List[Device]:
+        """Quarantined devices whose backoff has elapsed."""
+        now = time.monotonic()
+        return [device for device in devices if self.for_device(device.id).probe_due(now)]
+
+    def _changed(self, device_id: str, previous: str, state: str) -> None:
+        for listener in list(self._listeners):
+            listener(device_id, previous, state)
+
+
+def probe(device: Device) -> bool:
+    """Cheap liveness check; Device records the outcome in its health."""
+    try:
+        result = device._execute(PROBE_COMMAND, timeout=PROBE_TIMEOUT)
+    except AdbError as exc:
+        logger.debug("Probe of %s failed: %s", device.id, exc)
+        return False
+    return result.output == "ok"
@@ -0,0 +1,158 @@
+"""Per-device ordered input queue that merges quick clicks into one shell call."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Deque, List, Optional, Tuple
+
+from ..utils.scheduler import PRIORITY_INTERACTIVE, get_scheduler
+from .client import AdbCancelledError, ShellResult
+
+if TYPE_CHECKING:
+    from .device import Device
+
+DEFAULT_FLUSH_WINDOW = 0.03
+MAX_BATCH_REPORTS = 100
+
+_KEYEVENT_PREFIX = "input keyevent "
+
+
+@dataclass
+class BatchReport:
+    """One flush: the merged commands and how long they took end to end."""
+
+    device_id: str
+    commands: List[str]
+    script: str
+    result: ShellResult
+    queued_at: float
+    started_at: float
+    finished_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def latency(self) -> float:
+        """From the oldest click in the batch until the device answered."""
+        return self.finished_at - self.queued_at
+
+    @property
+    def run_time(self) -> float:
+        return self.finished_at - self.started_at
+
+
+def merge_commands(commands: List[str]) -> str:
+    """Join commands into one script, folding consecutive keyevents into one `input` call."""
+    merged: List[str] = []
+    for command in commands:
+        if command.startswith(_KEYEVENT_PREFIX) and merged and merged[-1].startswith(_KEYEVENT_PREFIX):
+            merged[-1] += " " + command[len(_KEYEVENT_PREFIX):]
+        else:
+            merged.append(command)
+    # `;` rather than newlines so the adb binary fallback (shlex) keeps the separators.
+    return " ; ".join(merged)
+
+
+class InputQueue:
+    """Runs a device's input actions in click order, one shell call per flush window.
+
+    Each flush is a task on the shared scheduler keyed by the device id, so
+    it never overlaps or swaps places with the device's other work. Actions
+    are queued as (name, args) and turned into shell commands on the worker,
+    so enqueueing never blocks the UI even if building the command needs a
+    telemetry probe (e.g. the resolution for a tap).
+    """
+
+    def __init__(
+        self,
+        device: Device,
+        flush_window: float = DEFAULT_FLUSH_WINDOW,
+        on_batch: Optional[Callable[[BatchReport], None]] = None,
+    ) -> None:
+        self.device = device
+        self.flush_window = flush_window
+        self.on_batch = on_batch
+        self.batches: Deque[BatchReport] = deque(maxlen=MAX_BATCH_REPORTS)
+        self._pending: Deque[Tuple[str, tuple, Future, float]] = deque()
+        self._lock = threading.Lock()
+        # Whether a flush task is queued that has not taken the pending actions yet.
+        self._scheduled = False
+        self._closed = False
+
+    def submit(self, action: str, *args) -> Future:
+        """Queue a Device action (see Device.command_for); resolves to the batch result."""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                future.set_exception(AdbCancelledError("input queue closed"))
+                return future
+            self._pending.append((action, args, future, time.monotonic()))
+            schedule = not self._scheduled
+            self._scheduled = True
+        if schedule:
+            get_scheduler().submit(self._run, priority=PRIORITY_INTERACTIVE, key=self.device.id)
+        return future
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def close(self, reason: str = "input queue closed") -> None:
+        """Fail the actions still waiting for a flush and refuse new ones."""
+        with self._lock:
+            self._closed = True
+            batch = list(self._pending)
+            self._pending.clear()
+        for _action, _args, future, _queued in batch:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(AdbCancelledError(reason))
+
+    def _run(self) -> None:
+        with self._lock:
+            first = self._pending[0][3] if self._pending else time.monotonic()
+        # Let clicks arriving within the window join this batch.
+        time.sleep(max(0.0, first + self.flush_window - time.monotonic()))
+        with self._lock:
+            batch = list(self._pending)
+            self._pending.clear()
+            self._scheduled = False
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch: List[Tuple[str, tuple, Future, float]]) -> None:
+        started = time.monotonic()
+        commands: List[str] = []
+        futures: List[Future] = []
+        for action, args, future, _queued in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                commands.append(self.device.command_for(action, *args))
+                futures.append(future)
+            except Exception as exc:  # noqa: BLE001 - reported through the future
+                self.device.logger.warning("Cannot build input action %s: %s", action, exc)
+                future.set_exception(exc)
+        if not commands:
+            return
+        script = merge_commands(commands)
+        try:
+            result = self.device.run_command(script)
+        except Exception as exc:  # noqa: BLE001 - reported through the futures
+            self.device.logger.warning("Input batch failed: %s", exc)
+            for future in futures:
+                future.set_exception(exc)
+            return
+        report = BatchReport(self.device.id, commands, script, result, batch[0][3], started)
+        self.batches.append(report)
+        self.device.logger.debug(
+            "Input batch of %d command(s) in %.0f ms (%.0f ms since first click)",
+            len(commands),
+            report.run_time * 1000,
+            report.latency * 1000,
+        )
+        for future in futures:
+            future.set_result(result)
+        if self.on_batch:
+            self.on_batch(report)
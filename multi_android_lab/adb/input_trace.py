@@ -0,0 +1,245 @@
+"""Record touch traces with `getevent` and replay them with `sendevent`.
+
+`input tap`/`input swipe` start an app_process JVM per call, which takes
+hundreds of milliseconds and makes gesture timing unreliable. A trace keeps
+the raw kernel events of the touchscreen with their relative timestamps, and
+coordinates normalized to 0-1 so it can be replayed on a device with a
+different panel. Replay streams the `sendevent` lines frame by frame over a
+shell's stdin, and the host sends each frame at its time in the trace.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from .cancel import current_scope
+from .client import AdbError, AdbTimeoutError, ShellResult
+
+if TYPE_CHECKING:
+    from .device import Device
+
+EV_SYN = 0x00
+EV_ABS = 0x03
+ABS_X = 0x00
+ABS_Y = 0x01
+ABS_MT_POSITION_X = 0x35
+ABS_MT_POSITION_Y = 0x36
+X_AXES = (ABS_X, ABS_MT_POSITION_X)
+Y_AXES = (ABS_Y, ABS_MT_POSITION_Y)
+
+TRACE_VERSION = 1
+# Events closer together than this are sent as one frame.
+MIN_SLEEP = 0.004
+# How often a replay waiting for its next frame checks for cancellation.
+PACE_POLL = 0.1
+
+_ADD_DEVICE_RE = re.compile(r"^add device \d+:\s*(\S+)")
+_NAME_RE = re.compile(r'^\s*name:\s*"(.*)"')
+_AXIS_RE = re.compile(r"([0-9a-f]{4})\s*:\s*value -?\d+, min (-?\d+), max (-?\d+)")
+_EVENT_RE = re.compile(
+    r"^\[\s*(\d+\.\d+)\]\s+(?:(\S+):\s+)?([0-9a-f]{4})\s+([0-9a-f]{4})\s+([0-9a-f]{8})\s*$"
+)
+
+
+@dataclass
+class InputDevice:
+    """A /dev/input node and the ranges of its absolute axes."""
+
+    path: str
+    name: str = ""
+    axes: Dict[int, Tuple[int, int]] = field(default_factory=dict)
+
+    @property
+    def is_touchscreen(self) -> bool:
+        return ABS_MT_POSITION_X in self.axes and ABS_MT_POSITION_Y in self.axes
+
+
+@dataclass
+class TraceEvent:
+    """One kernel event; `value` is normalized to 0-1 on position axes."""
+
+    t: float
+    type: int
+    code: int
+    value: float
+
+
+@dataclass
+class TouchTrace:
+    """Timed touchscreen events, independent of the device they came from."""
+
+    events: List[TraceEvent] = field(default_factory=list)
+    source: str = ""
+
+    @property
+    def duration(self) -> float:
+        return self.events[-1].t if self.events else 0.0
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "version": TRACE_VERSION,
+                "source": self.source,
+                "events": [[round(e.t, 6), e.type, e.code, e.value] for e in self.events],
+            },
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, text: str) -> "TouchTrace":
+        data = json.loads(text)
+        if data.get("version") != TRACE_VERSION:
+            raise ValueError(f"Unsupported trace version: {data.get('version')}")
+        return cls([TraceEvent(*event) for event in data["events"]], data.get("source", ""))
+
+
+def parse_input_devices(output: str) -> List[InputDevice]:
+    """Parse `getevent -p` into InputDevice entries."""
+    devices: List[InputDevice] = []
+    for line in output.splitlines():
+        match = _ADD_DEVICE_RE.match(line)
+        if match:
+            devices.append(InputDevice(match.group(1)))
+            continue
+        if not devices:
+            continue
+        match = _NAME_RE.match(line)
+        if match:
+            devices[-1].name = match.group(1)
+            continue
+        match = _AXIS_RE.search(line)
+        if match:
+            devices[-1].axes[int(match.group(1), 16)] = (int(match.group(2)), int(match.group(3)))
+    return devices
+
+
+def find_touchscreen(devices: List[InputDevice]) -> Optional[InputDevice]:
+    return next((device for device in devices if device.is_touchscreen), None)
+
+
+def _signed(value: int) -> int:
+    return value - (1 << 32) if value & 0x80000000 else value
+
+
+def parse_getevent(output: str) -> List[Tuple[float, int, int, int]]:
+    """Parse `getevent -t` lines into (timestamp, type, code, value)."""
+    events = []
+    for line in output.splitlines():
+        match = _EVENT_RE.match(line.strip())
+        if match:
+            events.append(
+                (
+                    float(match.group(1)),
+                    int(match.group(3), 16),
+                    int(match.group(4), 16),
+                    _signed(int(match.group(5), 16)),
+                )
+            )
+    return events
+
+
+def _axis_range(device: InputDevice, code: int, resolution: Tuple[int, int]) -> Tuple[int, int]:
+    if code in device.axes:
+        return device.axes[code]
+    # No range reported: assume the axis maps 1:1 to the display.
+    return (0, (resolution[0] if code in X_AXES else resolution[1]) - 1)
+
+
+def compile_trace(
+    raw_events: List[Tuple[float, int, int, int]],
+    touchscreen: InputDevice,
+    resolution: Tuple[int, int],
+    source: str = "",
+) -> TouchTrace:
+    """Turn raw getevent output into a trace with relative times and 0-1 positions."""
+    if not raw_events:
+        return TouchTrace(source=source)
+    start = raw_events[0][0]
+    events = []
+    for timestamp, ev_type, code, value in raw_events:
+        normalized: float = value
+        if ev_type == EV_ABS and code in X_AXES + Y_AXES:
+            low, high = _axis_range(touchscreen, code, resolution)
+            normalized = round((value - low) / max(high - low, 1), 6)
+        events.append(TraceEvent(timestamp - start, ev_type, code, normalized))
+    return TouchTrace(events, source)
+
+
+def build_replay_frames(
+    trace: TouchTrace, touchscreen: InputDevice, resolution: Tuple[int, int]
+) -> List[Tuple[float, str]]:
+    """`sendevent` lines that reproduce the trace on `touchscreen`, grouped as (offset, lines) frames."""
+    frames: List[Tuple[float, List[str]]] = []
+    for event in trace.events:
+        if not frames or event.t - frames[-1][0] >= MIN_SLEEP:
+            frames.append((event.t, []))
+        value = event.value
+        if event.type == EV_ABS and event.code in X_AXES + Y_AXES:
+            low, high = _axis_range(touchscreen, event.code, resolution)
+            value = low + round(value * (high - low))
+        frames[-1][1].append(f"sendevent {touchscreen.path} {event.type} {event.code} {int(value)}")
+    return [(offset, "\n".join(lines) + "\n") for offset, lines in frames]
+
+
+def pace_frames(frames: List[Tuple[float, str]]) -> Iterator[bytes]:
+    """Yield each frame at its offset from the first one, then `exit`.
+
+    Offsets are absolute, so a frame the device runs late (each `sendevent`
+    is a fork) does not push back the ones after it. Stops early when the
+    scope of the command consuming it is cancelled.
+    """
+    # Read on first use: the consumer iterates inside its command's scope.
+    scope = current_scope()
+    start = time.monotonic()
+    for offset, lines in frames:
+        while True:
+            if scope is not None and scope.cancelled:
+                return
+            left = start + offset - time.monotonic()
+            if left <= 0:
+                break
+            time.sleep(min(left, PACE_POLL))
+        yield lines.encode("utf-8")
+    yield b"exit\n"
+
+
+# ----------------------------------------------------------------------
+def record_trace(device: Device, duration: float) -> TouchTrace:
+    """Capture touchscreen events for `duration` seconds."""
+    touchscreen = find_touchscreen(device.input_devices())
+    if touchscreen is None:
+        raise AdbError(f"{device.id}: no touchscreen found in getevent -p")
+    stream = device.client.open_shell(device.id, f"getevent -t {touchscreen.path}")
+    chunks = []
+    deadline = time.monotonic() + duration
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            stream.settimeout(remaining)
+            try:
+                chunk = stream.read()
+            except AdbTimeoutError:
+                break
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        # Closing the socket ends getevent on the device.
+        stream.close()
+    raw = parse_getevent(b"".join(chunks).decode("utf-8", errors="replace"))
+    return compile_trace(raw, touchscreen, device.get_resolution(), source=device.id)
+
+
+def replay_trace(device: Device, trace: TouchTrace) -> ShellResult:
+    """Inject a trace through a `sh` fed frame by frame over stdin, so its length is unbounded."""
+    touchscreen = find_touchscreen(device.input_devices())
+    if touchscreen is None:
+        return ShellResult(f"{device.id}: no touchscreen found", 1)
+    frames = build_replay_frames(trace, touchscreen, device.get_resolution())
+    return device._execute("sh", timeout=trace.duration + 10, stdin=pace_frames(frames))
@@ -0,0 +1,293 @@
+"""Streamed APK installs, throttled per USB bus.
+
+The APK is streamed from disk to each device in fixed-size chunks over
+`exec:cmd package install -S <size>`, so memory stays bounded, nothing is
+staged in /data/local/tmp and there is no second copy on the device. The
+caller's cancel scope is checked between chunks. Devices on the same USB bus
+(the `usb:` field of `adb devices -l`, e.g. `1-4.2` is bus 1) share its
+bandwidth, so only a few transfers run per bus at a time while other buses
+proceed in parallel.
+"""
+
+from __future__ import annotations
+
+import socket
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..utils.scheduler import get_scheduler
+from .cancel import REASON_DEADLINE, CancelScope, current_scope
+from .client import AdbCancelledError, AdbConnectionError, AdbError, AdbTimeoutError, ShellResult
+from .paths import ADB_BINARY
+
+if TYPE_CHECKING:
+    from .device import Device
+
+DEFAULT_PER_BUS = 3
+DEFAULT_RETRIES = 2
+RETRY_DELAY = 2.0
+# Timeouts scale with the APK size, assuming no less than this throughput.
+MIN_THROUGHPUT = 512 * 1024
+CHUNK_SIZE = 256 * 1024
+# How often a device waiting for its bus slot checks for cancellation.
+SLOT_POLL = 0.5
+UNKNOWN_BUS = "?"
+
+# Failures that another attempt cannot fix.
+PERMANENT_FAILURES = (
+    "INSTALL_FAILED_VERSION_DOWNGRADE",
+    "INSTALL_FAILED_UPDATE_INCOMPATIBLE",
+    "INSTALL_FAILED_INVALID_APK",
+    "INSTALL_FAILED_NO_MATCHING_ABIS",
+    "INSTALL_FAILED_OLDER_SDK",
+    "INSTALL_FAILED_INSUFFICIENT_STORAGE",
+    "INSTALL_FAILED_DUPLICATE_PERMISSION",
+    "INSTALL_PARSE_FAILED",
+)
+
+
+def usb_bus(info: Dict[str, str]) -> str:
+    """Bus of a device from its `adb devices -l` fields (`usb:1-4.2` -> `1`)."""
+    usb = info.get("usb", "")
+    if not usb:
+        return UNKNOWN_BUS
+    # Linux prints bus-port.path; other platforms print an opaque location id.
+    return usb.split("-", 1)[0]
+
+
+class BusLimiter:
+    """One semaphore per USB bus, created on first use."""
+
+    def __init__(self, per_bus: int = DEFAULT_PER_BUS) -> None:
+        self.per_bus = per_bus
+        self._semaphores: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    def slot(self, bus: str) -> threading.Semaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(bus)
+            if semaphore is None:
+                semaphore = self._semaphores[bus] = threading.Semaphore(self.per_bus)
+            return semaphore
+
+
+@dataclass
+class ApkPackage:
+    """An APK on disk shared by every install of a rollout; each transfer reads it in chunks."""
+
+    path: Path
+    size: int
+
+    @classmethod
+    def load(cls, path: str | Path) -> "ApkPackage":
+        path = Path(path)
+        return cls(path, path.stat().st_size)
+
+    def chunks(self) -> Iterator[bytes]:
+        with self.path.open("rb") as fh:
+            while True:
+                chunk = fh.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+    @property
+    def timeout(self) -> float:
+        return max(60.0, self.size / MIN_THROUGHPUT)
+
+
+@dataclass
+class InstallResult:
+    """Outcome of one device's install, with its transfer throughput."""
+
+    output: str
+    ok: bool
+    attempts: int
+    sent: int
+    transfer_time: float
+    bus: str = UNKNOWN_BUS
+    wait_time: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second actually sent by the successful (or last) attempt."""
+        return self.sent / self.transfer_time if self.transfer_time else 0.0
+
+    def summary(self) -> str:
+        mb_per_s = self.throughput / (1024 * 1024)
+        retries = f" · {self.attempts} intentos" if self.attempts > 1 else ""
+        # `cmd package` prints progress lines before the final Success/Failure line.
+        verdict = self.output.splitlines()[-1] if self.output else "sin respuesta"
+        return f"{verdict} · {mb_per_s:.1f} MB/s · bus {self.bus}{retries}"
+
+    def to_shell_result(self) -> ShellResult:
+        return ShellResult(self.summary(), 0 if self.ok else 1)
+
+
+def _install_options(replace: bool, downgrade: bool, grant: bool) -> str:
+    return " ".join(flag for flag, enabled in (("-r", replace), ("-d", downgrade), ("-g", grant)) if enabled)
+
+
+def _check_scope(scope: Optional[CancelScope]) -> None:
+    if scope is not None and scope.cancelled:
+        if scope.reason == REASON_DEADLINE:
+            raise AdbTimeoutError("APK install deadline exceeded")
+        raise AdbCancelledError(scope.reason or "cancelled")
+
+
+def _stream_install(device: Device, apk: ApkPackage, options: str, command: str) -> Tuple[str, int, float]:
+    """Stream the APK chunk by chunk: (package manager answer, bytes sent, seconds sending)."""
+    scope = current_scope()
+    request = " ".join(part for part in (command, "install", options, f"-S {apk.size}") if part)
+    sock = device.client.open_exec(device.id, request, apk.timeout)
+    sent = 0
+    started = time.perf_counter()
+    try:
+        for chunk in apk.chunks():
+            _check_scope(scope)
+            sock.sendall(chunk)
+            sent += len(chunk)
+        transfer_time = time.perf_counter() - started
+        chunks = []
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except socket.timeout as exc:
+        raise AdbTimeoutError("Timed out streaming the APK") from exc
+    except OSError as exc:
+        # Cancelling the scope closes the socket under us.
+        _check_scope(scope)
+        raise AdbConnectionError(str(exc)) from exc
+    finally:
+        sock.close()
+    _check_scope(scope)
+    return b"".join(chunks).decode("utf-8", errors="replace").strip(), sent, transfer_time
+
+
+def _binary_install(device: Device, apk: ApkPackage, options: str) -> Tuple[str, int, float]:
+    args = [ADB_BINARY, "-s", device.id, "install", *options.split(), str(apk.path)]
+    scope = current_scope()
+    started = time.perf_counter()
+    try:
+        proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    except OSError as exc:
+        raise AdbConnectionError(f"Cannot run {ADB_BINARY}: {exc}") from exc
+    if scope is not None:
+        scope.attach(proc)
+    try:
+        stdout, _ = proc.communicate(timeout=apk.timeout)
+    except subprocess.TimeoutExpired as exc:
+        proc.kill()
+        proc.communicate()
+        raise AdbTimeoutError("adb install timed out") from exc
+    _check_scope(scope)
+    # The binary does not report progress; count the whole file over the whole call.
+    return stdout.strip(), apk.size, time.perf_counter() - started
+
+
+def install_once(device: Device, apk: ApkPackage, options: str = "-r") -> Tuple[str, int, float]:
+    """One streamed install attempt: (package manager answer, bytes sent, seconds sending)."""
+    if not device.client.available:
+        return _binary_install(device, apk, options)
+    try:
+        output, sent, transfer_time = _stream_install(device, apk, options, "cmd package")
+        if "Can't find service: package" in output or "cmd: not found" in output:
+            # Before Android 7 there is no `cmd`; pm accepts the same streamed form.
+            output, sent, transfer_time = _stream_install(device, apk, options, "pm")
+        return output, sent, transfer_time
+    except AdbConnectionError:
+        if not device.client.available:
+            return _binary_install(device, apk, options)
+        raise
+
+
+def _acquire(slot: threading.Semaphore, scope: Optional[CancelScope]) -> None:
+    # Waiting for the bus is not work; the pool may lend the worker to another device.
+    with get_scheduler().blocking():
+        while not slot.acquire(timeout=SLOT_POLL):
+            _check_scope(scope)
+
+
+def _pause(delay: float, scope: Optional[CancelScope]) -> None:
+    """Sleep before a retry, waking up early when the scope is cancelled."""
+    until = time.monotonic() + delay
+    while True:
+        _check_scope(scope)
+        left = until - time.monotonic()
+        if left <= 0:
+            return
+        time.sleep(min(left, SLOT_POLL))
+
+
+def install_apk(
+    device: Device,
+    apk: ApkPackage,
+    limiter: Optional[BusLimiter] = None,
+    retries: int = DEFAULT_RETRIES,
+    replace: bool = True,
+    downgrade: bool = False,
+    grant: bool = False,
+) -> InstallResult:
+    """Install `apk`, waiting for a slot on the device's USB bus and retrying transient failures."""
+    options = _install_options(replace, downgrade, grant)
+    bus = usb_bus(device.info)
+    scope = current_scope()
+    attempts = 0
+    output = ""
+    sent = 0
+    transfer_time = 0.0
+    wait_time = 0.0
+    while True:
+        attempts += 1
+        waited = time.perf_counter()
+        slot = limiter.slot(bus) if limiter else None
+        if slot:
+            _acquire(slot, scope)
+        try:
+            started = time.perf_counter()
+            wait_time += started - waited
+            try:
+                output, sent, transfer_time = install_once(device, apk, options)
+            except AdbError as exc:
+                # A cancelled scope also breaks the socket; report the cancellation, not the symptom.
+                if isinstance(exc, AdbCancelledError):
+                    raise
+                _check_scope(scope)
+                output = f"error: {exc}"
+                sent, transfer_time = 0, time.perf_counter() - started
+        finally:
+            if slot:
+                slot.release()
+        ok = output.splitlines()[-1:] == ["Success"]
+        permanent = any(reason in output for reason in PERMANENT_FAILURES)
+        # Past the deadline another attempt would only be cancelled again.
+        if ok or permanent or attempts > retries or (scope is not None and scope.cancelled):
+            break
+        device.logger.info("Install attempt %d failed (%s); retrying", attempts, output)
+        _pause(RETRY_DELAY * attempts, scope)
+    return InstallResult(output, ok, attempts, sent, transfer_time, bus, wait_time)
+
+
+def bus_counts(devices: Sequence[Device]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for device in devices:
+        bus = usb_bus(device.info)
+        counts[bus] = counts.get(bus, 0) + 1
+    return counts
+
+
+def interleave_buses(devices: Sequence[Device]) -> List[Device]:
+    """Devices taken from each bus in turn, so the first ones started spread over every bus."""
+    by_bus: Dict[str, List[Device]] = {}
+    for device in devices:
+        by_bus.setdefault(usb_bus(device.info), []).append(device)
+    ordered: List[Device] = []
+    for index in range(max((len(queue) for queue in by_bus.values()), default=0)):
+        ordered.extend(queue[index] for queue in by_bus.values() if index < len(queue))
+    return ordered
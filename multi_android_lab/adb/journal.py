@@ -0,0 +1,210 @@
+"""Buffered, rotating per-device command journal."""
+
+from __future__ import annotations
+
+import atexit
+import json
+import queue
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from ..utils import LOG_DIR, get_logger
+
+DEFAULT_FLUSH_INTERVAL = 0.5
+DEFAULT_MAX_BYTES = 5_000_000
+DEFAULT_MAX_AGE = 24 * 3600
+DEFAULT_BACKUP_COUNT = 5
+MAX_OUTPUT_CHARS = 4096
+
+
+@dataclass
+class JournalRecord:
+    """One executed command."""
+
+    ts: float
+    command: str
+    exit_code: Optional[int]
+    duration_ms: float
+    output_bytes: int
+    output: str = ""
+
+    @classmethod
+    def create(cls, command: str, output: str, exit_code: Optional[int], duration: float) -> "JournalRecord":
+        """Build a record, keeping at most MAX_OUTPUT_CHARS of output."""
+        return cls(
+            ts=time.time(),
+            command=command,
+            exit_code=exit_code,
+            duration_ms=round(duration * 1000, 2),
+            output_bytes=len(output.encode("utf-8", errors="ignore")),
+            output=output[:MAX_OUTPUT_CHARS],
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, line: str) -> Optional["JournalRecord"]:
+        try:
+            return cls(**json.loads(line))
+        except (ValueError, TypeError):
+            return None
+
+    def format_lines(self) -> List[str]:
+        """Human-readable form used by the device window ("$ cmd" + output)."""
+        return [f"$ {self.command}", *self.output.splitlines()]
+
+
+def render_record(line: str) -> List[str]:
+    """LogTail formatter: a JSONL record becomes its display lines."""
+    record = JournalRecord.from_json(line)
+    return record.format_lines() if record else [line]
+
+
+def sanitize_filename(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]", "_", name)
+
+
+class CommandJournal:
+    """Collects JournalRecords from any thread and writes them on one background thread.
+
+    Records are batched per file and flushed every `flush_interval` seconds.
+    Files rotate to `.1`, `.2`, ... once they exceed `max_bytes` or their first
+    record is older than `max_age` seconds.
+    """
+
+    def __init__(
+        self,
+        directory: Path = LOG_DIR,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = DEFAULT_MAX_AGE,
+        backup_count: int = DEFAULT_BACKUP_COUNT,
+    ) -> None:
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backup_count = backup_count
+        self.logger = get_logger("adb.journal")
+        self._queue: "queue.Queue[tuple[Path, JournalRecord] | None]" = queue.Queue()
+        self._started_at: Dict[Path, float] = {}
+        self._thread = threading.Thread(target=self._run, name="command-journal", daemon=True)
+        self._thread.start()
+
+    def path_for(self, device_id: str) -> Path:
+        return self.directory / f"{sanitize_filename(device_id)}.jsonl"
+
+    def record(self, device_id: str, record: JournalRecord) -> None:
+        """Queue a record; never blocks on disk I/O."""
+        self._queue.put((self.path_for(device_id), record))
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until every queued record has been written."""
+        done = threading.Event()
+        self._queue.put((Path(), done))  # type: ignore[arg-type]
+        done.wait(timeout)
+
+    def close(self) -> None:
+        self.flush(timeout=5)
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def iter_records(self, device_id: str) -> Iterator[JournalRecord]:
+        """Every record for a device, oldest first, across rotated files."""
+        base = self.path_for(device_id)
+        paths = [base.with_name(f"{base.name}.{index}") for index in range(self.backup_count, 0, -1)] + [base]
+        for path in paths:
+            if not path.exists():
+                continue
+            with path.open("r", encoding="utf-8", errors="ignore") as fh:
+                for line in fh:
+                    record = JournalRecord.from_json(line)
+                    if record is not None:
+                        yield record
+
+    # ------------------------------------------------------------------
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while not isinstance(batch[-1][1], threading.Event):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._write_batch(batch)
+                    return
+                batch.append(item)
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: list) -> None:
+        grouped: Dict[Path, List[JournalRecord]] = defaultdict(list)
+        waiters = []
+        for path, record in batch:
+            if isinstance(record, threading.Event):
+                waiters.append(record)
+            else:
+                grouped[path].append(record)
+        for path, records in grouped.items():
+            try:
+                self._rotate_if_needed(path, records[0].ts)
+                with path.open("a", encoding="utf-8") as fh:
+                    fh.write("".join(record.to_json() + "\n" for record in records))
+            except OSError as exc:
+                self.logger.error("Could not write journal %s: %s", path, exc)
+        for waiter in waiters:
+            waiter.set()
+
+    def _rotate_if_needed(self, path: Path, now: float) -> None:
+        started = self._started_at.get(path)
+        if started is None:
+            started = self._first_timestamp(path) or now
+            self._started_at[path] = started
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size < self.max_bytes and now - started < self.max_age:
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = path.with_name(f"{path.name}.{index}")
+            if source.exists():
+                source.replace(path.with_name(f"{path.name}.{index + 1}"))
+        path.replace(path.with_name(f"{path.name}.1"))
+        self._started_at[path] = now
+
+    @staticmethod
+    def _first_timestamp(path: Path) -> Optional[float]:
+        try:
+            with path.open("r", encoding="utf-8", errors="ignore") as fh:
+                record = JournalRecord.from_json(fh.readline())
+        except OSError:
+            return None
+        return record.ts if record else None
+
+
+_journal: Optional[CommandJournal] = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> CommandJournal:
+    """Process-wide journal writing to LOG_DIR."""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = CommandJournal()
+            atexit.register(_journal.close)
+        return _journal
@@ -0,0 +1,90 @@
+"""Round-trip timings of shell commands and rolling per-device percentiles."""
+
+from __future__ import annotations
+
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Iterable, List, Optional
+
+DEFAULT_WINDOW = 256
+
+TRANSPORT_SESSION = "session"
+TRANSPORT_STREAM = "stream"
+TRANSPORT_BINARY = "binary"
+
+
+@dataclass(frozen=True)
+class CommandTiming:
+    """Phases of one command round-trip, in seconds.
+
+    `connect` is the time to open the transport (connect or process spawn) and
+    is 0 when a persistent session was reused. `first_byte` is None when the
+    transport cannot observe it (the adb binary fallback).
+    """
+
+    transport: str
+    connect: float
+    first_byte: Optional[float]
+    total: float
+
+
+@dataclass(frozen=True)
+class LatencyStats:
+    """Percentiles of recent round-trips, in milliseconds."""
+
+    count: int
+    p50: float
+    p95: float
+    p99: float
+    connect_p50: float
+    first_byte_p50: Optional[float]
+
+    def describe(self) -> str:
+        return f"p50 {self.p50:.0f} ms · p95 {self.p95:.0f} ms · p99 {self.p99:.0f} ms"
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    # Nearest-rank percentile; the window is small enough to sort on read.
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def compute_stats(timings: Iterable[CommandTiming]) -> Optional[LatencyStats]:
+    timings = list(timings)
+    if not timings:
+        return None
+    totals = sorted(t.total * 1000 for t in timings)
+    connects = sorted(t.connect * 1000 for t in timings)
+    first_bytes = sorted(t.first_byte * 1000 for t in timings if t.first_byte is not None)
+    return LatencyStats(
+        count=len(timings),
+        p50=_percentile(totals, 0.50),
+        p95=_percentile(totals, 0.95),
+        p99=_percentile(totals, 0.99),
+        connect_p50=_percentile(connects, 0.50),
+        first_byte_p50=_percentile(first_bytes, 0.50) if first_bytes else None,
+    )
+
+
+class LatencyHistogram:
+    """Keeps the last `window` timings of a device; recording is O(1)."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW) -> None:
+        self._samples: Deque[CommandTiming] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, timing: CommandTiming) -> None:
+        with self._lock:
+            self._samples.append(timing)
+
+    def samples(self) -> List[CommandTiming]:
+        with self._lock:
+            return list(self._samples)
+
+    def stats(self) -> Optional[LatencyStats]:
+        return compute_stats(self.samples())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
@@ -0,0 +1,86 @@
+"""Incremental tail-follow of per-device log files with a bounded ring buffer."""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Deque, List, Optional, Tuple
+
+DEFAULT_MAX_LINES = 1000
+# On first open only the end of a large file is read; older lines are never shown anyway.
+INITIAL_WINDOW_BYTES = 256 * 1024
+
+
+class LogTail:
+    """Follows a growing text file from a saved offset.
+
+    Only bytes appended since the last poll are read. Lines get increasing
+    sequence numbers so several readers (e.g. the device window and
+    Device.get_logs) can each ask for "what is new since my cursor" without
+    stealing lines from each other. If the file shrinks or is replaced, reading
+    restarts from its beginning. An optional `formatter` turns each raw line
+    into the lines to display (e.g. a JSON record into "$ cmd" + output).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_lines: int = DEFAULT_MAX_LINES,
+        formatter: Optional[Callable[[str], List[str]]] = None,
+    ) -> None:
+        self.path = path
+        self.formatter = formatter
+        self._lines: Deque[str] = deque(maxlen=max_lines)
+        self._next_seq = 0
+        self._offset = 0
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._partial = b""
+        self._lock = threading.Lock()
+
+    def read_since(self, cursor: int) -> Tuple[List[str], int]:
+        """Lines appended after `cursor` and the cursor to pass next time."""
+        with self._lock:
+            self._poll()
+            first_seq = self._next_seq - len(self._lines)
+            start = max(cursor, first_seq) - first_seq
+            return list(islice(self._lines, start, None)), self._next_seq
+
+    def tail(self, count: int) -> List[str]:
+        with self._lock:
+            self._poll()
+            skip = max(len(self._lines) - count, 0)
+            return list(islice(self._lines, skip, None))
+
+    def _poll(self) -> None:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return
+        file_id = (stat.st_dev, stat.st_ino)
+        if file_id != self._file_id or stat.st_size < self._offset:
+            self._file_id = file_id
+            self._offset = 0
+            self._partial = b""
+        if stat.st_size == self._offset:
+            return
+
+        skip_partial_line = False
+        with self.path.open("rb") as fh:
+            if self._offset == 0 and stat.st_size > INITIAL_WINDOW_BYTES and not self._lines:
+                self._offset = stat.st_size - INITIAL_WINDOW_BYTES
+                skip_partial_line = True
+            fh.seek(self._offset)
+            data = fh.read(stat.st_size - self._offset)
+        self._offset += len(data)
+
+        chunks = (self._partial + data).split(b"\n")
+        self._partial = chunks.pop()
+        if skip_partial_line and chunks:
+            chunks.pop(0)
+        for chunk in chunks:
+            line = chunk.decode("utf-8", errors="ignore").rstrip("\r")
+            for display_line in self.formatter(line) if self.formatter else [line]:
+                self._lines.append(display_line)
+                self._next_seq += 1
@@ -0,0 +1,388 @@
+"""Live logcat ingestion into per-device ring buffers with an inverted index.
+
+Each device keeps one long-lived `logcat -v threadtime -v epoch` stream. Lines
+are parsed into compact LogRecords and appended to a bounded ring buffer;
+every record is also posted under its tag, pid, level and any watched keyword
+it contains. A fleet query ("FATAL EXCEPTION or ANR in the last 10 minutes")
+then only walks the matching postings, newest first, instead of every line.
+"""
+
+from __future__ import annotations
+
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Deque, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from ..utils import get_logger
+from .client import AdbError, ShellStream
+from .paths import ADB_BINARY
+
+if TYPE_CHECKING:
+    from .device import Device
+
+DEFAULT_MAX_RECORDS = 5000
+# Lines replayed from the device buffer when a stream starts for the first time.
+INITIAL_BACKLOG = 500
+MAX_BACKOFF = 30.0
+# Older records tolerated in a row (clock steps, merged buffers) before a time-bounded walk stops.
+OUT_OF_ORDER_SLACK = 32
+LEVELS = "VDIWEFA"
+# Lowercase phrases indexed as keywords; anything else is matched by scanning.
+WATCHED_KEYWORDS = (
+    "anr",
+    "fatal exception",
+    "crash",
+    "exception",
+    "outofmemoryerror",
+    "watchdog",
+    "died",
+    "killed",
+)
+
+# `-v threadtime -v epoch` prints seconds since the epoch; plain threadtime prints MM-DD hh:mm:ss.mmm.
+_LINE_RE = re.compile(
+    r"^\s*(?:(\d+\.\d+)|(\d\d-\d\d \d\d:\d\d:\d\d\.\d+))\s+(\d+)\s+(\d+)\s+([VDIWEFA])\s+(.*?)\s*: ?(.*)$"
+)
+
+IndexKey = Tuple[str, Union[str, int]]
+
+
+@dataclass
+class LogRecord:
+    """One parsed logcat line."""
+
+    __slots__ = ("seq", "device_id", "timestamp", "pid", "tid", "level", "tag", "message")
+
+    seq: int
+    device_id: str
+    timestamp: float
+    pid: int
+    tid: int
+    level: str
+    tag: str
+    message: str
+
+    def format(self) -> str:
+        stamp = time.strftime("%m-%d %H:%M:%S", time.localtime(self.timestamp))
+        millis = int((self.timestamp % 1) * 1000)
+        return f"{stamp}.{millis:03d} {self.pid:5d} {self.tid:5d} {self.level} {self.tag}: {self.message}"
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__ if name != "seq"}
+
+
+def _parse_timestamp(epoch: Optional[str], date: Optional[str]) -> float:
+    if epoch:
+        return float(epoch)
+    # No year in plain threadtime: assume the current one.
+    stamp, _, fraction = date.partition(".")
+    parsed = time.strptime(f"{time.localtime().tm_year}-{stamp}", "%Y-%m-%d %H:%M:%S")
+    return time.mktime(parsed) + float(f"0.{fraction}")
+
+
+def parse_logcat_line(line: str) -> Optional[tuple]:
+    """(timestamp, pid, tid, level, tag, message) of a threadtime line, or None."""
+    match = _LINE_RE.match(line)
+    if not match:
+        return None
+    epoch, date, pid, tid, level, tag, message = match.groups()
+    return _parse_timestamp(epoch, date), int(pid), int(tid), level, sys.intern(tag), message
+
+
+def _keywords_in(message: str, pattern: re.Pattern) -> Set[str]:
+    return {match.group(0) for match in pattern.finditer(message.lower())}
+
+
+def _keyword_pattern(keywords: Iterable[str]) -> re.Pattern:
+    words = sorted({keyword.lower() for keyword in keywords}, key=len, reverse=True)
+    return re.compile(r"\b(?:" + "|".join(re.escape(word) for word in words) + r")\b")
+
+
+class DeviceLogBuffer:
+    """Ring buffer of one device's records plus postings per index key.
+
+    Postings hold sequence numbers in arrival order, so a record that falls
+    off the ring is always at the left end of each of its postings and is
+    dropped from the index in O(keys) time.
+    """
+
+    def __init__(
+        self,
+        device_id: str,
+        max_records: int = DEFAULT_MAX_RECORDS,
+        keywords: Iterable[str] = WATCHED_KEYWORDS,
+    ) -> None:
+        self.device_id = device_id
+        self.max_records = max_records
+        self._keyword_pattern = _keyword_pattern(keywords)
+        self._ring: Deque[LogRecord] = deque()
+        self._by_seq: Dict[int, LogRecord] = {}
+        self._postings: Dict[IndexKey, Deque[int]] = {}
+        self._next_seq = 0
+        self._lock = threading.Lock()
+        self.last_timestamp = 0.0
+        self.received = 0
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    def _keys(self, record: LogRecord) -> List[IndexKey]:
+        keys: List[IndexKey] = [("tag", record.tag), ("pid", record.pid), ("level", record.level)]
+        keys.extend(("keyword", keyword) for keyword in _keywords_in(record.message, self._keyword_pattern))
+        return keys
+
+    def add(self, entries: Iterable[tuple]) -> int:
+        """Append parsed lines (see parse_logcat_line); returns how many were stored."""
+        added = 0
+        with self._lock:
+            for timestamp, pid, tid, level, tag, message in entries:
+                record = LogRecord(self._next_seq, self.device_id, timestamp, pid, tid, level, tag, message)
+                self._next_seq += 1
+                self._ring.append(record)
+                self._by_seq[record.seq] = record
+                for key in self._keys(record):
+                    self._postings.setdefault(key, deque()).append(record.seq)
+                if len(self._ring) > self.max_records:
+                    self._evict(self._ring.popleft())
+                self.last_timestamp = max(self.last_timestamp, timestamp)
+                added += 1
+            self.received += added
+        return added
+
+    def _evict(self, record: LogRecord) -> None:
+        del self._by_seq[record.seq]
+        for key in self._keys(record):
+            postings = self._postings[key]
+            postings.popleft()
+            if not postings:
+                del self._postings[key]
+
+    def _recent(self, seqs: Iterable[int], since: Optional[float]) -> Iterable[int]:
+        # Newest first; logcat is nearly chronological, so stop after a run of older records.
+        older = 0
+        for seq in seqs:
+            if since is not None and self._by_seq[seq].timestamp < since:
+                older += 1
+                if older > OUT_OF_ORDER_SLACK:
+                    return
+                continue
+            older = 0
+            yield seq
+
+    def search(
+        self,
+        filters: List[List[IndexKey]],
+        since: Optional[float] = None,
+        text: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[LogRecord]:
+        """Records matching every group in `filters` (any key within a group), oldest first."""
+        with self._lock:
+            if filters:
+                matched: Optional[Set[int]] = None
+                for group in filters:
+                    seqs: Set[int] = set()
+                    for key in group:
+                        seqs.update(self._recent(reversed(self._postings.get(key, ())), since))
+                    matched = seqs if matched is None else matched & seqs
+                    if not matched:
+                        return []
+                records = [self._by_seq[seq] for seq in sorted(matched, reverse=True)]
+            else:
+                records = [self._by_seq[seq] for seq in self._recent((r.seq for r in reversed(self._ring)), since)]
+        if text:
+            needle = text.lower()
+            records = [record for record in records if needle in record.message.lower()]
+        if limit is not None:
+            records = records[:limit]
+        records.reverse()
+        return records
+
+    def index_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "records": len(self._ring),
+                "keys": len(self._postings),
+                "postings": sum(len(postings) for postings in self._postings.values()),
+            }
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    if isinstance(value, (str, int)):
+        return [value]
+    return list(value)
+
+
+class LogcatHub:
+    """Per-device buffers and the fleet-wide query over them.
+
+    Buffers outlive their streams, so the lines leading up to a crash or an
+    unplug stay searchable after the device is gone.
+    """
+
+    def __init__(self, max_records: int = DEFAULT_MAX_RECORDS, keywords: Iterable[str] = WATCHED_KEYWORDS) -> None:
+        self.max_records = max_records
+        self.keywords = tuple(keyword.lower() for keyword in keywords)
+        self._buffers: Dict[str, DeviceLogBuffer] = {}
+        self._lock = threading.Lock()
+
+    def buffer_for(self, device_id: str) -> DeviceLogBuffer:
+        with self._lock:
+            buffer = self._buffers.get(device_id)
+            if buffer is None:
+                buffer = self._buffers[device_id] = DeviceLogBuffer(device_id, self.max_records, self.keywords)
+            return buffer
+
+    def drop(self, device_id: str) -> None:
+        with self._lock:
+            self._buffers.pop(device_id, None)
+
+    def search(
+        self,
+        tag=None,
+        pid=None,
+        level=None,
+        keyword=None,
+        text: Optional[str] = None,
+        since: Optional[float] = None,
+        devices: Optional[Iterable[str]] = None,
+        limit: int = 500,
+    ) -> List[LogRecord]:
+        """Newest `limit` matching records across devices, oldest first.
+
+        `tag`, `pid` and `keyword` take one value or several (any of them
+        matches); `level` is a string of level letters such as "EF". Different
+        filters must all match. `keyword` must be a watched keyword; free text
+        goes in `text` and is matched by scanning the indexed candidates.
+        `since` is a Unix time compared with the device clock.
+        """
+        keywords = [str(value).lower() for value in _as_list(keyword)]
+        unknown = [value for value in keywords if value not in self.keywords]
+        if unknown:
+            raise ValueError(f"Not an indexed keyword: {', '.join(unknown)} (use text= to scan)")
+        filters = [
+            group
+            for group in (
+                [("tag", value) for value in _as_list(tag)],
+                [("pid", int(value)) for value in _as_list(pid)],
+                [("level", value) for value in (level or "").upper() if value in LEVELS],
+                [("keyword", value) for value in keywords],
+            )
+            if group
+        ]
+        with self._lock:
+            buffers = [
+                buffer for device_id, buffer in self._buffers.items() if devices is None or device_id in devices
+            ]
+        records: List[LogRecord] = []
+        for buffer in buffers:
+            records.extend(buffer.search(filters, since=since, text=text, limit=limit or None))
+        records.sort(key=lambda record: record.timestamp)
+        return records[-limit:] if limit else records
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            buffers = dict(self._buffers)
+        return {device_id: buffer.index_stats() for device_id, buffer in buffers.items()}
+
+
+class LogcatStream:
+    """Background thread following one device's logcat into its buffer.
+
+    If the stream drops (unplug, adb restart) it reconnects with exponential
+    backoff and resumes from the newest timestamp already stored.
+    """
+
+    def __init__(self, device: Device, buffer: DeviceLogBuffer) -> None:
+        self.device = device
+        self.buffer = buffer
+        self.logger = get_logger(f"adb.logcat.{device.id}")
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stream: Optional[ShellStream] = None
+        self._process: Optional[subprocess.Popen] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"logcat-{self.device.id}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        # Closing the socket (or killing adb) unblocks the reader thread.
+        if self._stream is not None:
+            self._stream.close()
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+
+    def _command(self) -> str:
+        resume_from = self.buffer.last_timestamp
+        since = f"{resume_from:.3f}" if resume_from else str(INITIAL_BACKLOG)
+        return f"logcat -v threadtime -v epoch -T {since}"
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                if self.device.client.available:
+                    self._follow_via_server()
+                else:
+                    self._follow_via_binary()
+            except (AdbError, OSError) as exc:
+                self.logger.debug("logcat stream ended: %s", exc)
+            if time.monotonic() - started > MAX_BACKOFF:
+                backoff = 1.0
+            if self._stop.wait(backoff):
+                break
+            backoff = min(backoff * 2, MAX_BACKOFF)
+
+    def _follow_via_server(self) -> None:
+        self._stream = self.device.client.open_shell(self.device.id, self._command())
+        try:
+            if self._stop.is_set():
+                return
+            self._stream.settimeout(None)
+            self._consume(iter(self._stream.read, b""))
+        finally:
+            self._stream.close()
+            self._stream = None
+
+    def _follow_via_binary(self) -> None:
+        args = [ADB_BINARY, "-s", self.device.id, "shell", *self._command().split()]
+        self._process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            assert self._process.stdout is not None
+            self._consume(iter(lambda: self._process.stdout.read1(65536), b""))
+        finally:
+            if self._process.poll() is None:
+                self._process.kill()
+            self._process = None
+
+    def _consume(self, chunks: Iterable[bytes]) -> None:
+        # `-T <time>` repeats lines at exactly that time; skip what is already stored.
+        skip_until = self.buffer.last_timestamp
+        partial = b""
+        for chunk in chunks:
+            lines = (partial + chunk).split(b"\n")
+            partial = lines.pop()
+            entries = []
+            for raw in lines:
+                parsed = parse_logcat_line(raw.decode("utf-8", errors="replace").rstrip("\r"))
+                if parsed is not None and parsed[0] > skip_until:
+                    entries.append(parsed)
+            if entries:
+                self.buffer.add(entries)
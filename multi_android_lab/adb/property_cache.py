@@ -0,0 +1,57 @@
+"""Per-device property cache with static, TTL and on-demand policies."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# Fetched once per connection (model, serial, ABI, resolution...).
+POLICY_STATIC = "static"
+# Slow-changing values (battery) that expire after a TTL.
+POLICY_TTL = "ttl"
+# Only fetched when explicitly requested; then kept until the connection changes.
+POLICY_ON_DEMAND = "on_demand"
+
+DEFAULT_TTL = 30.0
+
+
+class PropertyCache:
+    """Thread-safe key/value cache whose entries expire according to their policy."""
+
+    def __init__(self, ttl: float = DEFAULT_TTL) -> None:
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str) -> Tuple[bool, Any]:
+        """Return (hit, value) and count the access."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                self.hits += 1
+                return True, entry[0]
+            self.misses += 1
+            return False, None
+
+    def peek(self, key: str) -> Any:
+        """Last stored value, even if expired; does not touch the counters."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry is not None else None
+
+    def store(self, key: str, value: Any, policy: str, ttl: Optional[float] = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl) if policy == POLICY_TTL else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+
+    def invalidate(self) -> None:
+        """Forget everything; call when the device (re)connects."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
@@ -0,0 +1,246 @@
+"""Raw screenshot capture with `exec:screencap` into a reusable buffer.
+
+`screencap` without `-p` writes a small header followed by the framebuffer
+pixels (RGBA_8888 on every device we target). The bytes are received with
+`recv_into` straight into a per-device bytearray that is reused across
+captures, so a frame costs no PNG encode/decode, no temp file and no copy.
+NumPy and QImage views are created on demand over that same buffer.
+"""
+
+from __future__ import annotations
+
+import socket
+import struct
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any
+
+from .cancel import REASON_DEADLINE, CancelScope, current_scope
+from .client import AdbCancelledError, AdbConnectionError, AdbError, AdbTimeoutError
+from .health import OUTCOME_ERROR, OUTCOME_OK, OUTCOME_TIMEOUT
+from .paths import ADB_BINARY
+
+if TYPE_CHECKING:
+    from .device import Device
+
+_HEADER = struct.Struct("<III")
+# Android 9+ appends a u32 colour space to the header.
+_COLORSPACE_SIZE = 4
+PIXEL_FORMAT_RGBA_8888 = 1
+PIXEL_FORMAT_RGBX_8888 = 2
+_BYTES_PER_PIXEL = {PIXEL_FORMAT_RGBA_8888: 4, PIXEL_FORMAT_RGBX_8888: 4}
+
+
+class ScreenCaptureError(AdbError):
+    """screencap returned something that is not a raw frame."""
+
+
+@dataclass
+class ScreenFrame:
+    """One captured frame: a view over the device's reusable capture buffer.
+
+    The pixels stay valid until the next capture on the same device; call
+    copy() to keep a frame around. A downscaled frame shares the same buffer
+    and only records the step between the pixels and rows it keeps.
+    """
+
+    width: int
+    height: int
+    pixel_format: int
+    buffer: bytearray
+    offset: int
+    captured_at: float
+    duration: float = 0.0
+    step: int = 1
+
+    @property
+    def size(self) -> tuple[int, int]:
+        """(width, height) after downscaling."""
+        return len(range(0, self.width, self.step)), len(range(0, self.height, self.step))
+
+    @property
+    def pixels(self) -> memoryview:
+        """RGBA bytes of the full-resolution frame (no copy)."""
+        return memoryview(self.buffer)[self.offset : self.offset + self.width * self.height * 4]
+
+    def array(self) -> Any:
+        """(height, width, 4) uint8 NumPy view; strided rather than copied when downscaled."""
+        try:
+            import numpy as np
+        except ImportError as exc:  # optional dependency
+            raise RuntimeError("NumPy is required for ScreenFrame.array()") from exc
+        full = np.frombuffer(self.buffer, dtype=np.uint8, count=self.width * self.height * 4, offset=self.offset)
+        return full.reshape(self.height, self.width, 4)[:: self.step, :: self.step]
+
+    def downscale(self, factor: int) -> ScreenFrame:
+        """Keep every `factor`-th pixel and row; nothing is resampled or copied."""
+        return replace(self, step=self.step * max(1, int(factor)))
+
+    def to_bytes(self) -> bytes:
+        """Tightly packed RGBA bytes of this (possibly downscaled) frame."""
+        if self.step == 1:
+            return self.pixels.tobytes()
+        words = self.pixels.cast("I")
+        return b"".join(
+            words[row * self.width : (row + 1) * self.width : self.step].tobytes()
+            for row in range(0, self.height, self.step)
+        )
+
+    def qimage(self) -> Any:
+        """QImage of the frame; wraps the buffer at full scale, packs it when downscaled."""
+        from PySide6.QtGui import QImage
+
+        qt_format = QImage.Format_RGBA8888 if self.pixel_format == PIXEL_FORMAT_RGBA_8888 else QImage.Format_RGBX8888
+        width, height = self.size
+        if self.step == 1:
+            return QImage(self.pixels, width, height, width * 4, qt_format)
+        return QImage(self.to_bytes(), width, height, width * 4, qt_format).copy()
+
+    def copy(self) -> ScreenFrame:
+        return replace(self, buffer=bytearray(self.pixels), offset=0)
+
+
+class ScreenCapturer:
+    """Captures frames of one device into a buffer reused between calls."""
+
+    def __init__(self, device: Device) -> None:
+        self.device = device
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.total_time = 0.0
+
+    @property
+    def fps(self) -> float:
+        return self.frames / self.total_time if self.total_time else 0.0
+
+    def capture(self, downscale: int = 1, timeout: float = 10.0) -> ScreenFrame:
+        """Capture one frame; `downscale` keeps every n-th pixel and row."""
+        with self._lock:
+            started = time.perf_counter()
+            try:
+                # The scope kills a stalled socket or adb process, so the lock is never held past the deadline.
+                with CancelScope(
+                    timeout, parents=(self.device.connection_scope, current_scope()), name="screencap"
+                ) as scope:
+                    frame = self._capture(scope)
+            except AdbCancelledError:
+                raise
+            except AdbTimeoutError:
+                self.device.health.record(OUTCOME_TIMEOUT)
+                raise
+            except AdbError:
+                self.device.health.record(OUTCOME_ERROR)
+                raise
+            self.device.health.record(OUTCOME_OK)
+            frame.duration = time.perf_counter() - started
+            self.frames += 1
+            self.total_time += frame.duration
+        return frame.downscale(downscale) if downscale > 1 else frame
+
+    def _capture(self, scope: CancelScope) -> ScreenFrame:
+        if self.device.client.available:
+            try:
+                return self._capture_via_server(scope)
+            except AdbConnectionError:
+                # A socket closed by cancellation is not a reason to try the binary.
+                _check_scope(scope)
+        return self._capture_via_binary(scope)
+
+    def _ensure_capacity(self, size: int) -> memoryview:
+        if len(self._buffer) < size:
+            self._buffer = bytearray(size)
+        return memoryview(self._buffer)
+
+    def _parse_header(self, header: bytes) -> tuple[int, int, int, int]:
+        width, height, pixel_format = _HEADER.unpack(header)
+        bpp = _BYTES_PER_PIXEL.get(pixel_format)
+        if bpp is None or not width or not height:
+            raise ScreenCaptureError(f"Unsupported screencap frame ({width}x{height}, format {pixel_format})")
+        return width, height, pixel_format, width * height * bpp
+
+    def _capture_via_server(self, scope: CancelScope) -> ScreenFrame:
+        sock = self.device.client.open_exec(self.device.id, "screencap", scope.remaining())
+        try:
+            header = self._recv_into_exact(sock, bytearray(_HEADER.size))
+            width, height, pixel_format, size = self._parse_header(header)
+            view = self._ensure_capacity(size + _COLORSPACE_SIZE)
+            received = 0
+            while received < len(view):
+                count = sock.recv_into(view[received:])
+                if not count:
+                    break
+                received += count
+        except socket.timeout as exc:
+            raise AdbTimeoutError("Timed out waiting for screencap") from exc
+        except OSError as exc:
+            _check_scope(scope)
+            raise AdbConnectionError(str(exc)) from exc
+        finally:
+            sock.close()
+        # A cancelled socket reads as a clean EOF, so the scope decides.
+        _check_scope(scope)
+        return self._frame(width, height, pixel_format, size, received)
+
+    def _capture_via_binary(self, scope: CancelScope) -> ScreenFrame:
+        args = [ADB_BINARY, "-s", self.device.id, "exec-out", "screencap"]
+        try:
+            proc = subprocess.Popen(args, stdout=subprocess.PIPE)
+        except OSError as exc:
+            raise AdbConnectionError(f"Cannot run {ADB_BINARY}: {exc}") from exc
+        # Pipe reads have no timeout; the scope kills the process at the deadline instead.
+        scope.attach(proc)
+        try:
+            assert proc.stdout is not None
+            header = proc.stdout.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                _check_scope(scope)
+                raise ScreenCaptureError("screencap produced no frame")
+            width, height, pixel_format, size = self._parse_header(header)
+            view = self._ensure_capacity(size + _COLORSPACE_SIZE)
+            received = 0
+            while received < len(view):
+                count = proc.stdout.readinto(view[received:])
+                if not count:
+                    break
+                received += count
+            proc.wait(timeout=scope.remaining())
+        except subprocess.TimeoutExpired as exc:
+            raise AdbTimeoutError("Timed out waiting for screencap") from exc
+        except OSError as exc:
+            _check_scope(scope)
+            raise AdbConnectionError(str(exc)) from exc
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+            proc.stdout.close()
+        _check_scope(scope)
+        return self._frame(width, height, pixel_format, size, received)
+
+    def _frame(self, width: int, height: int, pixel_format: int, size: int, received: int) -> ScreenFrame:
+        extra = received - size
+        if extra not in (0, _COLORSPACE_SIZE):
+            raise ScreenCaptureError(f"Truncated screencap frame: {received} of {size} bytes")
+        return ScreenFrame(width, height, pixel_format, self._buffer, extra, time.time())
+
+    @staticmethod
+    def _recv_into_exact(sock: socket.socket, buffer: bytearray) -> bytearray:
+        view = memoryview(buffer)
+        received = 0
+        while received < len(buffer):
+            count = sock.recv_into(view[received:])
+            if not count:
+                raise ScreenCaptureError("screencap produced no frame")
+            received += count
+        return buffer
+
+
+def _check_scope(scope: CancelScope) -> None:
+    """Raise AdbTimeoutError or AdbCancelledError if the capture's scope was cancelled."""
+    if scope.cancelled or scope.expired:
+        if scope.expired or scope.reason == REASON_DEADLINE:
+            raise AdbTimeoutError("Timed out waiting for screencap")
+        raise AdbCancelledError(scope.reason or "cancelled")
@@ -0,0 +1,121 @@
+"""Long-lived shell on a device that runs commands back to back."""
+
+from __future__ import annotations
+
+import logging
+import re
+import secrets
+import threading
+import time
+from typing import Optional
+
+from .cancel import current_scope
+from .client import (
+    AdbClient,
+    AdbConnectionError,
+    AdbError,
+    AdbStreamError,
+    AdbTimeoutError,
+    ShellResult,
+    ShellStream,
+)
+from .latency import TRANSPORT_SESSION, CommandTiming
+
+
+class ShellSessionUnsupported(AdbError):
+    """The device has no shell protocol v2, so a session cannot be framed safely."""
+
+
+class ShellSession:
+    """One interactive `sh` per device; commands are split out with sentinel markers.
+
+    Each command runs in a subshell with stdin from /dev/null, so `exit`, `cd`
+    or a command reading stdin cannot break the session. A broken or timed-out
+    session is discarded and reopened on the next call.
+    """
+
+    def __init__(self, client: AdbClient, serial: str, logger: logging.Logger) -> None:
+        self.client = client
+        self.serial = serial
+        self.logger = logger
+        self._stream: Optional[ShellStream] = None
+        self._buffer = bytearray()
+        self._token = secrets.token_hex(4)
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._stream is not None
+
+    def run(self, command: str, timeout: Optional[float] = None) -> ShellResult:
+        # Waiting for the previous command counts against this one's deadline.
+        if not self._lock.acquire(timeout=-1 if timeout is None else timeout):
+            raise AdbTimeoutError("Persistent shell busy with a previous command")
+        try:
+            return self._run_locked(command, timeout)
+        finally:
+            self._lock.release()
+
+    def _run_locked(self, command: str, timeout: Optional[float]) -> ShellResult:
+        started = time.perf_counter()
+        stream = self._ensure_open()
+        connected = time.perf_counter()
+        scope = current_scope()
+        if scope is not None:
+            # The stream outlives the command, so attach it to each command's scope.
+            scope.attach(stream.sock)
+        self._counter += 1
+        marker = f"__MAL_{self._token}_{self._counter}__"
+        script = f"(\n{command}\n) </dev/null 2>&1; printf '\\n{marker} %d\\n' $?\n"
+        try:
+            stream.settimeout(timeout)
+            stream.write(script.encode("utf-8"))
+            output, exit_code, first_byte_at = self._read_until(stream, marker)
+        except AdbConnectionError as exc:
+            self._close_locked()
+            # Once the script is written the command may have run; it must not be sent again.
+            raise AdbStreamError(str(exc)) from exc
+        except AdbError:
+            self._close_locked()
+            raise
+        finished = time.perf_counter()
+        timing = CommandTiming(TRANSPORT_SESSION, connected - started, first_byte_at - started, finished - started)
+        return ShellResult(output.decode("utf-8", errors="replace"), exit_code, timing)
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_locked()
+
+    def _ensure_open(self) -> ShellStream:
+        if self._stream is None:
+            if not self.client.supports_shell_v2(self.serial):
+                raise ShellSessionUnsupported(f"{self.serial} does not support shell_v2")
+            self._stream = self.client.open_shell(self.serial, "sh")
+            self._buffer.clear()
+            self.logger.debug("Persistent shell opened")
+        return self._stream
+
+    def _read_until(self, stream: ShellStream, marker: str) -> tuple[bytes, int, float]:
+        pattern = re.compile(rb"\n" + re.escape(marker.encode("ascii")) + rb" (\d+)\n")
+        first_byte_at: Optional[float] = None
+        while True:
+            match = pattern.search(self._buffer)
+            if match:
+                output = bytes(self._buffer[: match.start()])
+                exit_code = int(match.group(1))
+                del self._buffer[: match.end()]
+                return output, exit_code, first_byte_at or time.perf_counter()
+            chunk = stream.read()
+            if not chunk:
+                raise AdbConnectionError("Persistent shell exited unexpectedly")
+            if first_byte_at is None:
+                first_byte_at = time.perf_counter()
+            self._buffer += chunk
+
+    def _close_locked(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+            self._buffer.clear()
+            self.logger.debug("Persistent shell closed")
@@ -0,0 +1,382 @@
+"""File transfer over the adb `sync:` service, with size/mtime deltas.
+
+After `sync:` the socket carries 8-byte requests (4-byte id, little-endian
+u32 length) followed by their payload: STAT/STA2 and LIST/LIS2 to inspect
+the device, SEND and RECV to move files in DATA chunks of at most 64 KiB,
+DONE to finish a transfer and QUIT to close. Files are streamed chunk by
+chunk from disk, so memory stays bounded whatever their size. The v2 stat
+and list requests report 64-bit sizes and are used when the device
+advertises them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import shlex
+import socket
+import stat
+import struct
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from .client import AdbCommandError, AdbConnectionError, AdbError, AdbTimeoutError, _recv_exact
+from .paths import ADB_BINARY
+
+if TYPE_CHECKING:
+    from .device import Device
+
+SYNC_DATA_MAX = 64 * 1024
+MAX_PATH_LENGTH = 1024
+DEFAULT_FILE_MODE = 0o644
+# Transfers get this much time per byte at worst, plus a fixed margin.
+MIN_THROUGHPUT = 1024 * 1024
+# Remote checksums are requested for this many files per shell call.
+HASH_BATCH = 50
+
+FEATURE_STAT_V2 = "stat_v2"
+FEATURE_LS_V2 = "ls_v2"
+
+_REQUEST = struct.Struct("<4sI")
+_STAT_V1 = struct.Struct("<III")
+_DENT_V1 = struct.Struct("<IIII")
+# error, dev, ino, mode, nlink, uid, gid, size, atime, mtime, ctime
+_STAT_V2 = struct.Struct("<IQQIIIIQqqq")
+# Last line of `adb push --sync`: "<dir>/.: 3 files pushed, 2 skipped. 1.2 MB/s (1234 bytes in 0.001s)".
+_PUSH_SUMMARY = re.compile(r"(\d+) files? pushed(?:, (\d+) skipped)?\..*\((\d+) bytes in")
+
+
+@dataclass
+class RemoteStat:
+    """Mode, size and mtime of a path on the device; mode 0 means it does not exist."""
+
+    mode: int
+    size: int
+    mtime: int
+
+    @property
+    def exists(self) -> bool:
+        return self.mode != 0
+
+    @property
+    def is_dir(self) -> bool:
+        return stat.S_ISDIR(self.mode)
+
+
+@dataclass
+class TransferStats:
+    """What one push, pull or directory sync moved and how fast."""
+
+    files: int = 0
+    transferred: int = 0
+    skipped: int = 0
+    bytes: int = 0
+    duration: float = 0.0
+    # False when the adb binary synced and its summary was unreadable: only `files` and `duration` are known.
+    exact: bool = True
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second over the whole operation, including skipped files."""
+        return self.bytes / self.duration if self.duration else 0.0
+
+    def summary(self) -> str:
+        if not self.exact:
+            return f"{self.files} archivos sincronizados con adb push --sync · detalle desconocido"
+        mb = self.bytes / (1024 * 1024)
+        return (
+            f"{self.transferred}/{self.files} archivos enviados, {self.skipped} sin cambios · "
+            f"{mb:.1f} MB a {self.throughput / (1024 * 1024):.1f} MB/s"
+        )
+
+
+class SyncConnection:
+    """One `sync:` session with a device; use as a context manager."""
+
+    def __init__(self, device: Device, timeout: Optional[float] = None) -> None:
+        self.device = device
+        features = device.client.features(device.id)
+        self.stat_v2 = FEATURE_STAT_V2 in features
+        self.ls_v2 = FEATURE_LS_V2 in features
+        self.sock = device.client.open_transport(device.id, timeout)
+        try:
+            device.client.send_request(self.sock, "sync:")
+        except AdbError:
+            self.sock.close()
+            raise
+        self.sock.settimeout(timeout)
+
+    def __enter__(self) -> "SyncConnection":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        try:
+            self.sock.sendall(_REQUEST.pack(b"QUIT", 0))
+        except OSError:
+            pass
+        self.sock.close()
+
+    # Framing -------------------------------------------------------------
+    def _write(self, data: bytes) -> None:
+        try:
+            self.sock.sendall(data)
+        except socket.timeout as exc:
+            raise AdbTimeoutError("Timed out sending to the device") from exc
+        except OSError as exc:
+            raise AdbConnectionError(str(exc)) from exc
+
+    def _send(self, request: bytes, payload: bytes = b"") -> None:
+        self._write(_REQUEST.pack(request, len(payload)) + payload)
+
+    def _send_path(self, request: bytes, path: str) -> None:
+        encoded = path.encode("utf-8")
+        if len(encoded) > MAX_PATH_LENGTH:
+            raise AdbCommandError(f"Remote path too long: {path}")
+        self._send(request, encoded)
+
+    def _reply(self) -> Tuple[bytes, int]:
+        return _REQUEST.unpack(_recv_exact(self.sock, _REQUEST.size))
+
+    def _fail(self, length: int) -> AdbCommandError:
+        return AdbCommandError(_recv_exact(self.sock, length).decode("utf-8", errors="replace"))
+
+    # Requests ------------------------------------------------------------
+    def stat(self, path: str) -> RemoteStat:
+        if self.stat_v2:
+            self._send_path(b"STA2", path)
+            reply = _recv_exact(self.sock, 4 + _STAT_V2.size)
+            error, _dev, _ino, mode, _nlink, _uid, _gid, size, _atime, mtime, _ctime = _STAT_V2.unpack(reply[4:])
+            return RemoteStat(0, 0, 0) if error else RemoteStat(mode, size, mtime)
+        self._send_path(b"STAT", path)
+        reply = _recv_exact(self.sock, 4 + _STAT_V1.size)
+        return RemoteStat(*_STAT_V1.unpack(reply[4:]))
+
+    def list(self, path: str) -> Dict[str, RemoteStat]:
+        """Entries of a remote directory by name (empty if it does not exist)."""
+        entries: Dict[str, RemoteStat] = {}
+        self._send_path(b"LIS2" if self.ls_v2 else b"LIST", path)
+        # The list ends with a zeroed entry of the same layout, tagged DONE.
+        terminator = _STAT_V2.size + 4 if self.ls_v2 else _DENT_V1.size
+        while True:
+            request = _recv_exact(self.sock, 4)
+            if request == b"DONE":
+                _recv_exact(self.sock, terminator)
+                return entries
+            if request == b"DNT2":
+                fields = _STAT_V2.unpack(_recv_exact(self.sock, _STAT_V2.size))
+                (name_length,) = struct.unpack("<I", _recv_exact(self.sock, 4))
+                mode, size, mtime = fields[3], fields[7], fields[9]
+            elif request == b"DENT":
+                mode, size, mtime, name_length = _DENT_V1.unpack(_recv_exact(self.sock, _DENT_V1.size))
+            else:
+                raise AdbConnectionError(f"Unexpected sync reply {request!r} to LIST")
+            name = _recv_exact(self.sock, name_length).decode("utf-8", errors="replace")
+            if name not in (".", ".."):
+                entries[name] = RemoteStat(mode, size, mtime)
+
+    def send(self, local: Path, remote: str, mode: int = DEFAULT_FILE_MODE, mtime: Optional[int] = None) -> int:
+        """Stream `local` to `remote` (parent directories are created); returns bytes sent."""
+        self._send_path(b"SEND", f"{remote},{stat.S_IFREG | (mode & 0o7777)}")
+        sent = 0
+        with local.open("rb") as fh:
+            while True:
+                chunk = fh.read(SYNC_DATA_MAX)
+                if not chunk:
+                    break
+                self._send(b"DATA", chunk)
+                sent += len(chunk)
+        if mtime is None:
+            mtime = int(local.stat().st_mtime)
+        # DONE carries the mtime to stamp where other requests carry a length.
+        self._write(_REQUEST.pack(b"DONE", mtime))
+        request, length = self._reply()
+        if request == b"FAIL":
+            raise self._fail(length)
+        if request != b"OKAY":
+            raise AdbConnectionError(f"Unexpected sync reply {request!r} to SEND")
+        return sent
+
+    def recv(self, remote: str, local: Path) -> int:
+        """Stream `remote` into `local` through a temporary file; returns bytes received."""
+        self._send_path(b"RECV", remote)
+        local.parent.mkdir(parents=True, exist_ok=True)
+        partial = local.with_name(local.name + ".part")
+        received = 0
+        try:
+            with partial.open("wb") as fh:
+                while True:
+                    request, length = self._reply()
+                    if request == b"DONE":
+                        break
+                    if request == b"FAIL":
+                        raise self._fail(length)
+                    if request != b"DATA" or length > SYNC_DATA_MAX:
+                        raise AdbConnectionError(f"Unexpected sync reply {request!r} to RECV")
+                    fh.write(_recv_exact(self.sock, length))
+                    received += length
+            os.replace(partial, local)
+        finally:
+            if partial.exists():
+                partial.unlink()
+        return received
+
+
+# ----------------------------------------------------------------------
+def _transfer_timeout(size: int) -> float:
+    return 60.0 + size / MIN_THROUGHPUT
+
+
+def _local_tree(local_dir: Path) -> Iterator[Tuple[Path, str]]:
+    """(file, path relative to `local_dir` with forward slashes), in a stable order."""
+    for root, dirs, files in os.walk(local_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = Path(root) / name
+            yield path, path.relative_to(local_dir).as_posix()
+
+
+def _md5_local(path: Path) -> str:
+    digest = hashlib.md5()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _md5_remote(device: Device, paths: List[str]) -> Dict[str, str]:
+    hashes: Dict[str, str] = {}
+    for start in range(0, len(paths), HASH_BATCH):
+        batch = paths[start : start + HASH_BATCH]
+        command = "md5sum " + " ".join(shlex.quote(path) for path in batch) + " 2>/dev/null"
+        output = device.run_command(command, timeout=_transfer_timeout(0)).output
+        for line in output.splitlines():
+            digest, _, path = line.partition("  ")
+            if path:
+                hashes[path.strip()] = digest.strip()
+    return hashes
+
+
+def _same_size(local: os.stat_result, remote: Optional[RemoteStat], size_bits: int) -> bool:
+    if remote is None or not remote.exists or remote.is_dir:
+        return False
+    # v1 LIST reports 32-bit sizes.
+    return remote.size == local.st_size & ((1 << size_bits) - 1)
+
+
+def _unchanged(local: os.stat_result, remote: Optional[RemoteStat], size_bits: int) -> bool:
+    return _same_size(local, remote, size_bits) and remote.mtime == int(local.st_mtime)
+
+
+def push(device: Device, local: Path, remote: str) -> TransferStats:
+    """Copy one file to the device."""
+    started = time.perf_counter()
+    size = local.stat().st_size
+    if not device.client.available:
+        _binary_transfer(device, "push", str(local), remote, size)
+        sent = size
+    else:
+        with SyncConnection(device, _transfer_timeout(size)) as connection:
+            if connection.stat(remote).is_dir:
+                remote = f"{remote.rstrip('/')}/{local.name}"
+            sent = connection.send(local, remote, local.stat().st_mode)
+    return TransferStats(1, 1, 0, sent, time.perf_counter() - started)
+
+
+def pull(device: Device, remote: str, local: Path) -> TransferStats:
+    """Copy one file from the device."""
+    started = time.perf_counter()
+    if local.is_dir():
+        local = local / remote.rstrip("/").rsplit("/", 1)[-1]
+    if not device.client.available:
+        _binary_transfer(device, "pull", remote, str(local), 0)
+        received = local.stat().st_size
+    else:
+        with SyncConnection(device, _transfer_timeout(0)) as connection:
+            received = connection.recv(remote, local)
+    return TransferStats(1, 1, 0, received, time.perf_counter() - started)
+
+
+def sync_dir(device: Device, local_dir: Path, remote_dir: str, checksum: bool = False) -> TransferStats:
+    """Make `remote_dir` hold every file of `local_dir`, sending only what changed.
+
+    A file is skipped when the device already has it with the same size and
+    mtime (SEND stamps the local mtime, so files pushed earlier match). With
+    `checksum`, same-size files are compared by MD5 instead of mtime.
+    Remote files missing locally are left alone.
+    """
+    started = time.perf_counter()
+    remote_dir = remote_dir.rstrip("/") or "/"
+    files = list(_local_tree(local_dir))
+    stats = TransferStats(files=len(files))
+    if not device.client.available:
+        # `adb push --sync` applies the same size/mtime rule on the binary path.
+        total = sum(path.stat().st_size for path, _ in files)
+        output = _binary_transfer(device, "push", str(local_dir) + os.sep + ".", remote_dir, total, "--sync")
+        match = _PUSH_SUMMARY.search(output)
+        if match:
+            stats.transferred = int(match.group(1))
+            stats.skipped = int(match.group(2) or 0)
+            stats.bytes = int(match.group(3))
+        else:
+            stats.exact = False
+        stats.duration = time.perf_counter() - started
+        return stats
+
+    with SyncConnection(device, _transfer_timeout(SYNC_DATA_MAX)) as connection:
+        size_bits = 64 if connection.ls_v2 else 32
+        listings: Dict[str, Dict[str, RemoteStat]] = {}
+        pending: List[Tuple[Path, str, os.stat_result]] = []
+        same_size: List[Tuple[Path, str, os.stat_result]] = []
+        for path, relative in files:
+            remote = f"{remote_dir}/{relative}"
+            parent, _, name = remote.rpartition("/")
+            if parent not in listings:
+                listings[parent] = connection.list(parent)
+            local_stat = path.stat()
+            remote_stat = listings[parent].get(name)
+            if _unchanged(local_stat, remote_stat, size_bits):
+                stats.skipped += 1
+            elif checksum and _same_size(local_stat, remote_stat, size_bits):
+                same_size.append((path, remote, local_stat))
+            else:
+                pending.append((path, remote, local_stat))
+
+        if same_size:
+            remote_hashes = _md5_remote(device, [remote for _path, remote, _stat in same_size])
+            for path, remote, local_stat in same_size:
+                if remote_hashes.get(remote) == _md5_local(path):
+                    stats.skipped += 1
+                else:
+                    pending.append((path, remote, local_stat))
+
+        for path, remote, local_stat in pending:
+            connection.sock.settimeout(_transfer_timeout(local_stat.st_size))
+            stats.bytes += connection.send(path, remote, local_stat.st_mode, int(local_stat.st_mtime))
+            stats.transferred += 1
+    stats.duration = time.perf_counter() - started
+    return stats
+
+
+def _binary_transfer(device: Device, verb: str, source: str, target: str, size: int, *flags: str) -> str:
+    args = [ADB_BINARY, "-s", device.id, verb, *flags, source, target]
+    try:
+        proc = subprocess.run(
+            args,
+            check=False,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            timeout=_transfer_timeout(size),
+        )
+    except subprocess.TimeoutExpired as exc:
+        raise AdbTimeoutError(f"adb {verb} timed out") from exc
+    if proc.returncode != 0:
+        raise AdbCommandError(proc.stdout.strip() or f"adb {verb} failed")
+    return proc.stdout
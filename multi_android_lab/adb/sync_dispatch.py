@@ -0,0 +1,219 @@
+"""Run one action on many devices at (nearly) the same instant.
+
+A normal fan-out opens a transport, builds the command and waits for the
+shell to start on each device, so the action lands over several seconds.
+Here every device is staged first: the pixel command is built and a shell is
+started that reports it is ready and then blocks on `read` before running
+it. Releasing is then a single newline written to each already-open socket
+from one thread.
+
+Skew is measured on the devices: each shell prints its clock when it is
+ready and again when `read` returns. The ready timestamp, compared with the
+host clock when it arrives, maps every device clock onto the host's, so the
+reported offsets are when each device actually started the action (within
+one transport latency), not when the host wrote the release.
+"""
+
+from __future__ import annotations
+
+import gc
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from .client import AdbConnectionError, ShellResult, ShellStream
+from .fanout import DEFAULT_CONCURRENCY, DeviceResult, FanoutReport, fan_out
+from .journal import JournalRecord
+
+if TYPE_CHECKING:
+    from .device import Device
+
+DEFAULT_STAGE_TIMEOUT = 10.0
+READY_MARKER = b"__MAL_READY__"
+# Nanoseconds since the epoch; toybox `date` has %N on every Android we target.
+DEVICE_CLOCK = "date +%s%N"
+_READY_LINE = re.compile(re.escape(READY_MARKER) + rb" ?(\S*)\r?\n")
+_TIMESTAMP = re.compile(r"\d{19}")
+# Staging a 40-device USB fleet is dominated by transport setup; allow it all in parallel.
+STAGE_CONCURRENCY = max(DEFAULT_CONCURRENCY, 64)
+
+
+@dataclass
+class SyncReport:
+    """Per-device results of a synchronized dispatch and the skew achieved."""
+
+    label: str
+    results: List[DeviceResult] = field(default_factory=list)
+    # Seconds between the first device to start the action and each device, from the device clocks.
+    offsets: Dict[str, float] = field(default_factory=dict)
+    # Seconds between the first release write and the write to each device (host side only).
+    write_offsets: Dict[str, float] = field(default_factory=dict)
+    stage_time: float = 0.0
+
+    @property
+    def failed(self) -> List[DeviceResult]:
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def skew(self) -> float:
+        """Spread of the start times measured on the devices."""
+        return max(self.offsets.values()) - min(self.offsets.values()) if self.offsets else 0.0
+
+    @property
+    def write_skew(self) -> float:
+        """Spread of the host's release writes."""
+        return max(self.write_offsets.values()) if self.write_offsets else 0.0
+
+    def summary(self) -> str:
+        ok = len(self.results) - len(self.failed)
+        return (
+            f"{self.label}: {ok}/{len(self.results)} ok · desfase {self.skew * 1000:.1f} ms"
+            f" (escritura {self.write_skew * 1000:.1f} ms) · preparación {self.stage_time:.2f} s"
+        )
+
+
+def _device_time(value: str) -> Optional[float]:
+    """Seconds since the epoch from a `date +%s%N` line, or None if %N is unsupported."""
+    value = value.strip()
+    return int(value) / 1e9 if _TIMESTAMP.fullmatch(value) else None
+
+
+def synchronized_dispatch(
+    devices: Iterable[Device],
+    action: str,
+    *args,
+    release_at: Optional[float] = None,
+    stage_timeout: float = DEFAULT_STAGE_TIMEOUT,
+    timeout: float = 15.0,
+) -> SyncReport:
+    """Stage `action` on every device, then release all of them together.
+
+    `release_at` is an optional wall-clock time (time.time()) to release at;
+    by default the release happens as soon as every device is staged.
+    Devices that fail to stage are reported and left out of the release.
+    """
+    devices = list(devices)
+    report = SyncReport(action)
+    staged: Dict[str, tuple[ShellStream, str]] = {}
+    staged_lock = threading.Lock()
+    staging_closed = False
+    # Device clock minus host clock, per device that reported a usable timestamp.
+    clock_offsets: Dict[str, float] = {}
+
+    def _stage(device: Device) -> str:
+        command = device.command_for(action, *args)
+        stream = device.client.open_shell(
+            device.id,
+            f"echo {READY_MARKER.decode()} $({DEVICE_CLOCK}); read _go; {DEVICE_CLOCK}; {command}",
+            timeout=stage_timeout,
+        )
+        try:
+            # Wait until the shell is parked on `read`, so release costs one write.
+            buffer = b""
+            while True:
+                match = _READY_LINE.search(buffer)
+                if match:
+                    break
+                chunk = stream.read()
+                if not chunk:
+                    raise AdbConnectionError("Shell exited before it was staged")
+                buffer += chunk
+            received_at = time.time()
+            ready_at = _device_time(match.group(1).decode("ascii", errors="replace"))
+            stream.settimeout(timeout)
+        except Exception:
+            stream.close()
+            raise
+        with staged_lock:
+            if staging_closed:
+                stream.close()
+                raise AdbConnectionError("Staged after the deadline")
+            staged[device.id] = (stream, command)
+            if ready_at is not None:
+                clock_offsets[device.id] = ready_at - received_at
+        return "staged"
+
+    stage_report: FanoutReport = fan_out(
+        devices, _stage, label=f"stage {action}", max_concurrency=STAGE_CONCURRENCY, timeout=stage_timeout
+    )
+    report.stage_time = stage_report.wall_time
+    report.results.extend(result for result in stage_report.results if not result.ok)
+    staged_ids = {result.device_id for result in stage_report.results if result.ok}
+
+    with staged_lock:
+        # A device that staged after its fan-out deadline is dropped too.
+        staging_closed = True
+        streams = {device_id: entry for device_id, entry in staged.items() if device_id in staged_ids}
+        for device_id, (stream, _command) in staged.items():
+            if device_id not in staged_ids:
+                stream.close()
+
+    if release_at is not None:
+        delay = release_at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    released_at: Dict[str, float] = {}
+    errors: Dict[str, str] = {}
+    # A collection pass in the middle of the release loop would show up directly as skew.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        first = time.perf_counter()
+        for device_id, (stream, _command) in streams.items():
+            try:
+                stream.write(b"\n")
+            except Exception as exc:  # noqa: BLE001 - reported per device
+                errors[device_id] = str(exc)
+                continue
+            released_at[device_id] = time.perf_counter()
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    report.write_offsets = {device_id: at - first for device_id, at in released_at.items()}
+
+    finished_at: Dict[str, float] = {}
+    # When each device left `read`, on the host clock.
+    started_at: Dict[str, float] = {}
+
+    def _collect(device: Device) -> ShellResult:
+        stream, command = streams[device.id]
+        try:
+            if device.id in errors:
+                raise AdbConnectionError(errors[device.id])
+            if stream.v2:
+                stream.close_stdin()
+            output = stream.read_all().decode("utf-8", errors="replace").strip()
+        finally:
+            stream.close()
+        first_line, _, output = output.partition("\n")
+        started = _device_time(first_line)
+        if started is not None and device.id in clock_offsets:
+            started_at[device.id] = started - clock_offsets[device.id]
+        output = output.strip()
+        finished_at[device.id] = time.perf_counter()
+        duration = finished_at[device.id] - released_at[device.id]
+        device.journal.record(
+            device.id, JournalRecord.create(f"[sync] {command}", output, stream.exit_code, duration)
+        )
+        return ShellResult(output, stream.exit_code)
+
+    by_id = {device.id: device for device in devices}
+    collect_report = fan_out(
+        [by_id[device_id] for device_id in streams],
+        _collect,
+        label=action,
+        max_concurrency=STAGE_CONCURRENCY,
+        timeout=timeout,
+    )
+    for result in collect_report.results:
+        if result.device_id in finished_at:
+            # Measure from the release, not from when the collecting worker started.
+            result.duration = finished_at[result.device_id] - released_at[result.device_id]
+        report.results.append(result)
+    if started_at:
+        earliest = min(started_at.values())
+        report.offsets = {device_id: at - earliest for device_id, at in started_at.items()}
+    return report
@@ -0,0 +1,178 @@
+"""Composite telemetry probe: one shell round-trip per device refresh.
+
+The probe is split into sections, each with a cache policy, so a refresh
+only asks the device for sections that are missing or expired.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .property_cache import POLICY_ON_DEMAND, POLICY_STATIC, POLICY_TTL
+
+SECTION_PREFIX = "@@mal:"
+
+PROBE_PROPS = {
+    "model": "ro.product.model",
+    "manufacturer": "ro.product.manufacturer",
+    "android_version": "ro.build.version.release",
+    "sdk": "ro.build.version.sdk",
+    "abi": "ro.product.cpu.abi",
+    "serial": "ro.serialno",
+}
+
+
+def _section(name: str, command: str) -> str:
+    return f"echo '{SECTION_PREFIX}{name}'; {command} 2>&1"
+
+
+def _props_command() -> str:
+    props = "; ".join(f'echo "{key}=$(getprop {prop})"' for key, prop in PROBE_PROPS.items())
+    return f"{{ {props}; }}"
+
+
+@dataclass
+class DeviceSnapshot:
+    """Typed result of a telemetry probe."""
+
+    model: Optional[str] = None
+    manufacturer: Optional[str] = None
+    android_version: Optional[str] = None
+    sdk: Optional[int] = None
+    abi: Optional[str] = None
+    serial: Optional[str] = None
+    battery_level: Optional[int] = None
+    battery_status: Optional[int] = None
+    battery_temperature: Optional[float] = None
+    power_source: Optional[str] = None
+    resolution: Optional[Tuple[int, int]] = None
+    density: Optional[int] = None
+    uptime: Optional[float] = None
+    storage_total_kb: Optional[int] = None
+    storage_free_kb: Optional[int] = None
+    captured_at: float = field(default_factory=time.time)
+
+    @property
+    def charging(self) -> bool:
+        # BatteryManager.BATTERY_STATUS_CHARGING
+        return self.battery_status == 2
+
+
+Fields = Dict[str, Any]
+
+
+def split_sections(output: str) -> Dict[str, List[str]]:
+    sections: Dict[str, List[str]] = {}
+    current: Optional[List[str]] = None
+    for line in output.splitlines():
+        line = line.rstrip("\r")
+        if line.startswith(SECTION_PREFIX):
+            current = sections.setdefault(line[len(SECTION_PREFIX):].strip(), [])
+        elif current is not None:
+            current.append(line)
+    return sections
+
+
+def _to_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _parse_props(lines: List[str]) -> Fields:
+    values = {}
+    for line in lines:
+        key, sep, value = line.partition("=")
+        if sep and key in PROBE_PROPS:
+            values[key] = value.strip() or None
+    values["sdk"] = _to_int(values.get("sdk"))
+    return {key: values.get(key) for key in PROBE_PROPS}
+
+
+def _parse_battery(lines: List[str]) -> Fields:
+    text = "\n".join(lines)
+    fields: Fields = {"power_source": None}
+    match = re.search(r"level:\s*(\d+)", text)
+    fields["battery_level"] = int(match.group(1)) if match else None
+    match = re.search(r"status:\s*(\d+)", text)
+    fields["battery_status"] = int(match.group(1)) if match else None
+    match = re.search(r"temperature:\s*(-?\d+)", text)
+    fields["battery_temperature"] = int(match.group(1)) / 10 if match else None
+    for source in ("AC", "USB", "Wireless"):
+        if re.search(rf"{source} powered:\s*true", text):
+            fields["power_source"] = source
+            break
+    return fields
+
+
+def _parse_wm_size(lines: List[str]) -> Fields:
+    match = re.search(r"Physical size:\s*(\d+)x(\d+)", "\n".join(lines))
+    return {"resolution": (int(match.group(1)), int(match.group(2))) if match else None}
+
+
+def _parse_wm_density(lines: List[str]) -> Fields:
+    match = re.search(r"Physical density:\s*(\d+)", "\n".join(lines))
+    return {"density": int(match.group(1)) if match else None}
+
+
+def _parse_uptime(lines: List[str]) -> Fields:
+    try:
+        return {"uptime": float(lines[0].split()[0])}
+    except (IndexError, ValueError):
+        return {"uptime": None}
+
+
+def _parse_storage(lines: List[str]) -> Fields:
+    # `df -k /data`: Filesystem 1K-blocks Used Available Use% Mounted on
+    for line in lines[1:]:
+        parts = line.split()
+        if len(parts) >= 4 and parts[1].isdigit():
+            return {"storage_total_kb": int(parts[1]), "storage_free_kb": _to_int(parts[3])}
+    return {"storage_total_kb": None, "storage_free_kb": None}
+
+
+@dataclass(frozen=True)
+class ProbeSection:
+    command: str
+    parser: Callable[[List[str]], Fields]
+    policy: str
+
+
+PROBE_SECTIONS: Dict[str, ProbeSection] = {
+    "props": ProbeSection(_props_command(), _parse_props, POLICY_STATIC),
+    "wm_size": ProbeSection("wm size", _parse_wm_size, POLICY_STATIC),
+    "wm_density": ProbeSection("wm density", _parse_wm_density, POLICY_STATIC),
+    "battery": ProbeSection("dumpsys battery", _parse_battery, POLICY_TTL),
+    "uptime": ProbeSection("cat /proc/uptime", _parse_uptime, POLICY_TTL),
+    "storage": ProbeSection("df -k /data", _parse_storage, POLICY_ON_DEMAND),
+}
+
+# Sections refreshed by a regular telemetry tick; on-demand ones must be asked for.
+DEFAULT_SECTIONS = tuple(name for name, section in PROBE_SECTIONS.items() if section.policy != POLICY_ON_DEMAND)
+
+
+def build_probe_script(sections: Iterable[str] = DEFAULT_SECTIONS) -> str:
+    """Shell script that prints every requested section under a marker."""
+    return "; ".join(_section(name, PROBE_SECTIONS[name].command) for name in sections)
+
+
+def parse_probe_output(output: str) -> Dict[str, Fields]:
+    """Parse the output of a probe script into fields per section."""
+    parsed: Dict[str, Fields] = {}
+    for name, lines in split_sections(output).items():
+        section = PROBE_SECTIONS.get(name)
+        if section:
+            parsed[name] = section.parser(lines)
+    return parsed
+
+
+def build_snapshot(sections: Dict[str, Fields]) -> DeviceSnapshot:
+    """Assemble a DeviceSnapshot from the fields of every known section."""
+    fields: Fields = {}
+    for values in sections.values():
+        fields.update(values)
+    return DeviceSnapshot(**fields)
@@ -0,0 +1,249 @@
+"""Headless fleet runner: `python -m multi_android_lab.cli <command>`.
+
+Shares the ADB core with the GUI but never imports Qt. Results are written to
+stdout as one JSON object per line, as each device finishes; logs go to stderr.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence
+
+from .utils import set_console_stream, set_log_level
+
+if TYPE_CHECKING:
+    from .adb import ADBManager, Device, DeviceResult, FanoutReport
+
+_print_lock = threading.Lock()
+
+
+def _emit(payload: dict) -> None:
+    line = json.dumps(payload, ensure_ascii=False)
+    with _print_lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+
+def _emit_result(result: DeviceResult) -> None:
+    _emit(result.to_dict())
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m multi_android_lab.cli",
+        description="Run MultiAndroidLab actions on every connected device without the GUI.",
+    )
+    parser.add_argument("-s", "--serial", action="append", default=[], help="Limit to these devices (repeatable).")
+    parser.add_argument("-j", "--concurrency", type=int, default=None, help="Devices handled in parallel.")
+    parser.add_argument("-t", "--timeout", type=float, default=None, help="Per-device timeout in seconds.")
+    parser.add_argument("--log-level", default="WARNING", help="Log level written to stderr (default: WARNING).")
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Stage the action on every device and release it on all of them at the same instant.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("devices", help="List devices known to the adb server.")
+    shell = commands.add_parser("shell", help="Run a shell command on every device.")
+    shell.add_argument("shell_command", nargs=argparse.REMAINDER)
+    open_app = commands.add_parser("open", help="Start an activity.")
+    open_app.add_argument("package")
+    open_app.add_argument("activity")
+    close_app = commands.add_parser("close", help="Force-stop a package.")
+    close_app.add_argument("package")
+    tap = commands.add_parser("tap", help="Tap at normalized coordinates (0-1).")
+    tap.add_argument("x", type=float)
+    tap.add_argument("y", type=float)
+    swipe = commands.add_parser("swipe", help="Swipe between normalized coordinates (0-1).")
+    for name in ("x1", "y1", "x2", "y2"):
+        swipe.add_argument(name, type=float)
+    swipe.add_argument("--duration", type=int, default=300, help="Duration in milliseconds.")
+    commands.add_parser("back", help="Press BACK.")
+    commands.add_parser("home", help="Press HOME.")
+    install = commands.add_parser("install", help="Install an APK, throttled per USB bus.")
+    install.add_argument("apk")
+    install.add_argument("--per-bus", type=int, default=3, help="Concurrent transfers per USB bus.")
+    install.add_argument("--retries", type=int, default=2)
+    install.add_argument("-d", "--downgrade", action="store_true", help="Allow a lower versionCode.")
+    install.add_argument("-g", "--grant", action="store_true", help="Grant runtime permissions.")
+    sync = commands.add_parser("sync", help="Mirror a local directory onto the devices, sending only changes.")
+    sync.add_argument("local_dir")
+    sync.add_argument("remote_dir")
+    sync.add_argument("--checksum", action="store_true", help="Compare same-size files by MD5 instead of mtime.")
+    logcat = commands.add_parser("logcat", help="Search recent logcat lines across devices.")
+    logcat.add_argument("--tag", action="append", help="Log tag (repeatable).")
+    logcat.add_argument("--pid", action="append", type=int, help="Process id (repeatable).")
+    logcat.add_argument("--level", help='Level letters, e.g. "EF".')
+    logcat.add_argument("--keyword", action="append", help='Indexed keyword such as "anr" (repeatable).')
+    logcat.add_argument("--text", help="Substring to look for in the message.")
+    logcat.add_argument("--since", type=float, default=None, help="Only lines from the last N seconds.")
+    logcat.add_argument("--listen", type=float, default=3.0, help="Seconds to stream before searching.")
+    logcat.add_argument("--limit", type=int, default=500)
+    return parser
+
+
+def _action(args: argparse.Namespace) -> tuple[str, Callable[[Device], Any]]:
+    if args.command == "shell":
+        command = " ".join(args.shell_command)
+        return command, lambda device: device.run_command(command, timeout=args.timeout)
+    if args.command == "open":
+        return "open", lambda device: device.open_app(args.package, args.activity)
+    if args.command == "close":
+        return "close", lambda device: device.close_app(args.package)
+    if args.command == "tap":
+        return "tap", lambda device: device.tap(args.x, args.y)
+    if args.command == "swipe":
+        return "swipe", lambda device: device.swipe(args.x1, args.y1, args.x2, args.y2, args.duration)
+    return args.command, lambda device: getattr(device, args.command)()
+
+
+# CLI command -> (Device action, args) for --sync.
+SYNC_ACTIONS: Dict[str, Callable[[argparse.Namespace], tuple]] = {
+    "shell": lambda args: ("run_command", (" ".join(args.shell_command),)),
+    "open": lambda args: ("open_app", (args.package, args.activity)),
+    "close": lambda args: ("close_app", (args.package,)),
+    "tap": lambda args: ("tap", (args.x, args.y)),
+    "swipe": lambda args: ("swipe", (args.x1, args.y1, args.x2, args.y2, args.duration)),
+    "back": lambda args: ("back", ()),
+    "home": lambda args: ("home", ()),
+}
+
+
+def _target_devices(manager: ADBManager, serials: List[str]) -> List[Device]:
+    devices = [device for device in manager.get_connected_devices() if device.status == "device"]
+    if serials:
+        devices = [device for device in devices if device.id in serials]
+    return devices
+
+
+def _transfer(manager: ADBManager, devices: List[Device], args: argparse.Namespace) -> FanoutReport:
+    if args.command == "sync":
+        return manager.sync_dir(
+            args.local_dir, args.remote_dir, devices=devices, checksum=args.checksum, on_result=_emit_result
+        )
+    return manager.install_apk(
+        args.apk,
+        devices=devices,
+        per_bus=args.per_bus,
+        retries=args.retries,
+        on_result=_emit_result,
+        downgrade=args.downgrade,
+        grant=args.grant,
+    )
+
+
+def _search_logcat(manager: ADBManager, devices: List[Device], args: argparse.Namespace) -> int:
+    manager.enable_logcat()
+    time.sleep(args.listen)
+    manager.disable_logcat()
+    started = time.perf_counter()
+    try:
+        records = manager.search_logs(
+            tag=args.tag,
+            pid=args.pid,
+            level=args.level,
+            keyword=args.keyword,
+            text=args.text,
+            since=time.time() - args.since if args.since is not None else None,
+            devices=[device.id for device in devices],
+            limit=args.limit,
+        )
+    except ValueError as exc:
+        print(f"logcat: {exc}", file=sys.stderr)
+        return 2
+    for record in records:
+        _emit(record.to_dict())
+    _emit({"summary": "logcat", "total": len(records), "query_ms": round((time.perf_counter() - started) * 1000, 3)})
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    if args.sync and args.command not in SYNC_ACTIONS:
+        parser.error(f"--sync is not supported by '{args.command}'")
+    # Configure logging before importing the adb package, which logs while resolving adb.
+    set_console_stream(sys.stderr)
+    set_log_level(args.log_level)
+    from .adb import ADBManager
+
+    manager = ADBManager()
+    manager.refresh_devices()
+    if manager.refresh_error is not None:
+        print(f"Cannot reach adb: {manager.refresh_error}", file=sys.stderr)
+        return 1
+
+    if args.command == "devices":
+        for device in manager.get_connected_devices():
+            _emit({"device_id": device.id, **device.info, "status": device.status})
+        return 0
+
+    if args.command == "shell" and not args.shell_command:
+        print("shell: missing command", file=sys.stderr)
+        return 2
+
+    devices = _target_devices(manager, args.serial)
+    if not devices:
+        print("No online devices", file=sys.stderr)
+        return 1
+
+    if args.command == "logcat":
+        return _search_logcat(manager, devices, args)
+
+    if args.command in ("install", "sync"):
+        report = _transfer(manager, devices, args)
+        _emit(
+            {
+                "summary": report.label,
+                "total": len(report.results),
+                "failed": len(report.failed),
+                "wall_time": round(report.wall_time, 3),
+            }
+        )
+        return 0 if not report.failed else 1
+
+    if args.sync:
+        action, action_args = SYNC_ACTIONS[args.command](args)
+        sync_report = manager.execute_synchronized(action, *action_args, devices=devices)
+        for result in sync_report.results:
+            offset = sync_report.offsets.get(result.device_id)
+            _emit({**result.to_dict(), "offset_ms": round(offset * 1000, 3) if offset is not None else None})
+        _emit(
+            {
+                "summary": action,
+                "total": len(sync_report.results),
+                "failed": len(sync_report.failed),
+                "skew_ms": round(sync_report.skew * 1000, 3),
+                "write_skew_ms": round(sync_report.write_skew * 1000, 3),
+                "stage_time": round(sync_report.stage_time, 3),
+            }
+        )
+        return 0 if not sync_report.failed else 1
+
+    label, func = _action(args)
+    report = manager.fan_out(
+        func,
+        label=label,
+        devices=devices,
+        on_result=_emit_result,
+        max_concurrency=args.concurrency,
+        timeout=args.timeout,
+    )
+    _emit(
+        {
+            "summary": label,
+            "total": len(report.results),
+            "failed": len(report.failed),
+            "wall_time": round(report.wall_time, 3),
+        }
+    )
+    return 0 if not report.failed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,103 @@
+"""List model holding one row per device, updated by diffs."""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional
+
+from PySide6.QtCore import QAbstractListModel, QByteArray, QModelIndex, QPersistentModelIndex, Qt
+
+ROW_FIELDS = ("id", "model", "battery", "status", "health")
+
+
+class DeviceListModel(QAbstractListModel):
+    """Rows are plain snapshot dicts; only rows whose fields changed are signalled."""
+
+    IdRole = Qt.UserRole + 1
+    ModelRole = Qt.UserRole + 2
+    BatteryRole = Qt.UserRole + 3
+    StatusRole = Qt.UserRole + 4
+    HealthRole = Qt.UserRole + 5
+
+    _ROLE_FIELDS = {
+        IdRole: "id",
+        ModelRole: "model",
+        BatteryRole: "battery",
+        StatusRole: "status",
+        HealthRole: "health",
+    }
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self._rows: List[dict] = []
+        self._positions: Dict[str, int] = {}
+
+    # Qt model interface -------------------------------------------------
+    def rowCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._rows):
+            return None
+        row = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return row["id"]
+        if role == Qt.ToolTipRole:
+            return f"{row.get('model', 'n/a')} · {row.get('status', 'n/a')} · {row.get('health', 'n/a')}"
+        field = self._ROLE_FIELDS.get(role)
+        return row.get(field) if field else None
+
+    def roleNames(self) -> Dict[int, QByteArray]:
+        names = super().roleNames()
+        for role, field in self._ROLE_FIELDS.items():
+            names[role] = QByteArray(field.encode("ascii"))
+        return names
+
+    # Diff API -----------------------------------------------------------
+    def device_id_at(self, row: int) -> Optional[str]:
+        return self._rows[row]["id"] if 0 <= row < len(self._rows) else None
+
+    def row_data(self, device_id: str) -> Optional[dict]:
+        position = self._positions.get(device_id)
+        return dict(self._rows[position]) if position is not None else None
+
+    def device_ids(self) -> List[str]:
+        return [row["id"] for row in self._rows]
+
+    def upsert(self, snapshot: dict) -> None:
+        """Insert a new row or update only the fields that changed."""
+        position = self._positions.get(snapshot["id"])
+        if position is None:
+            row = len(self._rows)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._rows.append(dict(snapshot))
+            self._positions[snapshot["id"]] = row
+            self.endInsertRows()
+            return
+        current = self._rows[position]
+        changed = [field for field in ROW_FIELDS if field in snapshot and current.get(field) != snapshot[field]]
+        if not changed:
+            return
+        current.update({field: snapshot[field] for field in changed})
+        index = self.index(position)
+        roles = [role for role, field in self._ROLE_FIELDS.items() if field in changed]
+        self.dataChanged.emit(index, index, roles + [Qt.DisplayRole, Qt.ToolTipRole])
+
+    def remove(self, device_id: str) -> None:
+        position = self._positions.get(device_id)
+        if position is None:
+            return
+        self.beginRemoveRows(QModelIndex(), position, position)
+        del self._rows[position]
+        self.endRemoveRows()
+        self._reindex()
+
+    def apply_snapshots(self, snapshots: Iterable[dict]) -> None:
+        """Make the model match `snapshots` with the minimum number of row changes."""
+        incoming = {snap["id"]: snap for snap in snapshots}
+        for device_id in [row["id"] for row in self._rows if row["id"] not in incoming]:
+            self.remove(device_id)
+        for snapshot in incoming.values():
+            self.upsert(snapshot)
+
+    def _reindex(self) -> None:
+        self._positions = {row["id"]: position for position, row in enumerate(self._rows)}
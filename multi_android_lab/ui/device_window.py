@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
+from concurrent.futures import CancelledError
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict
 
 from PySide6.QtCore import QSize, QTimer, Qt
 from PySide6.QtGui import QIcon
@@ -23,8 +24,10 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from ..adb import Device
-from ..utils import launch_scrcpy, run_in_executor, style_icon_button
+from ..adb import AdbCancelledError, CancelScope, Device
+from ..utils import PRIORITY_TELEMETRY, launch_scrcpy, run_in_executor, style_icon_button
+
+LOG_VIEW_MAX_BLOCKS = 1000
 
 
 class DeviceWindow(QMainWindow):
@@ -41,6 +44,9 @@ class DeviceWindow(QMainWindow):
             self.setWindowIcon(QIcon(str(icon_path)))
 
         self.info_future = None
+        self._log_cursor = 0
+        # Parent of everything this window runs on the device; cancelled when it closes.
+        self.cancel_scope = CancelScope(parents=(device.cancel_scope,), name=f"window {device.id}")
 
         self.refresh_timer = QTimer(self)
         self.refresh_timer.setInterval(3000)
@@ -102,6 +108,7 @@ class DeviceWindow(QMainWindow):
         self.log_view = QPlainTextEdit()
         self.log_view.setReadOnly(True)
         self.log_view.setPlaceholderText("Últimos logs...")
+        self.log_view.setMaximumBlockCount(LOG_VIEW_MAX_BLOCKS)
         main_layout.addWidget(self.log_view, stretch=1)
 
     def _build_action_panel(self) -> QWidget:
@@ -187,24 +194,36 @@ class DeviceWindow(QMainWindow):
     def _request_info_refresh(self) -> None:
         if self.info_future and not self.info_future.done():
             return
-        self.info_future = run_in_executor(self._gather_device_info, ui_callback=self._apply_info_result)
+        with self.cancel_scope.activate():
+            self.info_future = run_in_executor(
+                self._gather_device_info,
+                ui_callback=self._apply_info_result,
+                priority=PRIORITY_TELEMETRY,
+                key=self.device.id,
+            )
 
-    def _gather_device_info(self) -> Dict[str, str]:
-        model = self.device.get_model(force_refresh=True)
-        battery = self.device.get_battery(force_refresh=True)
-        width, height = self.device.get_resolution(force_refresh=True)
+    def _gather_device_info(self) -> Dict[str, Any]:
+        # An unhealthy device keeps its last snapshot until its backoff elapses.
+        if self.device.health.should_poll() or self.device.snapshot is None:
+            self.device.refresh_snapshot()
+        model = self.device.get_model()
+        battery = self.device.get_battery()
+        width, height = self.device.get_resolution()
         latency = self.device.get_latency()
-        logs = self.device.get_logs()
+        log_lines, log_cursor = self.device.read_logs_since(self._log_cursor)
         return {
             "model": model,
             "battery": battery,
             "resolution": f"{width}x{height}",
             "latency": latency,
-            "logs": logs,
+            "log_lines": log_lines,
+            "log_cursor": log_cursor,
         }
 
-    def _apply_info_result(self, data: Dict[str, str] | Exception) -> None:
+    def _apply_info_result(self, data: Dict[str, Any] | Exception) -> None:
         self.info_future = None
+        if isinstance(data, (AdbCancelledError, CancelledError)):
+            return
         if isinstance(data, Exception):
             QMessageBox.warning(self, "Error", f"No se pudo actualizar la info:\n{data}")
             return
@@ -212,9 +231,14 @@ class DeviceWindow(QMainWindow):
         self.info_labels["battery"].setText(data.get("battery", "n/a"))
         self.info_labels["resolution"].setText(data.get("resolution", "n/a"))
         self.info_labels["latency"].setText(data.get("latency", "n/a"))
-        logs = data.get("logs", "")
-        self.log_view.setPlainText(logs)
-        self.log_view.verticalScrollBar().setValue(self.log_view.verticalScrollBar().maximum())
+        self._log_cursor = data.get("log_cursor", self._log_cursor)
+        log_lines = data.get("log_lines") or []
+        if log_lines:
+            scrollbar = self.log_view.verticalScrollBar()
+            at_bottom = scrollbar.value() >= scrollbar.maximum()
+            self.log_view.appendPlainText("\n".join(log_lines))
+            if at_bottom:
+                scrollbar.setValue(scrollbar.maximum())
 
 
     def _open_app(self) -> None:
@@ -238,13 +262,14 @@ class DeviceWindow(QMainWindow):
         self._run_device_method("tap", x, y)
 
     def _run_device_method(self, method_name: str, *args) -> None:
-        run_in_executor(getattr(self.device, method_name), *args)
+        self.device.enqueue_input(method_name, *args)
 
     def _run_custom_command(self) -> None:
         command = self.command_input.text().strip()
         if not command:
             return
-        run_in_executor(self.device.run_shell, command)
+        with self.cancel_scope.activate():
+            self.device.start_command(command)
 
 
     def _start_scrcpy(self) -> None:
@@ -270,7 +295,18 @@ class DeviceWindow(QMainWindow):
         self.scrcpy_status_label.setText("scrcpy detenido.")
 
 
+    def showEvent(self, event) -> None:
+        # The main window reuses closed windows; give a reopened one a fresh scope.
+        if self.cancel_scope.cancelled and not self.device.cancel_scope.cancelled:
+            self.cancel_scope = CancelScope(parents=(self.device.cancel_scope,), name=f"window {self.device.id}")
+            self.refresh_timer.start()
+        super().showEvent(event)
+
     def closeEvent(self, event) -> None:
         self.refresh_timer.stop()
+        if self.info_future:
+            self.info_future.cancel()
+        # Kills the sockets of whatever this window still has running on the device.
+        self.cancel_scope.cancel("window closed")
         self._stop_scrcpy()
         super().closeEvent(event)
@@ -2,30 +2,45 @@
 
 from __future__ import annotations
 
+import itertools
+from functools import partial
 from pathlib import Path
 from typing import Dict, List
 
 from PySide6.QtCore import QTimer, Qt
 from PySide6.QtGui import QCloseEvent, QPixmap
 from PySide6.QtWidgets import (
+    QAbstractItemView,
+    QFileDialog,
     QFrame,
     QGroupBox,
     QHBoxLayout,
     QLabel,
+    QListView,
     QLineEdit,
-    QListWidget,
-    QListWidgetItem,
     QMainWindow,
     QMessageBox,
     QPushButton,
+    QTabWidget,
     QVBoxLayout,
     QWidget,
 )
 
-from ..adb import ADBManager
-from ..utils import get_logger, run_in_executor, style_icon_button
+from ..adb import ADBManager, Device, DeviceEvent, DeviceResult, FanoutReport
+from ..adb.discovery import EVENT_DISCONNECTED
+from ..utils import (
+    PRIORITY_FLEET,
+    PRIORITY_TELEMETRY,
+    get_logger,
+    get_scheduler,
+    post_to_ui,
+    run_in_executor,
+    style_icon_button,
+)
+from .device_list_model import DeviceListModel
 from .device_window import DeviceWindow
-from .widgets import DeviceListItem
+from .thumbnail_wall import ThumbnailWall
+from .widgets import DeviceItemDelegate
 
 
 class MainWindow(QMainWindow):
@@ -38,21 +53,24 @@ class MainWindow(QMainWindow):
         self.showMaximized()
         self.assets_dir = Path(__file__).resolve().parent.parent / "assets"
 
-        self.adb_manager = ADBManager()
+        self.adb_manager = ADBManager(persistent_shell=True)
         self.device_windows: Dict[str, DeviceWindow] = {}
-        self.device_items: Dict[str, DeviceListItem] = {}
         self.logger = get_logger("ui.main_window")
-        self._last_snapshot_ids: set[str] = set()
 
+        # Device discovery is push-based (track-devices); this timer only refreshes telemetry.
         self.refresh_timer = QTimer(self)
         self.refresh_timer.setInterval(2000)
         self.refresh_timer.timeout.connect(self.trigger_refresh)
 
         self.refresh_future = None
+        # Results so far per running fan-out, keyed by id so two runs of one action stay apart.
+        self._fanout_progress: Dict[int, List[DeviceResult]] = {}
+        self._fanout_ids = itertools.count(1)
 
         self._setup_ui()
+        self.adb_manager.add_listener(self._on_device_event_threadsafe)
+        self.adb_manager.start_tracking()
         self.refresh_timer.start()
-        self.trigger_refresh()
 
     # ------------------------------------------------------------------
     def _setup_ui(self) -> None:
@@ -65,12 +83,27 @@ class MainWindow(QMainWindow):
 
         layout.addWidget(self._build_brand_header())
 
-        self.device_list = QListWidget()
-        self.device_list.setSpacing(8)
-        self.device_list.setAlternatingRowColors(False)
+        self.device_model = DeviceListModel(self)
+        self.device_delegate = DeviceItemDelegate(self)
+        self.device_delegate.open_requested.connect(self.open_device_window)
+        self.device_list = QListView()
+        self.device_list.setModel(self.device_model)
+        self.device_list.setItemDelegate(self.device_delegate)
+        self.device_list.setUniformItemSizes(True)
+        self.device_list.setMouseTracking(True)
+        self.device_list.setVerticalScrollMode(QListView.ScrollPerPixel)
         self.device_list.setFrameShape(QFrame.NoFrame)
+        self.device_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.device_list.doubleClicked.connect(
+            lambda index: self.open_device_window(index.data(DeviceListModel.IdRole))
+        )
+        self.thumbnail_wall = ThumbnailWall(self.adb_manager, self.device_model)
+        self.thumbnail_wall.open_requested.connect(self.open_device_window)
+        self.device_views = QTabWidget()
+        self.device_views.addTab(self.device_list, "Lista")
+        self.device_views.addTab(self.thumbnail_wall, "Pantallas")
         layout.addWidget(QLabel("Dispositivos conectados"))
-        layout.addWidget(self.device_list, stretch=1)
+        layout.addWidget(self.device_views, stretch=1)
 
         layout.addWidget(self._build_controls())
 
@@ -156,12 +189,17 @@ class MainWindow(QMainWindow):
         style_icon_button(self.swipe_down_btn, "arrow-down", size=30)
         self.swipe_down_btn.setToolTip("Swipe down en todos")
 
+        self.install_btn = QPushButton()
+        style_icon_button(self.install_btn, "download", size=30)
+        self.install_btn.setToolTip("Instalar APK en los seleccionados (o en todos)")
+
         for btn in [
             self.open_all_btn,
             self.close_all_btn,
             self.back_all_btn,
             self.home_all_btn,
             self.swipe_down_btn,
+            self.install_btn,
         ]:
             buttons_layout.addWidget(btn)
 
@@ -179,14 +217,17 @@ class MainWindow(QMainWindow):
 
         self.status_label = QLabel("Listo")
         controls_layout.addWidget(self.status_label)
+        self.latency_label = QLabel("Latencia ADB: n/a")
+        controls_layout.addWidget(self.latency_label)
 
-        self.refresh_button.clicked.connect(self.trigger_refresh)
+        self.refresh_button.clicked.connect(self._resync_devices)
         self.open_all_btn.clicked.connect(self._open_app_all)
         self.close_all_btn.clicked.connect(self._close_app_all)
         self.back_all_btn.clicked.connect(lambda: self._run_on_all("back"))
         self.home_all_btn.clicked.connect(lambda: self._run_on_all("home"))
         self.swipe_down_btn.clicked.connect(lambda: self._run_on_all("swipe_down"))
         self.custom_command_btn.clicked.connect(self._run_custom_command)
+        self.install_btn.clicked.connect(self._install_apk)
 
         return container
 
@@ -198,22 +239,33 @@ class MainWindow(QMainWindow):
         self.refresh_future = run_in_executor(
             self._collect_device_snapshots,
             ui_callback=self._apply_refresh_result,
+            priority=PRIORITY_TELEMETRY,
         )
 
+    def _resync_devices(self) -> None:
+        """One-shot `host:devices-l` resync; normal updates arrive as events."""
+        run_in_executor(self.adb_manager.refresh_devices, ui_callback=lambda _result: self.trigger_refresh())
+
     def _collect_device_snapshots(self) -> List[dict]:
         self.logger.debug("Collecting device snapshots...")
-        devices = self.adb_manager.refresh_devices()
-        snapshots: List[dict] = []
-        for device in devices:
-            snapshots.append(
-                {
-                    "id": device.id,
-                    "model": device.get_model(force_refresh=True),
-                    "battery": device.get_battery(force_refresh=True),
-                    "status": device.status,
-                }
-            )
-        return snapshots
+        self.adb_manager.refresh_snapshots()
+        return [self._build_row(device) for device in self.adb_manager.get_connected_devices()]
+
+    def _probe_device(self, device: Device) -> dict:
+        if device.health.should_poll():
+            device.refresh_snapshot()
+        return self._build_row(device)
+
+    @staticmethod
+    def _build_row(device: Device) -> dict:
+        has_snapshot = device.snapshot is not None
+        return {
+            "id": device.id,
+            "model": device.get_model() if has_snapshot else "Cargando...",
+            "battery": device.get_battery() if has_snapshot else "n/a",
+            "status": device.status,
+            "health": device.health.state,
+        }
 
     def _apply_refresh_result(self, snapshots: List[dict] | Exception) -> None:
         self.logger.debug(
@@ -225,29 +277,60 @@ class MainWindow(QMainWindow):
         if isinstance(snapshots, Exception):
             QMessageBox.warning(self, "Error", f"No se pudieron obtener dispositivos:\n{snapshots}")
             return
-        snapshots = snapshots or []
-        current_ids = {snap["id"] for snap in snapshots}
-        if current_ids != self._last_snapshot_ids:
-            self.logger.info("Dispositivos actualizados: %s", ", ".join(sorted(current_ids)) or "ninguno")
-            self._last_snapshot_ids = current_ids
-        self._populate_device_list(snapshots)
-
-    def _populate_device_list(self, snapshots: List[dict]) -> None:
-        self.logger.debug("Populating list with %s devices", len(snapshots))
-        self.device_list.clear()
-        self.device_items.clear()
-        for data in snapshots:
-            device = self.adb_manager.devices.get(data["id"])
-            if not device:
-                continue
-            item = QListWidgetItem()
-            widget = DeviceListItem(device)
-            widget.update_info(data)
-            widget.open_requested.connect(self.open_device_window)
-            item.setSizeHint(widget.sizeHint())
-            self.device_list.addItem(item)
-            self.device_list.setItemWidget(item, widget)
-            self.device_items[device.id] = widget
+        for snap in snapshots or []:
+            if snap["id"] in self.adb_manager.devices:
+                self.device_model.upsert(snap)
+        self._update_latency_overview()
+
+    def _update_latency_overview(self) -> None:
+        overview = self.adb_manager.latency_overview()
+        fleet = overview["fleet"]
+        if fleet is None:
+            self.latency_label.setText("Latencia ADB: n/a")
+            return
+        slowest = ", ".join(f"{device_id} ({stats.p95:.0f} ms)" for device_id, stats in overview["slowest"])
+        queue = get_scheduler().stats()
+        workers = f"{queue['busy']}/{queue['max_workers']} hilos"
+        click_wait = queue["classes"]["interactive"]["wait_p95_ms"]
+        shared = self.adb_manager.coalesce_stats()["shared"]
+        self.latency_label.setText(
+            f"Latencia ADB: {fleet.describe()} · p95 más altos: {slowest} · "
+            f"cola {queue['queued']} ({workers}, espera clic p95 {click_wait:.0f} ms) · "
+            f"{shared} consultas compartidas"
+        )
+
+    def _apply_device_row(self, row: dict | Exception) -> None:
+        if isinstance(row, Exception):
+            self.logger.warning("Device probe failed: %s", row)
+            return
+        if row["id"] in self.adb_manager.devices:
+            self.device_model.upsert(row)
+
+    def _on_device_event_threadsafe(self, event: DeviceEvent) -> None:
+        post_to_ui(self._on_device_event, event)
+
+    def _on_device_event(self, event: DeviceEvent) -> None:
+        if event.kind == EVENT_DISCONNECTED:
+            self.device_model.remove(event.device_id)
+            # The window is bound to the closed Device; a reconnect opens a new one.
+            window = self.device_windows.pop(event.device_id, None)
+            if window is not None:
+                window.close()
+            return
+        device = self.adb_manager.devices.get(event.device_id)
+        if device is None:
+            return
+        row = self.device_model.row_data(event.device_id) or self._build_row(device)
+        row["status"] = event.status
+        self.device_model.upsert(row)
+        if event.status == "device":
+            run_in_executor(
+                self._probe_device,
+                device,
+                ui_callback=self._apply_device_row,
+                priority=PRIORITY_TELEMETRY,
+                key=device.id,
+            )
 
     # ------------------------------------------------------------------
     def _open_app_all(self) -> None:
@@ -269,10 +352,60 @@ class MainWindow(QMainWindow):
         command = self.custom_command_input.text().strip()
         if not command:
             return
-        run_in_executor(self.adb_manager.broadcast_shell, command)
+        self._start_fanout(command, self.adb_manager.broadcast_shell, command)
+
+    def _selected_devices(self) -> List[Device]:
+        """Online devices selected in the list, or every online device if none is."""
+        indexes = self.device_list.selectionModel().selectedIndexes()
+        selected = {index.data(DeviceListModel.IdRole) for index in indexes}
+        online = [device for device in self.adb_manager.get_connected_devices() if device.status == "device"]
+        return [device for device in online if device.id in selected] or online
+
+    def _install_apk(self) -> None:
+        apk_path, _ = QFileDialog.getOpenFileName(self, "Seleccionar APK", "", "APK (*.apk)")
+        if not apk_path:
+            return
+        devices = self._selected_devices()
+        if not devices:
+            QMessageBox.warning(self, "Error", "No hay dispositivos conectados.")
+            return
+        self._start_fanout(f"install {Path(apk_path).name}", self.adb_manager.install_apk, apk_path, devices)
 
     def _run_on_all(self, method_name: str, *args) -> None:
-        run_in_executor(self.adb_manager.execute_on_all, method_name, *args)
+        # Queued here, on the UI thread, so quick successive clicks keep their order per device.
+        futures = self.adb_manager.enqueue_on_all(method_name, *args)
+        self._start_fanout(method_name, self.adb_manager.collect_inputs, futures, method_name)
+
+    def _start_fanout(self, label: str, func, *args) -> None:
+        fanout_id = next(self._fanout_ids)
+        self._fanout_progress[fanout_id] = []
+        self.status_label.setText(f"{label}: enviando...")
+
+        def _on_result(result: DeviceResult) -> None:
+            post_to_ui(self._on_fanout_progress, (fanout_id, label, result))
+
+        run_in_executor(
+            partial(func, *args, on_result=_on_result),
+            ui_callback=partial(self._on_fanout_finished, fanout_id),
+            priority=PRIORITY_FLEET,
+        )
+
+    def _on_fanout_progress(self, update: tuple[int, str, DeviceResult]) -> None:
+        fanout_id, label, result = update
+        results = self._fanout_progress.get(fanout_id)
+        if results is None:
+            return
+        results.append(result)
+        failed = sum(1 for item in results if not item.ok)
+        self.status_label.setText(f"{label}: {len(results) - failed} ok, {failed} con error...")
+
+    def _on_fanout_finished(self, fanout_id: int, report: FanoutReport | Exception) -> None:
+        self._fanout_progress.pop(fanout_id, None)
+        if isinstance(report, Exception):
+            self.status_label.setText("Error en la acción global")
+            QMessageBox.warning(self, "Error", f"No se pudo ejecutar la acción:\n{report}")
+            return
+        self.status_label.setText(report.summary())
 
     # ------------------------------------------------------------------
     def open_device_window(self, device_id: str) -> None:
@@ -291,6 +424,9 @@ class MainWindow(QMainWindow):
     # ------------------------------------------------------------------
     def closeEvent(self, event: QCloseEvent) -> None:
         self.refresh_timer.stop()
+        self.thumbnail_wall.stop()
+        self.adb_manager.remove_listener(self._on_device_event_threadsafe)
+        self.adb_manager.stop_tracking()
         for window in self.device_windows.values():
             window.close()
         super().closeEvent(event)
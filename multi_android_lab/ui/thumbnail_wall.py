@@ -0,0 +1,320 @@
+"""Grid of live, low-resolution screen thumbnails for the whole fleet.
+
+The wall spends a fixed budget of raw frame bytes per second however many
+devices are connected (a full-resolution frame is ~10 MB, so the USB bus,
+not the capture count, is the limit): every timer tick picks the tile that
+has waited longest, preferring tiles that are scrolled into view. Each new
+frame is reduced to a 64-bit difference hash; tiles whose hash barely moved
+are not repainted and are captured less often until they change.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from functools import partial
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QPersistentModelIndex, QSize, Qt, QTimer, Signal
+from PySide6.QtGui import QColor, QImage, QPixmap
+from PySide6.QtWidgets import QFrame, QLabel, QListView, QVBoxLayout, QWidget
+
+from ..adb import ADBManager, Device
+from ..utils import PRIORITY_TELEMETRY, get_logger, run_in_executor
+from .device_list_model import DeviceListModel
+
+# Timer ticks per second; each tick starts at most one capture.
+DEFAULT_FRAME_BUDGET = 8
+# Raw frame bytes per second for the whole wall, shared by every tile.
+DEFAULT_BYTE_BUDGET = 24 * 1024 * 1024
+# Assumed size of a device's frame until its first capture tells (1080x2400 RGBA).
+DEFAULT_FRAME_BYTES = 1080 * 2400 * 4
+# Slow captures must not queue up behind each other in the shared executor.
+MAX_IN_FLIGHT = 3
+# One capture in this many goes to a tile that is scrolled out of view.
+OFFSCREEN_SHARE = 6
+# Hashes that differ in at most this many bits count as the same image.
+HASH_THRESHOLD = 3
+# An unchanged tile waits this long before its next capture, doubling per unchanged frame.
+IDLE_BACKOFF = 0.5
+MAX_IDLE_BACKOFF = 4.0
+TILE_SIZE = QSize(144, 288)
+
+
+def dhash(image: QImage) -> int:
+    """64-bit difference hash: brightness gradients of a 9x8 grey thumbnail."""
+    small = image.convertToFormat(QImage.Format_Grayscale8).scaled(
+        9, 8, Qt.IgnoreAspectRatio, Qt.SmoothTransformation
+    )
+    bits = 0
+    for y in range(8):
+        row = [small.pixel(x, y) & 0xFF for x in range(9)]
+        for x in range(8):
+            bits = (bits << 1) | (row[x] > row[x + 1])
+    return bits
+
+
+def hash_distance(first: int, second: int) -> int:
+    return bin(first ^ second).count("1")
+
+
+def capture_thumbnail(device: Device) -> tuple:
+    """Worker-side capture: (device id, tile image, hash, capture seconds, frame bytes, error)."""
+    try:
+        frame = device.capture_screen()
+        size = len(frame.pixels)
+        step = max(1, frame.width // TILE_SIZE.width())
+        image = frame.downscale(step).qimage()
+        if step == 1:
+            # A full-scale QImage wraps the capture buffer, which the next capture overwrites.
+            image = image.copy()
+        image = image.scaled(TILE_SIZE, Qt.KeepAspectRatio, Qt.FastTransformation)
+        return device.id, image, dhash(image), frame.duration, size, ""
+    except Exception as exc:  # noqa: BLE001 - shown on the tile
+        return device.id, None, 0, 0.0, 0, str(exc)
+
+
+class ThumbnailModel(QAbstractListModel):
+    """One tile per online device; the decoration is the last painted frame."""
+
+    IdRole = Qt.UserRole + 1
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self._rows: List[dict] = []
+        self._positions: Dict[str, int] = {}
+        self._placeholder = QPixmap(TILE_SIZE)
+        self._placeholder.fill(QColor("#1f2933"))
+
+    def rowCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._rows):
+            return None
+        row = self._rows[index.row()]
+        if role in (Qt.DisplayRole, self.IdRole):
+            return row["id"]
+        if role == Qt.DecorationRole:
+            return row["pixmap"] or self._placeholder
+        if role == Qt.ToolTipRole:
+            return row["error"] or f"{row['id']} · {row['frames']} fotogramas"
+        return None
+
+    def device_ids(self) -> List[str]:
+        return [row["id"] for row in self._rows]
+
+    def set_devices(self, device_ids: List[str]) -> None:
+        """Add and remove tiles so they match `device_ids`, keeping existing images."""
+        wanted = set(device_ids)
+        for position in reversed(range(len(self._rows))):
+            if self._rows[position]["id"] not in wanted:
+                self.beginRemoveRows(QModelIndex(), position, position)
+                del self._rows[position]
+                self.endRemoveRows()
+        known = {row["id"] for row in self._rows}
+        for device_id in device_ids:
+            if device_id not in known:
+                row = len(self._rows)
+                self.beginInsertRows(QModelIndex(), row, row)
+                self._rows.append({"id": device_id, "pixmap": None, "hash": None, "frames": 0, "error": ""})
+                self.endInsertRows()
+        self._positions = {row["id"]: position for position, row in enumerate(self._rows)}
+
+    def last_hash(self, device_id: str) -> Optional[int]:
+        position = self._positions.get(device_id)
+        return self._rows[position]["hash"] if position is not None else None
+
+    def set_image(self, device_id: str, image: QImage, image_hash: int) -> None:
+        position = self._positions.get(device_id)
+        if position is None:
+            return
+        row = self._rows[position]
+        row.update(pixmap=QPixmap.fromImage(image), hash=image_hash, error="")
+        row["frames"] += 1
+        index = self.index(position)
+        self.dataChanged.emit(index, index, [Qt.DecorationRole, Qt.ToolTipRole])
+
+    def set_error(self, device_id: str, error: str) -> None:
+        position = self._positions.get(device_id)
+        if position is None:
+            return
+        self._rows[position]["error"] = error
+        index = self.index(position)
+        self.dataChanged.emit(index, index, [Qt.ToolTipRole])
+
+
+class ThumbnailWall(QWidget):
+    """Scrollable grid of thumbnails refreshed within a global frame budget."""
+
+    open_requested = Signal(str)
+
+    def __init__(
+        self,
+        adb_manager: ADBManager,
+        device_model: DeviceListModel,
+        frame_budget: int = DEFAULT_FRAME_BUDGET,
+        byte_budget: int = DEFAULT_BYTE_BUDGET,
+        parent: Optional[QWidget] = None,
+    ) -> None:
+        super().__init__(parent)
+        self.adb_manager = adb_manager
+        self.device_model = device_model
+        self.byte_budget = byte_budget
+        self.logger = get_logger("ui.thumbnail_wall")
+
+        self._last_request: Dict[str, float] = {}
+        # (request time, expected bytes) of the captures started in the last second.
+        self._requested: Deque[Tuple[float, int]] = deque()
+        self._frame_bytes: Dict[str, int] = {}
+        self._unchanged: Dict[str, int] = {}
+        self._not_before: Dict[str, float] = {}
+        self._in_flight: Set[str] = set()
+        self._ticks = 0
+        self._captured_at: Deque[float] = deque()
+        self.skipped = 0
+
+        self.model = ThumbnailModel(self)
+        self.view = QListView()
+        self.view.setModel(self.model)
+        self.view.setViewMode(QListView.IconMode)
+        self.view.setMovement(QListView.Static)
+        self.view.setResizeMode(QListView.Adjust)
+        self.view.setUniformItemSizes(True)
+        self.view.setIconSize(TILE_SIZE)
+        self.view.setGridSize(TILE_SIZE + QSize(16, 32))
+        self.view.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.view.setFrameShape(QFrame.NoFrame)
+        self.view.doubleClicked.connect(lambda index: self.open_requested.emit(index.data(ThumbnailModel.IdRole)))
+
+        self.stats_label = QLabel("Pantallas: en espera")
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.view, stretch=1)
+        layout.addWidget(self.stats_label)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(max(1, round(1000 / frame_budget)))
+        self.timer.timeout.connect(self._tick)
+
+        for signal in (
+            device_model.rowsInserted,
+            device_model.rowsRemoved,
+            device_model.dataChanged,
+            device_model.modelReset,
+        ):
+            signal.connect(self._sync_tiles)
+        self._sync_tiles()
+
+    # Capture only while the wall is on screen ---------------------------
+    def showEvent(self, event) -> None:
+        super().showEvent(event)
+        self.timer.start()
+
+    def hideEvent(self, event) -> None:
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def stop(self) -> None:
+        self.timer.stop()
+
+    # ------------------------------------------------------------------
+    def _sync_tiles(self, *_args) -> None:
+        online = [
+            device_id
+            for device_id in self.device_model.device_ids()
+            if (self.device_model.row_data(device_id) or {}).get("status") == "device"
+        ]
+        if online != self.model.device_ids():
+            self.model.set_devices(online)
+
+    def _visible_ids(self) -> Set[str]:
+        viewport = self.view.viewport().rect()
+        return {
+            device_id
+            for position, device_id in enumerate(self.model.device_ids())
+            if self.view.visualRect(self.model.index(position)).intersects(viewport)
+        }
+
+    def _next_device(self) -> Optional[str]:
+        """Longest-waiting idle tile, from the off-screen ones every OFFSCREEN_SHARE ticks."""
+        now = time.monotonic()
+        candidates = [
+            device_id
+            for device_id in self.model.device_ids()
+            if device_id not in self._in_flight
+            and now >= self._not_before.get(device_id, 0.0)
+            and self._healthy_enough(device_id)
+        ]
+        if not candidates:
+            return None
+        visible = self._visible_ids()
+        on_screen = [device_id for device_id in candidates if device_id in visible]
+        off_screen = [device_id for device_id in candidates if device_id not in visible]
+        self._ticks += 1
+        pool = off_screen if off_screen and (not on_screen or self._ticks % OFFSCREEN_SHARE == 0) else on_screen
+        return min(pool, key=lambda device_id: self._last_request.get(device_id, 0.0))
+
+    def _healthy_enough(self, device_id: str) -> bool:
+        device = self.adb_manager.devices.get(device_id)
+        return device is not None and device.health.should_poll()
+
+    def _bytes_this_second(self, now: float) -> int:
+        while self._requested and now - self._requested[0][0] > 1.0:
+            self._requested.popleft()
+        return sum(size for _, size in self._requested)
+
+    def _tick(self) -> None:
+        if len(self._in_flight) >= MAX_IN_FLIGHT:
+            return
+        device_id = self._next_device()
+        device = self.adb_manager.devices.get(device_id) if device_id else None
+        if device is None:
+            return
+        now = time.monotonic()
+        expected = self._frame_bytes.get(device_id, DEFAULT_FRAME_BYTES)
+        spent = self._bytes_this_second(now)
+        # A frame larger than the whole budget still goes out, alone.
+        if spent and spent + expected > self.byte_budget:
+            return
+        self._requested.append((now, expected))
+        self._in_flight.add(device_id)
+        self._last_request[device_id] = now
+        run_in_executor(
+            capture_thumbnail,
+            device,
+            ui_callback=partial(self._apply_thumbnail, device_id),
+            priority=PRIORITY_TELEMETRY,
+            key=device_id,
+        )
+
+    def _apply_thumbnail(self, device_id: str, result: tuple | Exception) -> None:
+        # Free the slot first: a tile left in flight is never captured again.
+        self._in_flight.discard(device_id)
+        if isinstance(result, Exception):
+            self.logger.warning("Thumbnail capture of %s failed: %s", device_id, result)
+            return
+        _, image, image_hash, duration, size, error = result
+        if image is None:
+            self.logger.debug("Thumbnail of %s failed: %s", device_id, error)
+            self.model.set_error(device_id, error)
+            return
+        now = time.monotonic()
+        self._frame_bytes[device_id] = size
+        self._captured_at.append(now)
+        while self._captured_at and now - self._captured_at[0] > 1.0:
+            self._captured_at.popleft()
+        previous = self.model.last_hash(device_id)
+        if previous is not None and hash_distance(previous, image_hash) <= HASH_THRESHOLD:
+            self.skipped += 1
+            unchanged = self._unchanged[device_id] = self._unchanged.get(device_id, 0) + 1
+            self._not_before[device_id] = now + min(MAX_IDLE_BACKOFF, IDLE_BACKOFF * 2 ** (unchanged - 1))
+        else:
+            self._unchanged.pop(device_id, None)
+            self._not_before.pop(device_id, None)
+            self.model.set_image(device_id, image, image_hash)
+        mb_per_s = self._bytes_this_second(now) / (1024 * 1024)
+        self.stats_label.setText(
+            f"Pantallas: {len(self._captured_at)} fps · {mb_per_s:.1f} MB/s · {self.skipped} sin cambios"
+            f" · {len(self._visible_ids())}/{self.model.rowCount()} visibles · última {duration * 1000:.0f} ms"
+        )
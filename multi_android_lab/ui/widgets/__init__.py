@@ -1,5 +1,5 @@
 """Reusable widgets."""
 
-from .device_list_item import DeviceListItem
+from .device_item_delegate import DeviceItemDelegate
 
-__all__ = ["DeviceListItem"]
+__all__ = ["DeviceItemDelegate"]
@@ -0,0 +1,110 @@
+"""Painted delegate drawing a device card for each row of the device list."""
+
+from __future__ import annotations
+
+from PySide6.QtCore import QEvent, QModelIndex, QRect, QSize, Qt, Signal
+from PySide6.QtGui import QColor, QPainter, QPen
+from PySide6.QtWidgets import QStyle, QStyledItemDelegate, QStyleOptionViewItem
+
+from ...utils import get_icon
+from ..device_list_model import DeviceListModel
+
+CARD_HEIGHT = 76
+CARD_MARGIN = 4
+BUTTON_SIZE = 44
+
+# Gaucho One palette, kept in sync with styles.qss.
+CARD_BACKGROUND = QColor("#2f2f2f")
+CARD_HOVER = QColor("#363636")
+CARD_SELECTED = QColor("#3d3624")
+SELECTED_BORDER = (QColor("#f1d47a"), 3)
+LABEL_COLOR = QColor("#d1d1d1")
+TEXT_COLOR = QColor("#ffffff")
+BUTTON_COLOR = QColor("#d6af36")
+BUTTON_HOVER = QColor("#e0be59")
+STATUS_BORDERS = {
+    "device": (QColor("#d6af36"), 2),
+    "offline": (QColor("#e67e22"), 2),
+    "unauthorized": (QColor("#e74c3c"), 2),
+}
+DEFAULT_BORDER = (QColor("#4a4a4a"), 1)
+# Health states (adb.health) that override the status border.
+HEALTH_BORDERS = {
+    "degraded": (QColor("#e67e22"), 2),
+    "quarantined": (QColor("#e74c3c"), 3),
+}
+HEALTH_LABELS = {"degraded": "degradado", "quarantined": "en cuarentena"}
+
+
+class DeviceItemDelegate(QStyledItemDelegate):
+    """Draws the card instead of instantiating one widget per row."""
+
+    open_requested = Signal(str)
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        return QSize(option.rect.width(), CARD_HEIGHT + 2 * CARD_MARGIN)
+
+    def _card_rect(self, option: QStyleOptionViewItem) -> QRect:
+        return option.rect.adjusted(CARD_MARGIN, CARD_MARGIN, -CARD_MARGIN, -CARD_MARGIN)
+
+    def _button_rect(self, option: QStyleOptionViewItem) -> QRect:
+        card = self._card_rect(option)
+        return QRect(
+            card.right() - BUTTON_SIZE - 12,
+            card.center().y() - BUTTON_SIZE // 2,
+            BUTTON_SIZE,
+            BUTTON_SIZE,
+        )
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        hovered = bool(option.state & QStyle.State_MouseOver)
+        selected = bool(option.state & QStyle.State_Selected)
+        status = index.data(DeviceListModel.StatusRole) or ""
+        health = index.data(DeviceListModel.HealthRole) or ""
+
+        card = self._card_rect(option)
+        if selected:
+            border_color, border_width = SELECTED_BORDER
+        else:
+            border_color, border_width = HEALTH_BORDERS.get(health) or STATUS_BORDERS.get(status, DEFAULT_BORDER)
+        painter.setPen(QPen(border_color, border_width))
+        painter.setBrush(CARD_SELECTED if selected else CARD_HOVER if hovered else CARD_BACKGROUND)
+        painter.drawRoundedRect(card, 12, 12)
+
+        button = self._button_rect(option)
+        text_area = card.adjusted(16, 10, -(BUTTON_SIZE + 28), -10)
+        column = text_area.width() // 2
+        line = text_area.height() // 2
+        cells = [
+            ("ID", index.data(DeviceListModel.IdRole)),
+            ("Modelo", index.data(DeviceListModel.ModelRole)),
+            ("Batería", index.data(DeviceListModel.BatteryRole)),
+            ("Estado", f"{status} · {HEALTH_LABELS[health]}" if health in HEALTH_LABELS else status),
+        ]
+        metrics = option.fontMetrics
+        label_width = max(metrics.horizontalAdvance(label) for label, _ in cells) + 12
+        for position, (label, value) in enumerate(cells):
+            x = text_area.left() + (position % 2) * column
+            y = text_area.top() + (position // 2) * line
+            painter.setPen(LABEL_COLOR)
+            painter.drawText(QRect(x, y, label_width, line), Qt.AlignLeft | Qt.AlignVCenter, label)
+            value_rect = QRect(x + label_width, y, column - label_width - 8, line)
+            text = metrics.elidedText(str(value or "n/a"), Qt.ElideRight, value_rect.width())
+            painter.setPen(TEXT_COLOR)
+            painter.drawText(value_rect, Qt.AlignLeft | Qt.AlignVCenter, text)
+
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(BUTTON_HOVER if hovered else BUTTON_COLOR)
+        painter.drawRoundedRect(button, 10, 10)
+        icon = get_icon("external", size=26, color="#373737")
+        icon.paint(painter, button.adjusted(9, 9, -9, -9))
+        painter.restore()
+
+    def editorEvent(self, event: QEvent, model, option: QStyleOptionViewItem, index: QModelIndex) -> bool:
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            if self._button_rect(option).contains(event.position().toPoint()):
+                self.open_requested.emit(index.data(DeviceListModel.IdRole))
+                return True
+        return super().editorEvent(event, model, option, index)
@@ -1,16 +1,43 @@
-"""Utility helpers for MultiAndroidLab."""
-
-from .logger import get_logger, LOG_DIR
-from .concurrency import run_in_executor
-from .scrcpy import launch_scrcpy, find_window_handle
-from .icons import get_icon, style_icon_button
-
-__all__ = [
-    "get_logger",
-    "LOG_DIR",
-    "run_in_executor",
-    "launch_scrcpy",
-    "find_window_handle",
-    "get_icon",
-    "style_icon_button",
-]
+"""Utility helpers for MultiAndroidLab.
+
+Submodules are imported on first attribute access (PEP 562), so headless
+code such as `multi_android_lab.adb` or the CLI never loads Qt.
+"""
+
+from __future__ import annotations
+
+from importlib import import_module
+from typing import Any
+
+_EXPORTS = {
+    "get_logger": ".logger",
+    "LOG_DIR": ".logger",
+    "set_console_stream": ".logger",
+    "set_log_level": ".logger",
+    "post_to_ui": ".concurrency",
+    "run_in_executor": ".concurrency",
+    "get_scheduler": ".scheduler",
+    "PRIORITY_INTERACTIVE": ".scheduler",
+    "PRIORITY_FLEET": ".scheduler",
+    "PRIORITY_TELEMETRY": ".scheduler",
+    "PRIORITY_BACKGROUND": ".scheduler",
+    "launch_scrcpy": ".scrcpy",
+    "find_window_handle": ".scrcpy",
+    "get_icon": ".icons",
+    "style_icon_button": ".icons",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,12 +1,14 @@
-"""Background execution helpers using ThreadPoolExecutor."""
+"""Background execution helpers on the shared priority scheduler."""
 
 from __future__ import annotations
 
-from concurrent.futures import Future, ThreadPoolExecutor
-from typing import Any, Callable, Optional
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable, Optional
 
 from PySide6.QtCore import QObject, Signal
 
+from .scheduler import PRIORITY_BACKGROUND, get_scheduler
+
 ExecutorCallable = Callable[..., Any]
 UICallback = Optional[Callable[[Any], None]]
 
@@ -16,7 +18,6 @@ class _Dispatcher(QObject):
 
 
 _dispatcher = _Dispatcher()
-_executor = ThreadPoolExecutor(max_workers=8)
 
 
 def _handle_completed(callback: Callable[[Any], None], result: Any) -> None:
@@ -27,8 +28,22 @@ def _handle_completed(callback: Callable[[Any], None], result: Any) -> None:
 _dispatcher.completed.connect(_handle_completed)
 
 
-def run_in_executor(func: ExecutorCallable, *args, ui_callback: UICallback = None) -> Future:
-    """Run func(*args) in the shared executor and optionally deliver result on UI thread."""
+def post_to_ui(callback: Callable[[Any], None], value: Any) -> None:
+    """Deliver callback(value) on the UI thread; safe to call from any thread."""
+    _dispatcher.completed.emit(callback, value)
+
+
+def run_in_executor(
+    func: ExecutorCallable,
+    *args,
+    ui_callback: UICallback = None,
+    priority: int = PRIORITY_BACKGROUND,
+    key: Optional[Hashable] = None,
+) -> Future:
+    """Run func(*args) on the shared scheduler and optionally deliver result on UI thread.
+
+    Work sharing a `key` (usually a device id) runs in order, one task at a time.
+    """
 
     def _done(future: Future) -> None:
         if ui_callback is None:
@@ -39,6 +54,6 @@ def run_in_executor(func: ExecutorCallable, *args, ui_callback: UICallback = Non
             result = exc
         _dispatcher.completed.emit(ui_callback, result)
 
-    future = _executor.submit(func, *args)
+    future = get_scheduler().submit(func, *args, priority=priority, key=key)
     future.add_done_callback(_done)
     return future
@@ -104,6 +104,14 @@ SVG_TEMPLATES = {
         <line x1="19" y1="12" x2="22" y2="12"/>
     </svg>
     """,
+    "download": """
+    <svg viewBox="0 0 24 24" fill="none" stroke="CURRENT_COLOR" stroke-width="2"
+         stroke-linecap="round" stroke-linejoin="round">
+        <path d="M21 15v4a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2v-4"/>
+        <polyline points="7 10 12 15 17 10"/>
+        <line x1="12" y1="15" x2="12" y2="3"/>
+    </svg>
+    """,
     "run": """
     <svg viewBox="0 0 24 24" fill="none" stroke="CURRENT_COLOR" stroke-width="2"
          stroke-linecap="round" stroke-linejoin="round">
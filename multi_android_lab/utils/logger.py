@@ -1,44 +1,127 @@
-"""Logging helpers for MultiAndroidLab."""
+"""Logging helpers for MultiAndroidLab.
+
+Every logger shares one file handler and one console handler. Records are
+handed to a QueueListener thread, so callers never block on log I/O.
+"""
 
 from __future__ import annotations
 
+import atexit
 import logging
+import os
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional, TextIO
 
 LOG_DIR = Path.home() / ".multi_android_lab" / "logs"
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 
-_loggers: Dict[str, logging.Logger] = {}
+LOG_LEVEL_ENV_VAR = "MULTI_ANDROID_LAB_LOG_LEVEL"
+DEFAULT_LEVEL = logging.INFO
+
+_lock = threading.Lock()
+_queue_handler: Optional[QueueHandler] = None
+_console_handler: Optional[logging.StreamHandler] = None
+_listener: Optional[QueueListener] = None
+# Levels requested per subsystem ("adb", "device", "adb.client", ...).
+_levels: Dict[str, int] = {}
+_subsystems: Dict[str, logging.Logger] = {}
+
+
+def _parse_level(value: str) -> Optional[int]:
+    value = value.strip().upper()
+    if value.isdigit():
+        return int(value)
+    level = logging.getLevelName(value)
+    return level if isinstance(level, int) else None
 
 
-def _build_handlers() -> list[logging.Handler]:
+def _load_env_levels() -> None:
+    """Read e.g. MULTI_ANDROID_LAB_LOG_LEVEL="INFO,device=DEBUG,adb.client=WARNING"."""
+    for item in os.environ.get(LOG_LEVEL_ENV_VAR, "").split(","):
+        name, sep, value = item.rpartition("=")
+        level = _parse_level(value) if value.strip() else None
+        if level is not None:
+            _levels[name.strip() if sep else ""] = level
+
+
+def _start_pipeline() -> QueueHandler:
+    global _queue_handler, _console_handler, _listener
     formatter = logging.Formatter(
         "%(asctime)s [%(levelname)s] %(name)s - %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S",
     )
 
-    file_handler = RotatingFileHandler(LOG_DIR / "app.log", maxBytes=1_000_000, backupCount=5)
+    file_handler = RotatingFileHandler(LOG_DIR / "app.log", maxBytes=1_000_000, backupCount=5, encoding="utf-8")
     file_handler.setFormatter(formatter)
 
-    console_handler = logging.StreamHandler(stream=sys.stdout)
-    console_handler.setFormatter(formatter)
-    return [file_handler, console_handler]
+    _console_handler = logging.StreamHandler(stream=sys.stdout)
+    _console_handler.setFormatter(formatter)
 
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _queue_handler = QueueHandler(log_queue)
+    _listener = QueueListener(log_queue, file_handler, _console_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_pipeline)
+    _load_env_levels()
+    return _queue_handler
 
-def get_logger(name: str) -> logging.Logger:
-    """Return a configured logger that writes to the shared log directory."""
-    if name in _loggers:
-        return _loggers[name]
 
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+def _stop_pipeline() -> None:
+    if _listener is not None:
+        _listener.stop()
 
-    if not logger.handlers:
-        for handler in _build_handlers():
-            logger.addHandler(handler)
 
-    _loggers[name] = logger
+def _subsystem_logger(subsystem: str) -> logging.Logger:
+    """Top-level logger ("adb", "device", "ui", ...) owning the queue handler."""
+    logger = _subsystems.get(subsystem)
+    if logger is None:
+        logger = logging.getLogger(subsystem)
+        logger.addHandler(_queue_handler or _start_pipeline())
+        logger.propagate = False
+        logger.setLevel(_levels.get(subsystem, _levels.get("", DEFAULT_LEVEL)))
+        _subsystems[subsystem] = logger
     return logger
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Return a logger whose records go to the shared app.log and console handlers.
+
+    Only the top-level subsystem logger carries a handler and a level; child
+    loggers such as "device.<serial>" inherit both, so creating one per device
+    costs no file handles.
+    """
+    with _lock:
+        _subsystem_logger(name.split(".", 1)[0])
+        logger = logging.getLogger(name)
+        if name in _levels:
+            logger.setLevel(_levels[name])
+        return logger
+
+
+def set_log_level(level: int | str, subsystem: str = "") -> None:
+    """Change the level of one subsystem (e.g. "device" or "adb.client"), or of all when empty."""
+    if isinstance(level, str):
+        parsed = _parse_level(level)
+        if parsed is None:
+            raise ValueError(f"Unknown log level: {level}")
+        level = parsed
+    with _lock:
+        _levels[subsystem] = level
+        if subsystem:
+            logging.getLogger(subsystem).setLevel(level)
+            return
+        for name, logger in _subsystems.items():
+            logger.setLevel(_levels.get(name, level))
+
+
+def set_console_stream(stream: TextIO) -> None:
+    """Send console output to another stream (the CLI keeps stdout for results)."""
+    with _lock:
+        if _console_handler is None:
+            _start_pipeline()
+        assert _console_handler is not None
+        _console_handler.setStream(stream)
@@ -0,0 +1,248 @@
+"""Shared worker pool with priority classes and ordered per-key queues.
+
+Work submitted with the same key (a device id) runs one task at a time, so
+two actions on one device never overlap or swap places; within a key,
+higher-priority tasks go first and equal ones keep submission order. Across
+keys the highest-priority ready task takes the next free worker, and a few
+workers are held back for interactive work so a click never queues behind a
+full pool of telemetry polls. Tasks run in a copy of the submitter's
+contextvars, so the active cancel scope follows the work to its worker.
+A task that waits for other tasks on the pool (a fan-out coordinator) does
+so inside blocking(), which hands its slot to a replacement worker.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Hashable, Iterator, List, Optional, Tuple
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_FLEET = 1
+PRIORITY_TELEMETRY = 2
+PRIORITY_BACKGROUND = 3
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_FLEET: "fleet",
+    PRIORITY_TELEMETRY: "telemetry",
+    PRIORITY_BACKGROUND: "background",
+}
+
+MIN_WORKERS = 8
+MAX_WORKERS = 64
+# Workers only interactive tasks may use.
+INTERACTIVE_RESERVE = 2
+WAIT_WINDOW = 256
+
+
+@dataclass(order=True)
+class _Task:
+    priority: int
+    seq: int
+    key: Optional[Hashable] = field(compare=False)
+    func: Callable[..., Any] = field(compare=False)
+    args: tuple = field(compare=False)
+    future: Future = field(compare=False)
+    context: contextvars.Context = field(compare=False, default_factory=contextvars.copy_context)
+    submitted_at: float = field(compare=False, default_factory=time.monotonic)
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)] if sorted_values else 0.0
+
+
+def workers_for_fleet(device_count: int) -> int:
+    """One worker per device plus the interactive reserve, within MIN/MAX_WORKERS."""
+    return max(MIN_WORKERS, min(MAX_WORKERS, device_count + INTERACTIVE_RESERVE))
+
+
+class WorkScheduler:
+    """Thread pool whose queue is ordered by priority class and serialized per key."""
+
+    def __init__(self, max_workers: int = MIN_WORKERS) -> None:
+        self.max_workers = max_workers
+        self._condition = threading.Condition()
+        self._seq = itertools.count()
+        # Ready work: unkeyed tasks, plus (possibly stale) entries naming an idle key.
+        self._ready: List[Tuple[int, int, Optional[Hashable], Optional[_Task]]] = []
+        self._keyed: Dict[Hashable, List[_Task]] = {}
+        self._running_keys: set = set()
+        self._queued = {priority: 0 for priority in PRIORITY_NAMES}
+        self._completed = {priority: 0 for priority in PRIORITY_NAMES}
+        self._waits: Dict[int, Deque[float]] = {priority: deque(maxlen=WAIT_WINDOW) for priority in PRIORITY_NAMES}
+        self._threads: List[threading.Thread] = []
+        self._busy = 0
+        # Workers parked in blocking(): neither busy nor idle, and replaced while they wait.
+        self._blocked = 0
+
+    def submit(
+        self, func: Callable[..., Any], *args, priority: int = PRIORITY_BACKGROUND, key: Optional[Hashable] = None
+    ) -> Future:
+        """Queue func(*args); tasks sharing `key` run one at a time."""
+        future: Future = Future()
+        with self._condition:
+            task = _Task(priority, next(self._seq), key, func, args, future)
+            self._queued[priority] += 1
+            if key is None:
+                heapq.heappush(self._ready, (priority, task.seq, None, task))
+            else:
+                heapq.heappush(self._keyed.setdefault(key, []), task)
+                if key not in self._running_keys:
+                    heapq.heappush(self._ready, (priority, task.seq, key, None))
+            self._spawn_if_needed()
+            self._condition.notify()
+        return future
+
+    def resize(self, max_workers: int) -> None:
+        """Change the worker limit; extra workers exit once idle."""
+        with self._condition:
+            if max_workers == self.max_workers:
+                return
+            self.max_workers = max(1, max_workers)
+            self._spawn_if_needed()
+            self._condition.notify_all()
+
+    @contextmanager
+    def blocking(self) -> Iterator[None]:
+        """Wait for other pool work without holding a worker slot (no-op off the pool)."""
+        with self._condition:
+            on_pool = threading.current_thread() in self._threads
+            if on_pool:
+                self._busy -= 1
+                self._blocked += 1
+                self._spawn_if_needed()
+                self._condition.notify()
+        if not on_pool:
+            yield
+            return
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._blocked -= 1
+                self._busy += 1
+
+    def size_for_fleet(self, device_count: int) -> None:
+        self.resize(workers_for_fleet(device_count))
+
+    def queue_depth(self, key: Optional[Hashable] = None) -> int:
+        """Tasks waiting for a worker, in total or for one key."""
+        with self._condition:
+            if key is not None:
+                return len(self._keyed.get(key, ()))
+            return sum(self._queued.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Workers, queue depth and recent wait-time percentiles per priority class."""
+        with self._condition:
+            classes = {}
+            for priority, name in PRIORITY_NAMES.items():
+                waits = sorted(self._waits[priority])
+                classes[name] = {
+                    "queued": self._queued[priority],
+                    "completed": self._completed[priority],
+                    "wait_p50_ms": _percentile(waits, 0.50) * 1000,
+                    "wait_p95_ms": _percentile(waits, 0.95) * 1000,
+                }
+            deepest = sorted(
+                ((key, len(tasks)) for key, tasks in self._keyed.items() if tasks), key=lambda item: -item[1]
+            )[:5]
+            return {
+                "workers": len(self._threads),
+                "max_workers": self.max_workers,
+                "busy": self._busy,
+                "blocked": self._blocked,
+                "queued": sum(self._queued.values()),
+                "classes": classes,
+                "deepest_keys": deepest,
+            }
+
+    # ------------------------------------------------------------------
+    def _spawn_if_needed(self) -> None:
+        # Called with the condition held: grow towards max_workers while work is waiting.
+        idle = len(self._threads) - self._busy - self._blocked
+        waiting = sum(self._queued.values())
+        while len(self._threads) < self.max_workers + self._blocked and waiting > idle:
+            thread = threading.Thread(target=self._worker, name=f"scheduler-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+            idle += 1
+
+    def _next_task(self) -> Optional[_Task]:
+        # Called with the condition held.
+        shared_limit = max(1, self.max_workers - INTERACTIVE_RESERVE)
+        while self._ready:
+            priority, _seq, key, task = self._ready[0]
+            if priority != PRIORITY_INTERACTIVE and self._busy >= shared_limit:
+                return None
+            heapq.heappop(self._ready)
+            if key is None:
+                return task
+            tasks = self._keyed.get(key)
+            if key in self._running_keys or not tasks:
+                continue  # stale entry: the key is busy or already drained
+            task = heapq.heappop(tasks)
+            if not tasks:
+                del self._keyed[key]
+            self._running_keys.add(key)
+            return task
+        return None
+
+    def _worker(self) -> None:
+        current = threading.current_thread()
+        while True:
+            with self._condition:
+                task = self._next_task()
+                while task is None:
+                    if len(self._threads) > self.max_workers + self._blocked:
+                        self._threads.remove(current)
+                        return
+                    self._condition.wait()
+                    task = self._next_task()
+                self._busy += 1
+                self._queued[task.priority] -= 1
+                self._waits[task.priority].append(time.monotonic() - task.submitted_at)
+            try:
+                self._run(task)
+            finally:
+                with self._condition:
+                    self._busy -= 1
+                    self._completed[task.priority] += 1
+                    if task.key is not None:
+                        self._running_keys.discard(task.key)
+                        tasks = self._keyed.get(task.key)
+                        if tasks:
+                            heapq.heappush(self._ready, (tasks[0].priority, tasks[0].seq, task.key, None))
+                    self._condition.notify_all()
+
+    @staticmethod
+    def _run(task: _Task) -> None:
+        if not task.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = task.context.run(task.func, *task.args)
+        except BaseException as exc:  # noqa: BLE001 - reported through the future
+            task.future.set_exception(exc)
+        else:
+            task.future.set_result(result)
+
+
+_scheduler: Optional[WorkScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> WorkScheduler:
+    """Return the process-wide scheduler."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = WorkScheduler()
+        return _scheduler
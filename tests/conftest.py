@@ -0,0 +1,46 @@
+"""Fixtures wiring the client to the fake adb server from benchmarks.fake_adb."""
+
+from __future__ import annotations
+
+from typing import Iterator
+
+import pytest
+
+from benchmarks.fake_adb import FakeAdbServer, FakeFleet, FleetConfig
+from multi_android_lab.adb import AdbClient, CommandJournal, Device
+
+
+@pytest.fixture
+def fleet() -> FakeFleet:
+    return FakeFleet(FleetConfig(devices=2, latency=0.0, jitter=0.0))
+
+
+@pytest.fixture
+def server(fleet: FakeFleet) -> Iterator[FakeAdbServer]:
+    server = FakeAdbServer(fleet).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(server: FakeAdbServer) -> AdbClient:
+    return AdbClient(port=server.port)
+
+
+@pytest.fixture
+def journal(tmp_path) -> CommandJournal:
+    directory = tmp_path / "logs"
+    directory.mkdir()
+    return CommandJournal(directory)
+
+
+@pytest.fixture
+def serial(fleet: FakeFleet) -> str:
+    return fleet.serials[0]
+
+
+@pytest.fixture
+def device(client: AdbClient, journal: CommandJournal, serial: str) -> Iterator[Device]:
+    device = Device(serial, client=client, journal=journal)
+    yield device
+    device.close()
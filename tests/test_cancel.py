@@ -0,0 +1,103 @@
+"""CancelScope deadlines and cascades, and how Device commands honour them."""
+
+from __future__ import annotations
+
+import socket
+import threading
+import time
+
+import pytest
+
+from multi_android_lab.adb.cancel import REASON_DEADLINE, CancelScope, current_scope
+from multi_android_lab.adb.client import AdbCancelledError
+
+
+def test_deadline_cancels_the_scope_and_aborts_resources():
+    left, right = socket.socketpair()
+    with right:
+        scope = CancelScope(0.1, name="deadline")
+        scope.attach(left)
+        started = time.monotonic()
+        assert left.recv(1) == b""
+        assert time.monotonic() - started < 2
+        assert scope.cancelled and scope.reason == REASON_DEADLINE
+
+
+def test_cancel_cascades_to_children_and_children_inherit_deadlines():
+    parent = CancelScope(30, name="parent")
+    child = CancelScope(60, parents=(parent,), name="child")
+    assert child.deadline == parent.deadline
+    parent.cancel("closing")
+    assert child.cancelled and child.reason == "closing"
+    late = CancelScope(parents=(parent,))
+    assert late.cancelled
+
+
+def test_cancel_children_keeps_the_parent_usable():
+    parent = CancelScope(name="device")
+    child = CancelScope(parents=(parent,))
+    parent.cancel_children("offline")
+    assert child.cancelled and not parent.cancelled
+    assert not CancelScope(parents=(parent,)).cancelled
+
+
+def test_closed_scope_is_detached_from_its_parent():
+    parent = CancelScope()
+    with CancelScope(parents=(parent,)) as child:
+        assert current_scope() is child
+    assert current_scope() is None
+    parent.cancel()
+    assert not child.cancelled
+
+
+def test_device_command_times_out_at_its_deadline(device, fleet):
+    fleet.script("hang", delay=1.0)
+    started = time.monotonic()
+    result = device.run_command("hang", timeout=0.2)
+    assert result.output == "Command timed out"
+    assert result.exit_code is None
+    assert time.monotonic() - started < 0.9
+
+
+def test_cancelling_the_callers_scope_interrupts_the_command(device, fleet):
+    fleet.script("hang", delay=1.0)
+    scope = CancelScope(name="window")
+    threading.Timer(0.1, scope.cancel, args=("window closed",)).start()
+    with scope.activate():
+        with pytest.raises(AdbCancelledError, match="window closed"):
+            device.run_command("hang")
+    assert device.run_command("echo still here").output == "still here"
+
+
+def test_handle_cancel_stops_a_queued_command(device, fleet):
+    fleet.script("hang", delay=1.0)
+    handle = device.start_command("hang")
+    time.sleep(0.1)
+    handle.cancel()
+    with pytest.raises(AdbCancelledError):
+        handle.result(timeout=2)
+
+
+def test_offline_round_trip_cancels_commands_but_not_window_scopes(device, fleet):
+    fleet.script("hang", delay=1.0)
+    window = CancelScope(parents=(device.cancel_scope,), name="window")
+    errors = []
+
+    def _run():
+        with window.activate():
+            try:
+                device.run_command("hang")
+            except AdbCancelledError as exc:
+                errors.append(exc)
+
+    worker = threading.Thread(target=_run)
+    worker.start()
+    time.sleep(0.1)
+    device.update_status("offline")
+    worker.join(2)
+    device.update_status("device")
+
+    assert [str(error) for error in errors] == ["device offline"]
+    assert not window.cancelled
+    with window.activate():
+        assert device.run_command("echo back").output == "back"
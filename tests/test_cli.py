@@ -0,0 +1,44 @@
+"""Headless CLI exit codes and diagnostics."""
+
+from __future__ import annotations
+
+import io
+import json
+import socket
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+from typing import List, Tuple
+
+from multi_android_lab import cli
+from multi_android_lab.adb import AdbClient, adb_manager
+from multi_android_lab.utils import set_console_stream
+
+
+def _run(argv: List[str]) -> Tuple[int, str, str]:
+    out, err = io.StringIO(), io.StringIO()
+    try:
+        with redirect_stdout(out), redirect_stderr(err):
+            code = cli.main(argv)
+    finally:
+        # main() points the log console at our stderr buffer.
+        set_console_stream(sys.__stderr__)
+    return code, out.getvalue(), err.getvalue()
+
+
+def test_devices_fails_loudly_when_adb_is_unreachable(monkeypatch):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    monkeypatch.setattr(adb_manager, "get_default_client", lambda: AdbClient(port=port, timeout=0.5))
+    monkeypatch.setattr(adb_manager, "ADB_BINARY", "/nonexistent/adb")
+    code, out, err = _run(["devices"])
+    assert code == 1
+    assert out == ""
+    assert "Cannot reach adb: /nonexistent/adb not found" in err
+
+
+def test_devices_lists_the_fleet(client, fleet, monkeypatch):
+    monkeypatch.setattr(adb_manager, "get_default_client", lambda: client)
+    code, out, _err = _run(["devices"])
+    assert code == 0
+    assert [json.loads(line)["device_id"] for line in out.splitlines()] == fleet.serials
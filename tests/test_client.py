@@ -0,0 +1,108 @@
+"""Smart-socket requests and shell v2 / legacy framing against the fake server."""
+
+from __future__ import annotations
+
+import socket
+
+import pytest
+
+from multi_android_lab.adb.client import (
+    AdbClient,
+    AdbCommandError,
+    AdbConnectionError,
+    AdbStreamError,
+    AdbTimeoutError,
+    parse_device_list,
+)
+from multi_android_lab.adb.device import Device
+
+
+def test_list_devices_parses_long_format(client, fleet):
+    devices = client.list_devices()
+    assert [entry["id"] for entry in devices] == fleet.serials
+    assert devices[0]["status"] == "device"
+    assert devices[0]["usb"] == "1-1.1"
+    assert devices[1]["model"] == "Bench_2"
+
+
+def test_parse_device_list_skips_banner_and_daemon_lines():
+    text = "* daemon started successfully\nList of devices attached\nemu-1\toffline transport_id:3\n\n"
+    assert parse_device_list(text) == [{"id": "emu-1", "status": "offline", "transport_id": "3"}]
+
+
+def test_features_are_cached_per_serial(client, fleet, serial):
+    assert client.supports_shell_v2(serial)
+    fleet.features = "cmd"
+    assert client.supports_shell_v2(serial)
+    client.forget_device(serial)
+    assert not client.supports_shell_v2(serial)
+
+
+def test_shell_v2_returns_output_and_exit_code(client, fleet, serial):
+    fleet.script("false", "nope\n", exit_code=3)
+    ok = client.shell(serial, "echo hello")
+    failed = client.shell(serial, "false")
+    assert (ok.output, ok.exit_code) == ("hello\n", 0)
+    assert (failed.output, failed.exit_code) == ("nope\n", 3)
+    assert ok.timing is not None and ok.timing.total >= ok.timing.first_byte >= 0
+
+
+def test_legacy_shell_has_no_exit_code(client, fleet, serial):
+    fleet.features = "cmd"
+    result = client.shell(serial, "echo legacy")
+    assert result.output == "legacy\n"
+    assert result.exit_code is None
+    assert result.ok
+
+
+def test_unknown_device_fails_with_server_message(client):
+    with pytest.raises(AdbCommandError, match="not found"):
+        client.shell("missing", "echo x")
+
+
+def test_slow_command_times_out(client, fleet, serial):
+    fleet.script("sleep", delay=1.0)
+    with pytest.raises(AdbTimeoutError):
+        client.shell(serial, "sleep", timeout=0.2)
+
+
+def test_unreachable_server_marks_client_unavailable():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    client = AdbClient(port=port, timeout=0.5)
+    with pytest.raises(AdbConnectionError):
+        client.list_devices()
+    assert not client.available
+
+
+def test_stream_cut_after_the_request_is_a_stream_error(client, fleet, serial):
+    fleet.dropped.add("input tap 1 1")
+    with pytest.raises(AdbStreamError):
+        client.shell(serial, "input tap 1 1")
+
+
+@pytest.mark.parametrize("persistent_shell", [False, True])
+def test_command_is_not_rerun_when_its_stream_breaks(client, journal, fleet, serial, persistent_shell):
+    fleet.dropped.add("input tap 1 1")
+    device = Device(serial, client=client, journal=journal, persistent_shell=persistent_shell)
+    try:
+        result = device.run_command("input tap 1 1")
+    finally:
+        device.close()
+    assert not result.ok
+    assert fleet.history.count((serial, "input tap 1 1")) == 1
+
+
+def test_health_counts_transport_failures_not_output(client, journal, fleet, serial):
+    fleet.script("cat notes", "error: this is just file content\n")
+    fleet.script("sleep", delay=1.0)
+    device = Device(serial, client=client, journal=journal)
+    try:
+        assert device.run_command("cat notes").ok
+        assert device.health.consecutive_failures == 0
+        timed_out = device.run_command("sleep", timeout=0.2)
+    finally:
+        device.close()
+    assert timed_out.error and not timed_out.ok
+    assert device.health.consecutive_failures == 1
@@ -0,0 +1,110 @@
+"""SingleFlight: concurrent identical queries share one execution."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from multi_android_lab.adb.cancel import CancelScope
+from multi_android_lab.adb.client import AdbCancelledError, AdbError
+from multi_android_lab.adb.coalesce import SingleFlight
+
+
+def _concurrently(count, func):
+    results = [None] * count
+    errors = [None] * count
+
+    def _call(index):
+        try:
+            results[index] = func()
+        except Exception as exc:  # noqa: BLE001 - inspected by the test
+            errors[index] = exc
+
+    threads = [threading.Thread(target=_call, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    runs = []
+
+    def _query():
+        runs.append(1)
+        time.sleep(0.2)
+        return "answer"
+
+    results, errors = _concurrently(4, lambda: flight.do("key", _query))
+    assert results == ["answer"] * 4 and errors == [None] * 4
+    assert len(runs) == 1
+    assert flight.stats() == {"calls": 4, "executed": 1, "shared": 3}
+
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+    assert [flight.do("key", lambda: index) for index in range(3)] == [0, 1, 2]
+    assert flight.stats()["shared"] == 0
+
+
+def test_followers_get_their_own_error():
+    flight = SingleFlight()
+
+    def _fail():
+        time.sleep(0.2)
+        raise AdbError("boom")
+
+    _results, errors = _concurrently(3, lambda: flight.do("key", _fail))
+    assert all(isinstance(error, AdbError) for error in errors)
+    # Each follower raises its own copy, chained to the leader's exception.
+    leader = next(error for error in errors if error.__cause__ is None)
+    assert all(error.__cause__ is leader for error in errors if error is not leader)
+    assert len({id(error) for error in errors}) == 3
+
+
+def test_queries_with_different_timeouts_are_not_shared(device, fleet):
+    fleet.script("slow query", "value\n", delay=0.2)
+    timeouts = iter([5.0, 5.0, 6.0])
+    results, errors = _concurrently(3, lambda: device._query("slow query", timeout=next(timeouts)))
+    assert results == ["value"] * 3 and errors == [None] * 3
+    assert device.coalesce_stats() == {"calls": 3, "executed": 2, "shared": 1}
+
+
+def test_follower_reruns_when_the_leader_was_cancelled(device, fleet):
+    fleet.script("slow query", "value\n", delay=0.3)
+    scope = CancelScope(name="leader window")
+    outcome = {}
+
+    def _leader():
+        with scope.activate():
+            try:
+                device._query("slow query", timeout=5)
+            except AdbCancelledError as exc:
+                outcome["leader"] = exc
+
+    leader = threading.Thread(target=_leader)
+    leader.start()
+    time.sleep(0.05)
+    threading.Timer(0.05, scope.cancel).start()
+    outcome["follower"] = device._query("slow query", timeout=5)
+    leader.join(5)
+    assert isinstance(outcome["leader"], AdbCancelledError)
+    assert outcome["follower"] == "value"
+
+
+def test_follower_keeps_its_own_deadline(device, fleet):
+    fleet.script("slow query", "value\n", delay=1.0)
+    leader = threading.Thread(target=device._query, args=("slow query", 5))
+    leader.start()
+    time.sleep(0.05)
+    started = time.monotonic()
+    with CancelScope(0.2):
+        with pytest.raises(AdbError):
+            device._query("slow query", timeout=5)
+    assert time.monotonic() - started < 0.8
+    leader.join(5)
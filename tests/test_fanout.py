@@ -0,0 +1,88 @@
+"""Fan-out through the shared scheduler: per-device ordering and deadlines."""
+
+from __future__ import annotations
+
+import threading
+import time
+from functools import partial
+from types import SimpleNamespace
+
+from multi_android_lab.adb.adb_manager import ADBManager
+from multi_android_lab.adb.cancel import current_scope
+from multi_android_lab.adb.fanout import fan_out
+from multi_android_lab.utils.scheduler import PRIORITY_FLEET, PRIORITY_INTERACTIVE, get_scheduler
+
+
+def test_fan_out_waits_for_work_already_running_on_the_device():
+    devices = [SimpleNamespace(id="fanout-a"), SimpleNamespace(id="fanout-b")]
+    running, release = threading.Event(), threading.Event()
+    order = []
+    blocker = get_scheduler().submit(
+        lambda: (running.set(), release.wait(5), order.append("window")), priority=PRIORITY_INTERACTIVE, key="fanout-a"
+    )
+    running.wait(1)
+    threading.Timer(0.2, release.set).start()
+
+    report = fan_out(devices, lambda device: order.append(device.id) or "ok", timeout=5)
+
+    blocker.result(timeout=1)
+    assert not report.failed
+    assert order.index("window") < order.index("fanout-a")
+
+
+def test_calls_run_under_their_own_deadline():
+    deadlines = []
+    report = fan_out([SimpleNamespace(id="fanout-c")], lambda device: deadlines.append(current_scope().remaining()))
+    assert not report.failed
+    assert 0 < deadlines[0] <= 15.0
+
+
+def test_device_that_never_starts_is_reported_after_the_batch_deadline():
+    running, release = threading.Event(), threading.Event()
+    blocker = get_scheduler().submit(lambda: (running.set(), release.wait(5)), key="fanout-d")
+    running.wait(1)
+    started = time.monotonic()
+    try:
+        report = fan_out([SimpleNamespace(id="fanout-d")], lambda device: "ok", timeout=0.2)
+    finally:
+        release.set()
+    blocker.result(timeout=1)
+    assert report.results[0].error.startswith("not started")
+    assert time.monotonic() - started < 2
+
+
+def test_concurrent_fan_outs_submitted_to_the_pool_all_finish():
+    # Coordinators block a worker while their devices' calls queue on the same pool.
+    devices = [SimpleNamespace(id=f"fanout-nested-{index}") for index in range(3)]
+    scheduler = get_scheduler()
+
+    def _work(device):
+        time.sleep(0.1)
+        return "ok"
+
+    coordinators = [
+        scheduler.submit(partial(fan_out, devices, _work, label=f"run {index}", timeout=1.0), priority=PRIORITY_FLEET)
+        for index in range(scheduler.max_workers)
+    ]
+    reports = [future.result(timeout=10) for future in coordinators]
+    assert all(not report.failed for report in reports)
+    assert all(len(report.results) == len(devices) for report in reports)
+
+
+def test_timed_out_command_counts_as_failed(device, fleet):
+    fleet.script("hang", delay=1.0)
+    report = fan_out([device], lambda target: target.run_command("hang", timeout=0.2))
+    assert report.failed and report.results[0].error == "Command timed out"
+
+
+def test_refresh_snapshots_probes_every_online_device(client, fleet):
+    manager = ADBManager(client=client)
+    try:
+        devices = manager.refresh_devices()
+        report = manager.refresh_snapshots()
+    finally:
+        for device in list(manager.devices.values()):
+            device.close()
+    assert sorted(result.device_id for result in report.results) == fleet.serials
+    assert not report.failed
+    assert all(device.snapshot is not None for device in devices)
@@ -0,0 +1,71 @@
+"""InputQueue batching and shutdown."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from multi_android_lab.adb.adb_manager import ADBManager
+from multi_android_lab.adb.client import AdbCancelledError
+from multi_android_lab.adb.input_queue import merge_commands
+from multi_android_lab.utils.scheduler import get_scheduler
+
+
+def test_merge_folds_consecutive_keyevents():
+    commands = ["input keyevent 4", "input keyevent 3", "input tap 1 2", "input keyevent 4"]
+    assert merge_commands(commands) == "input keyevent 4 3 ; input tap 1 2 ; input keyevent 4"
+
+
+def test_queued_actions_run_in_one_batch(device):
+    futures = [device.enqueue_input("back"), device.enqueue_input("home")]
+    results = [future.result(timeout=5) for future in futures]
+    assert results[0] is results[1]
+    assert len(device.input_queue.batches) == 1
+
+
+def test_close_fails_pending_actions(device):
+    queue = device.input_queue
+    queue.flush_window = 0.5
+    first = queue.submit("back")
+    device.close()
+    with pytest.raises(AdbCancelledError):
+        first.result(timeout=1)
+    with pytest.raises(AdbCancelledError):
+        queue.submit("home").result(timeout=1)
+    assert not any(thread.name.startswith("input-queue-") for thread in threading.enumerate())
+
+
+def test_flush_waits_for_work_already_queued_on_the_device(device):
+    running, release = threading.Event(), threading.Event()
+    order = []
+
+    def earlier() -> None:
+        running.set()
+        release.wait(5)
+        order.append("earlier")
+
+    blocker = get_scheduler().submit(earlier, key=device.id)
+    assert running.wait(5)
+    click = device.enqueue_input("back")
+    time.sleep(device.input_queue.flush_window * 3)
+    assert not click.done()
+    release.set()
+    click.add_done_callback(lambda _future: order.append("click"))
+    click.result(timeout=5)
+    blocker.result(timeout=5)
+    assert order == ["earlier", "click"]
+
+
+def test_collect_inputs_reports_each_device(client, fleet):
+    manager = ADBManager(client=client)
+    try:
+        manager.refresh_devices()
+        futures = manager.enqueue_on_all("back")
+        report = manager.collect_inputs(futures, "back")
+    finally:
+        for device in list(manager.devices.values()):
+            device.close()
+    assert sorted(result.device_id for result in report.results) == fleet.serials
+    assert not report.failed
@@ -0,0 +1,58 @@
+"""Touch trace replay: frame grouping, pacing and the streamed shell on both protocols."""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from multi_android_lab.adb.input_trace import (
+    ABS_MT_POSITION_X,
+    EV_ABS,
+    EV_SYN,
+    InputDevice,
+    TouchTrace,
+    TraceEvent,
+    build_replay_frames,
+)
+
+GETEVENT_P = """add device 1: /dev/input/event2
+  name:     "touch"
+  events:
+    ABS (0003): 0035  : value 0, min 0, max 1000, fuzz 0, flat 0, resolution 0
+                0036  : value 0, min 0, max 2000, fuzz 0, flat 0, resolution 0
+"""
+
+TRACE = TouchTrace(
+    [
+        TraceEvent(0.0, EV_ABS, ABS_MT_POSITION_X, 0.5),
+        TraceEvent(0.001, EV_SYN, 0, 0),
+        TraceEvent(0.3, EV_ABS, ABS_MT_POSITION_X, 0.25),
+        TraceEvent(0.301, EV_SYN, 0, 0),
+    ]
+)
+
+
+def test_close_events_share_a_frame_and_positions_are_rescaled():
+    touchscreen = InputDevice("/dev/input/event2", axes={ABS_MT_POSITION_X: (0, 1000)})
+    frames = build_replay_frames(TRACE, touchscreen, (1080, 2400))
+    assert [offset for offset, _ in frames] == [0.0, 0.3]
+    assert frames[0][1] == "sendevent /dev/input/event2 3 53 500\nsendevent /dev/input/event2 0 0 0\n"
+
+
+@pytest.mark.parametrize("features", ["shell_v2,cmd", "cmd"])
+def test_replay_is_streamed_and_paced(device, fleet, serial, features):
+    fleet.script("getevent -p", GETEVENT_P)
+    device.input_devices()
+    fleet.features = features
+    device.client.forget_device(serial)
+    started = time.monotonic()
+    result = device.replay_trace(TRACE)
+    assert result.ok, result.output
+    assert time.monotonic() - started >= 0.3
+    assert device.health.consecutive_failures == 0
+    if features == "cmd":
+        # The legacy path runs `sh` over exec:, one line at a time.
+        sent = [command for _, command in fleet.history if command.startswith("sendevent")]
+        assert sent[0] == "sendevent /dev/input/event2 3 53 500"
+        assert sent[2] == "sendevent /dev/input/event2 3 53 250"
@@ -0,0 +1,67 @@
+"""Streamed APK installs: chunked transfer, cancellation and the binary fallback."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from multi_android_lab.adb import install
+from multi_android_lab.adb.cancel import CancelScope
+from multi_android_lab.adb.client import AdbCancelledError
+from multi_android_lab.adb.install import CHUNK_SIZE, ApkPackage, BusLimiter, install_apk, interleave_buses, usb_bus
+
+
+@pytest.fixture
+def apk(tmp_path) -> ApkPackage:
+    path = tmp_path / "app.apk"
+    path.write_bytes(os.urandom(CHUNK_SIZE * 3 + 17))
+    return ApkPackage.load(path)
+
+
+def test_usb_bus_from_device_list_fields():
+    assert usb_bus({"usb": "1-4.2"}) == "1"
+    assert usb_bus({}) == "?"
+
+
+def test_interleave_buses_takes_each_bus_in_turn():
+    ports = [("a", "1-1"), ("b", "1-2"), ("c", "1-3"), ("d", "2-1")]
+    devices = [SimpleNamespace(id=name, info={"usb": usb}) for name, usb in ports]
+    assert [device.id for device in interleave_buses(devices)] == ["a", "d", "b", "c"]
+
+
+def test_install_streams_the_whole_file(device, apk):
+    result = install_apk(device, apk, limiter=BusLimiter(1))
+    assert result.ok and result.output == "Success"
+    assert result.sent == apk.size
+    assert result.throughput > 0
+
+
+def test_cancelled_install_is_not_retried(device, apk):
+    scope = CancelScope(name="rollout")
+    scope.cancel("user stopped the rollout")
+    started = time.monotonic()
+    with scope.activate(), pytest.raises(AdbCancelledError):
+        install_apk(device, apk, retries=2)
+    assert time.monotonic() - started < install.RETRY_DELAY
+
+
+def test_missing_adb_binary_is_reported_as_an_adb_error(device, apk, monkeypatch):
+    monkeypatch.setattr(install, "ADB_BINARY", "/nonexistent/adb")
+    device.client._unavailable_until = time.monotonic() + 60
+    result = install_apk(device, apk, retries=0)
+    assert not result.ok
+    assert result.output.startswith("error: Cannot run /nonexistent/adb")
+
+
+def test_cancel_during_retry_delay_stops_the_install(device, apk, monkeypatch):
+    monkeypatch.setattr(install, "install_once", lambda *args: ("Failure [INSTALL_FAILED_INTERNAL_ERROR]", 0, 0.0))
+    scope = CancelScope(name="rollout")
+    threading.Timer(0.2, scope.cancel, args=("user stopped the rollout",)).start()
+    started = time.monotonic()
+    with scope.activate(), pytest.raises(AdbCancelledError):
+        install_apk(device, apk, retries=2)
+    assert time.monotonic() - started < install.RETRY_DELAY
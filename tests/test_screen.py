@@ -0,0 +1,31 @@
+"""Screen capture error handling: binary fallback, cancellation and health."""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from multi_android_lab.adb import screen
+from multi_android_lab.adb.cancel import CancelScope
+from multi_android_lab.adb.client import AdbCancelledError, AdbConnectionError
+
+
+@pytest.fixture
+def no_binary(monkeypatch):
+    monkeypatch.setattr(screen, "ADB_BINARY", "/nonexistent/adb")
+
+
+def test_missing_adb_binary_is_an_adb_error_and_counts_against_health(device, no_binary):
+    device.client._unavailable_until = time.monotonic() + 60
+    with pytest.raises(AdbConnectionError, match="Cannot run /nonexistent/adb"):
+        device.capture_screen()
+    assert device.health.consecutive_failures == 1
+
+
+def test_cancelled_capture_does_not_fall_back_to_the_binary(device, no_binary):
+    scope = CancelScope(name="window")
+    scope.cancel("window closed")
+    with scope.activate(), pytest.raises(AdbCancelledError):
+        device.capture_screen()
+    assert device.health.consecutive_failures == 0
@@ -0,0 +1,56 @@
+"""Persistent shell: sentinel framing, exit codes and reopening after failures."""
+
+from __future__ import annotations
+
+import logging
+
+import pytest
+
+from multi_android_lab.adb.client import AdbTimeoutError
+from multi_android_lab.adb.shell_session import ShellSession, ShellSessionUnsupported
+
+logger = logging.getLogger("tests.shell_session")
+
+
+@pytest.fixture
+def session(client, serial):
+    session = ShellSession(client, serial, logger)
+    yield session
+    session.close()
+
+
+def test_commands_share_one_stream(session):
+    first = session.run("echo one")
+    stream = session._stream
+    second = session.run("echo two")
+    assert (first.output, second.output) == ("one\n", "two\n")
+    assert session._stream is stream
+    assert second.timing is not None and second.timing.connect < first.timing.connect + 1
+
+
+def test_exit_status_comes_from_the_marker(session, fleet):
+    fleet.script("ls /missing", "ls: /missing: No such file or directory", exit_code=1)
+    result = session.run("ls /missing")
+    assert result.exit_code == 1
+    assert result.output == "ls: /missing: No such file or directory"
+    assert session.run("echo after").output == "after\n"
+
+
+def test_output_resembling_a_marker_is_not_a_boundary(session, fleet):
+    fleet.script("tricky", "__MAL_deadbeef_1__ 0\nstill output")
+    assert session.run("tricky").output == "__MAL_deadbeef_1__ 0\nstill output"
+
+
+def test_timeout_discards_the_session(session, fleet):
+    fleet.script("hang", delay=1.0)
+    session.run("echo warm")
+    with pytest.raises(AdbTimeoutError):
+        session.run("hang", timeout=0.2)
+    assert not session.is_open
+    assert session.run("echo fresh").output == "fresh\n"
+
+
+def test_devices_without_shell_v2_are_refused(client, fleet, serial):
+    fleet.features = "cmd"
+    with pytest.raises(ShellSessionUnsupported):
+        ShellSession(client, serial, logger).run("echo x")
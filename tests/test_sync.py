@@ -0,0 +1,98 @@
+"""sync: service framing: STAT/LIST in both versions, chunked SEND/RECV and deltas."""
+
+from __future__ import annotations
+
+import os
+import stat
+import time
+
+import pytest
+
+from multi_android_lab.adb import sync
+from multi_android_lab.adb.client import AdbCommandError
+from multi_android_lab.adb.sync import SYNC_DATA_MAX, SyncConnection, pull, push, sync_dir
+
+
+@pytest.fixture(params=["v1", "v2"])
+def sync_version(request, fleet):
+    if request.param == "v1":
+        fleet.features = "shell_v2,cmd"
+    return request.param
+
+
+def test_push_and_pull_round_trip_in_chunks(device, fleet, tmp_path, sync_version):
+    payload = os.urandom(SYNC_DATA_MAX * 2 + 123)
+    local = tmp_path / "blob.bin"
+    local.write_bytes(payload)
+
+    sent = push(device, local, "/sdcard/blob.bin")
+    received = pull(device, "/sdcard/blob.bin", tmp_path / "copy.bin")
+
+    assert sent.bytes == received.bytes == len(payload)
+    assert fleet.files[device.id]["/sdcard/blob.bin"][0] == payload
+    assert (tmp_path / "copy.bin").read_bytes() == payload
+    assert not (tmp_path / "copy.bin.part").exists()
+
+
+def test_push_into_a_directory_keeps_the_file_name(device, fleet, tmp_path, sync_version):
+    fleet.files[device.id]["/sdcard/Download/existing"] = (b"", 0o100644, 0)
+    local = tmp_path / "notes.txt"
+    local.write_text("hola")
+    push(device, local, "/sdcard/Download")
+    assert "/sdcard/Download/notes.txt" in fleet.files[device.id]
+
+
+def test_stat_and_list(device, fleet, sync_version):
+    fleet.files[device.id]["/data/local/tmp/a.txt"] = (b"abc", stat.S_IFREG | 0o644, 1_700_000_000)
+    fleet.files[device.id]["/data/local/tmp/sub/b.txt"] = (b"", stat.S_IFREG | 0o600, 1)
+    with SyncConnection(device, timeout=5) as connection:
+        found = connection.stat("/data/local/tmp/a.txt")
+        missing = connection.stat("/data/local/tmp/nope")
+        entries = connection.list("/data/local/tmp")
+    assert (found.size, found.mtime, found.is_dir) == (3, 1_700_000_000, False)
+    assert not missing.exists
+    assert sorted(entries) == ["a.txt", "sub"]
+    assert entries["sub"].is_dir
+
+
+def test_pull_of_a_missing_file_reports_the_device_error(device, tmp_path, sync_version):
+    with pytest.raises(AdbCommandError, match="No such file"):
+        pull(device, "/sdcard/missing", tmp_path / "missing")
+    assert not (tmp_path / "missing").exists()
+
+
+def test_sync_dir_sends_only_changed_files(device, fleet, tmp_path, sync_version):
+    source = tmp_path / "media"
+    (source / "nested").mkdir(parents=True)
+    (source / "one.txt").write_text("1")
+    (source / "nested" / "two.txt").write_text("22")
+
+    first = sync_dir(device, source, "/sdcard/media")
+    second = sync_dir(device, source, "/sdcard/media")
+    (source / "one.txt").write_text("changed")
+    os.utime(source / "one.txt", (2_000_000_000, 2_000_000_000))
+    third = sync_dir(device, source, "/sdcard/media")
+
+    assert (first.transferred, first.skipped) == (2, 0)
+    assert (second.transferred, second.skipped) == (0, 2)
+    assert (third.transferred, third.skipped) == (1, 1)
+    assert fleet.files[device.id]["/sdcard/media/one.txt"][0] == b"changed"
+
+
+@pytest.mark.parametrize(
+    "output, expected",
+    [
+        ("/tmp/media/.: 1 file pushed, 1 skipped. 0.1 MB/s (7 bytes in 0.001s)\n", (1, 1, 7, True)),
+        ("adb: warning: something else entirely\n", (0, 0, 0, False)),
+    ],
+)
+def test_binary_sync_reports_what_adb_said(device, tmp_path, monkeypatch, output, expected):
+    source = tmp_path / "media"
+    source.mkdir()
+    (source / "one.txt").write_text("1")
+    (source / "two.txt").write_text("22")
+    monkeypatch.setattr(sync, "_binary_transfer", lambda *args: output)
+    device.client._unavailable_until = time.monotonic() + 60
+    stats = sync_dir(device, source, "/sdcard/media")
+    assert (stats.transferred, stats.skipped, stats.bytes, stats.exact) == expected
+    assert stats.files == 2
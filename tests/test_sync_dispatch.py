@@ -0,0 +1,40 @@
+"""Synchronized dispatch: staging, release and skew from the device clocks."""
+
+from __future__ import annotations
+
+from typing import Iterator, List
+
+import pytest
+
+from multi_android_lab.adb import Device
+from multi_android_lab.adb.sync_dispatch import synchronized_dispatch
+from multi_android_lab.cli import main
+
+
+@pytest.fixture
+def devices(client, journal, fleet) -> Iterator[List[Device]]:
+    devices = [Device(serial, client=client, journal=journal) for serial in fleet.serials]
+    yield devices
+    for device in devices:
+        device.close()
+
+
+@pytest.mark.parametrize("features", ["shell_v2,cmd", "cmd"])
+def test_offsets_come_from_device_timestamps(devices, fleet, features):
+    fleet.features = features
+    fleet.script("getprop ro.build.version.release", "14\n")
+    report = synchronized_dispatch(devices, "run_command", "getprop ro.build.version.release")
+
+    assert not report.failed
+    # The device timestamp line is consumed, not returned as output.
+    assert [result.output for result in report.results] == ["14", "14"]
+    assert set(report.offsets) == set(report.write_offsets) == set(fleet.serials)
+    assert min(report.offsets.values()) == 0.0
+    assert 0.0 <= report.skew < 1.0
+
+
+def test_sync_flag_is_rejected_for_commands_it_does_not_apply_to(capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        main(["--sync", "logcat"])
+    assert exc_info.value.code == 2
+    assert "--sync is not supported by 'logcat'" in capsys.readouterr().err